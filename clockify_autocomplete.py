@@ -0,0 +1,235 @@
+import heapq
+import sys
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain
+
+from clockify_storage import frecency_score
+
+
+# Prefix ranges larger than this get their top suggestions cached
+PREFIX_SCAN_LIMIT = 256
+CACHED_SUGGESTIONS = 32
+# Fuzzy matching only looks at the rarest trigrams of the typed text
+FUZZY_TRIGRAMS = 8
+MIN_FUZZY_SIMILARITY = 0.4
+# Default cap on activity names kept for autocomplete
+MAX_HISTORY_NAMES = 10000
+
+
+def fold(text):
+    """Normalize text for matching: case-insensitive, single spaces"""
+    return ' '.join(text.split()).casefold()
+
+
+def trigrams(folded, complete=True):
+    """Return the set of character trigrams of an already folded string.
+
+    Names are padded on both sides. Text that is still being typed is only
+    padded at the front, since its end is not a word boundary yet.
+    """
+    padded = f"  {folded} " if complete else f"  {folded}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AutocompleteIndex:
+    """Activity names indexed for prefix and typo-tolerant lookup.
+
+    Names are kept in an array sorted by their folded form, so all names
+    starting with the typed text form one contiguous slice found by
+    bisection. Slices too large to rank on every keystroke (short prefixes)
+    keep a cached top list that is updated in place when a name is used. A
+    trigram index supplies fuzzy matches when the prefix alone does not
+    fill the list. Results are ranked by frecency, which does not drift
+    with time, so cached rankings stay valid.
+
+    With `max_names`, the index holds at most that many names. Once it is
+    a tenth over the cap, it is rebuilt from the most frecent names, so
+    eviction costs amortized constant time per added name.
+    """
+
+    def __init__(self, max_names=None):
+        self.max_names = max_names
+        self._clear()
+
+    def _clear(self):
+        self._names = []        # id -> name
+        self._stats = []        # id -> [use count, last used (epoch seconds)]
+        self._scores = []       # id -> frecency score
+        self._ids = {}          # name -> id
+        self._sorted_keys = []  # folded names in sorted order
+        self._sorted_ids = []   # ids in the same order as _sorted_keys
+        self._trigrams = defaultdict(set)
+        self._top_cache = {}    # folded prefix -> ids ranked best first
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        """Iterate names, best frecency first"""
+        ranked = sorted(range(len(self._names)), key=self._scores.__getitem__, reverse=True)
+        return (self._names[i] for i in ranked)
+
+    def add(self, name, last_used=None, count=1):
+        """Record `count` uses of `name`, adding it if it is new"""
+        name = name.strip()
+        if not name:
+            return
+        if last_used is None:
+            last_used = time.time()
+
+        activity_id = self._ids.get(name)
+        if activity_id is None:
+            activity_id = self._insert(sys.intern(name), count, last_used)
+        else:
+            stats = self._stats[activity_id]
+            stats[0] += count
+            stats[1] = max(stats[1], last_used)
+            self._scores[activity_id] = frecency_score(*stats)
+        self._update_cached_rankings(activity_id)
+        if self.max_names and len(self._names) > self.max_names + max(1, self.max_names // 10):
+            self._evict()
+
+    def extend(self, stats):
+        """Bulk-load (name, use count, last used) tuples, e.g. at startup"""
+        if self.max_names and not self._names:
+            # Never materialize more names than the cap allows
+            stats = heapq.nlargest(self.max_names, stats, key=lambda item: frecency_score(item[1], item[2]))
+        new_ids = []
+        for name, count, last_used in stats:
+            name = name.strip()
+            if not name:
+                continue
+            if name in self._ids:
+                self.add(name, last_used, count)
+                continue
+            name = sys.intern(name)
+            activity_id = len(self._names)
+            folded = sys.intern(fold(name))
+            self._names.append(name)
+            self._stats.append([count, last_used])
+            self._scores.append(frecency_score(count, last_used))
+            self._ids[name] = activity_id
+            for trigram in trigrams(folded):
+                self._trigrams[trigram].add(activity_id)
+            new_ids.append((folded, activity_id))
+
+        if new_ids:
+            # Sorting once is far cheaper than one insertion per name
+            merged = sorted(list(zip(self._sorted_keys, self._sorted_ids)) + new_ids)
+            self._sorted_keys = [key for key, _ in merged]
+            self._sorted_ids = [activity_id for _, activity_id in merged]
+            self._top_cache.clear()
+            self._warm_cache('', 0, len(self._sorted_keys))
+        if self.max_names and len(self._names) > self.max_names:
+            self._evict()
+
+    def _evict(self):
+        """Rebuild the index from the `max_names` most frecent names"""
+        keep = heapq.nlargest(self.max_names, range(len(self._names)), key=self._scores.__getitem__)
+        stats = [(self._names[i], self._stats[i][0], self._stats[i][1]) for i in keep]
+        self._clear()
+        self.extend(stats)
+
+    def memory_usage(self):
+        """Return the approximate bytes held by the index, names included"""
+        containers = [self._names, self._stats, self._scores, self._ids, self._sorted_keys,
+                      self._sorted_ids, self._trigrams, self._top_cache]
+        size = sum(sys.getsizeof(container) for container in containers)
+        size += sum(sys.getsizeof(name) for name in self._names)
+        size += sum(sys.getsizeof(key) for key in self._sorted_keys)
+        size += sum(sys.getsizeof(stats) for stats in self._stats)
+        size += sum(sys.getsizeof(postings) for postings in self._trigrams.values())
+        size += sum(sys.getsizeof(ranked) for ranked in self._top_cache.values())
+        return size
+
+    def _warm_cache(self, prefix, low, high):
+        """Precompute rankings for every prefix whose slice is too large to scan"""
+        if high - low <= PREFIX_SCAN_LIMIT:
+            return
+        self._top_cache[prefix] = heapq.nlargest(
+            CACHED_SUGGESTIONS, self._sorted_ids[low:high], key=self._scores.__getitem__
+        )
+        child_length = len(prefix) + 1
+        position = low
+        while position < high:
+            key = self._sorted_keys[position]
+            if len(key) < child_length:
+                position += 1
+                continue
+            child = key[:child_length]
+            end = bisect_left(self._sorted_keys, child + '\U0010ffff', position, high)
+            self._warm_cache(child, position, end)
+            position = end
+
+    def _insert(self, name, count, last_used):
+        activity_id = len(self._names)
+        folded = sys.intern(fold(name))
+        self._names.append(name)
+        self._stats.append([count, last_used])
+        self._scores.append(frecency_score(count, last_used))
+        self._ids[name] = activity_id
+
+        position = bisect_left(self._sorted_keys, folded)
+        self._sorted_keys.insert(position, folded)
+        self._sorted_ids.insert(position, activity_id)
+        for trigram in trigrams(folded):
+            self._trigrams[trigram].add(activity_id)
+        return activity_id
+
+    def _update_cached_rankings(self, activity_id):
+        """Fix up every cached prefix ranking the name belongs to"""
+        if not self._top_cache:
+            return
+        folded = fold(self._names[activity_id])
+        score = self._scores[activity_id]
+        for length in range(len(folded) + 1):
+            ranked = self._top_cache.get(folded[:length])
+            if ranked is None:
+                continue
+            if activity_id not in ranked:
+                if len(ranked) >= CACHED_SUGGESTIONS and score <= self._scores[ranked[-1]]:
+                    continue
+                ranked.append(activity_id)
+            ranked.sort(key=self._scores.__getitem__, reverse=True)
+            del ranked[CACHED_SUGGESTIONS:]
+
+    def _prefix_range(self, folded):
+        low = bisect_left(self._sorted_keys, folded)
+        high = bisect_left(self._sorted_keys, folded + '\U0010ffff', low)
+        return low, high
+
+    def _prefix_matches(self, folded, limit):
+        """Return ids of the best `limit` names starting with `folded`"""
+        low, high = self._prefix_range(folded)
+        if high - low <= PREFIX_SCAN_LIMIT or limit > CACHED_SUGGESTIONS:
+            return heapq.nlargest(limit, self._sorted_ids[low:high], key=self._scores.__getitem__)
+
+        ranked = self._top_cache.get(folded)
+        if ranked is None:
+            ranked = heapq.nlargest(CACHED_SUGGESTIONS, self._sorted_ids[low:high], key=self._scores.__getitem__)
+            self._top_cache[folded] = ranked
+        return ranked[:limit]
+
+    def _fuzzy_matches(self, folded, limit, exclude):
+        """Return ids of names sharing enough trigrams with `folded`"""
+        postings = [self._trigrams.get(t, ()) for t in trigrams(folded, complete=False)]
+        # Rare trigrams are the most selective and the cheapest to count
+        rarest = heapq.nsmallest(FUZZY_TRIGRAMS, postings, key=len)
+        needed = max(1, MIN_FUZZY_SIMILARITY * len(rarest))
+
+        hits = Counter(chain.from_iterable(rarest))
+        candidates = [i for i, count in hits.items() if count >= needed and i not in exclude]
+        return heapq.nlargest(limit, candidates, key=lambda i: (hits[i], self._scores[i]))
+
+    def suggest(self, text, limit=8):
+        """Return up to `limit` names for the typed text, best first"""
+        folded = fold(text)
+        ids = self._prefix_matches(folded, limit)
+        if len(ids) < limit and len(folded) >= 3:
+            ids = ids + self._fuzzy_matches(folded, limit - len(ids), set(ids))
+        return [self._names[i] for i in ids]
@@ -0,0 +1,315 @@
+"""Benchmark the helper's hot paths against synthetic multi-year logs.
+
+Usage:
+    python clockify_bench.py --sizes 10000,100000,1000000
+    python clockify_bench.py --baseline bench_baseline.json
+    python clockify_bench.py --save-baseline bench_baseline.json
+    python clockify_bench.py --check-idle-budget
+
+Every log size runs in its own subprocess so peak RSS is measured per size.
+Results are written as JSON; with --baseline, any metric that got worse by
+more than --tolerance is reported and the exit status is 1.
+
+--check-idle-budget instead runs the helper's background machinery
+(scheduler, log writer, command socket, file watch) idle for a few minutes
+and fails if its wakeups, CPU time or memory exceed IDLE_BUDGET.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from clockify_core import ClockifyEngine, SimulatedClock
+from clockify_export import export_clockify_csv
+from clockify_ipc import CommandHandler, IpcServer
+from clockify_names import AliasTable
+from clockify_resources import IDLE_BUDGET, check_budget, peak_rss_mb
+from clockify_settings import CONFIG_FILE, HIDDEN_FILE_WATCH_INTERVAL_SECONDS, Settings
+from clockify_storage import LOG_HEADER, TIMESTAMP_FORMAT, open_storage
+
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_IDLE_SECONDS = 180
+IDLE_LOG_ROWS = 100000
+# Metrics where a larger number is better; everything else is a duration or size
+HIGHER_IS_BETTER = {'log_activity_rows_per_second'}
+# Changes smaller than this (by metric unit suffix) are timer noise, not regressions
+NOISE_FLOOR = {'_seconds': 0.02, '_ms': 0.5, '_us': 25, '_mb': 5}
+
+WORDS = [
+    "review", "meeting", "standup", "planning", "bugfix", "deploy", "docs", "email",
+    "research", "design", "testing", "support", "interview", "refactor", "onboarding",
+    "release", "incident", "sync", "demo", "training", "budget", "roadmap", "hiring",
+]
+PROJECTS = ["Atlas", "Beacon", "Comet", "Delta", "Ember", "Falcon", "Gizmo", "Helix"]
+
+
+def activity_names(count, rng):
+    """Return `count` distinct, realistic-looking activity names"""
+    names = set()
+    while len(names) < count:
+        name = f"{rng.choice(PROJECTS)} {rng.choice(WORDS)}"
+        if rng.random() < 0.5:
+            name += f" {rng.choice(WORDS)}"
+        if rng.random() < 0.4:
+            name += f" #{rng.randint(1, 9999)}"
+        names.add(name)
+    return sorted(names)
+
+
+def generate_log(path, rows, distinct=None, seed=1):
+    """Write a synthetic log of `rows` entries spread over working days.
+
+    Activity popularity follows a Zipf-like distribution: a few names are
+    used constantly and a long tail is used once or twice, as in real logs.
+    """
+    rng = random.Random(seed)
+    distinct = distinct or max(50, min(50000, rows // 20))
+    names = activity_names(distinct, rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(names))]
+    picks = rng.choices(names, weights, k=min(rows, 100000))
+
+    now = datetime(2015, 1, 5, 9, 0)
+    previous = None
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        for i in range(rows):
+            step = rng.choice((5, 15, 30, 60, 120))
+            now += timedelta(minutes=step)
+            if now.hour >= 17:
+                now = (now + timedelta(days=3 if now.weekday() == 4 else 1)).replace(hour=9, minute=0)
+            duration = '' if previous is None else str(int((now - previous).total_seconds() / 60))
+            previous = now
+            if rng.random() < 0.08:
+                writer.writerow([now.strftime(TIMESTAMP_FORMAT), "Break", "Break", duration])
+            else:
+                writer.writerow([now.strftime(TIMESTAMP_FORMAT), picks[i % len(picks)], "Work", duration])
+
+
+def bench_settings(backend):
+    return Settings.from_dict({
+        'reminder_interval_hours': '2',
+        'enable_work_hours_only': 'True',
+        'work_hours_start': '09:00',
+        'work_hours_end': '17:00',
+        'snooze_duration_minutes': '15',
+        'log_flush_policy': 'interval',
+        'storage_backend': backend,
+        'sqlite_path': 'bench.db',
+    })
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run_size(rows, backend, workdir):
+    """Benchmark every hot path against one log size and return the metrics"""
+    os.chdir(workdir)
+    log_file = 'time_tracking_log.csv'
+    results = {'rows': rows}
+
+    results['generate_seconds'], _ = timed(generate_log, log_file, rows)
+    settings = bench_settings(backend)
+
+    def start_engine():
+        return ClockifyEngine(settings, open_storage(settings.config, log_file), SimulatedClock())
+
+    # Cold start: no sidecar index or database yet, everything is built from the log
+    results['cold_startup_seconds'], engine = timed(start_engine)
+    engine.stop()
+    results['warm_startup_seconds'], engine = timed(start_engine)
+
+    refresh_seconds, _ = timed(lambda: [engine.storage.last_entries(10) for _ in range(100)])
+    results['refresh_activities_ms'] = refresh_seconds * 10
+
+    history = engine.activity_history
+    results['history_names'] = len(history)
+    results['history_memory_mb'] = history.memory_usage() / (1024 * 1024)
+    rng = random.Random(2)
+    queries = []
+    for name in rng.sample(list(history), min(200, len(history))):
+        queries.extend(name[:length] for length in range(1, min(len(name), 12) + 1))
+    lookup_seconds, _ = timed(lambda: [history.suggest(query) for query in queries])
+    results['autocomplete_lookup_us'] = lookup_seconds / max(len(queries), 1) * 1e6
+
+    entries = 5000
+    log_seconds, _ = timed(lambda: [engine.log_activity(f"Bench entry {i % 40}") for i in range(entries)])
+    flush_seconds, _ = timed(engine.storage.flush)
+    results['log_activity_rows_per_second'] = entries / (log_seconds + flush_seconds)
+
+    results['export_raw_seconds'], _ = timed(engine.storage.export_csv, 'export_raw.csv')
+    results['export_clockify_seconds'], _ = timed(
+        export_clockify_csv, engine.storage, 'export_clockify.csv', state_file='export_state.json'
+    )
+    engine.stop()
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+def run_child(rows, backend):
+    """Run one size in a subprocess and return its metrics"""
+    workdir = tempfile.mkdtemp(prefix='clockify_bench_')
+    try:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', str(rows), '--backend', backend, '--workdir', workdir],
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def start_idle_engine(backend='csv', rows=IDLE_LOG_ROWS):
+    """Start the helper's background machinery in the current directory, as it runs while hidden.
+
+    This is the helper minus Tk and the tray icon: a scheduler with a
+    reminder pending, the log writer, the command socket and the slow file
+    watch, on a log of `rows` rows. Returns the engine and the command
+    server; stop both when done.
+    """
+    generate_log('time_tracking_log.csv', rows)
+    settings = Settings(CONFIG_FILE)
+    settings.save({'storage_backend': backend, 'sqlite_path': 'bench.db'})
+    aliases = AliasTable()
+    engine = ClockifyEngine(settings, open_storage(settings.config, 'time_tracking_log.csv'), aliases=aliases)
+    engine.every(HIDDEN_FILE_WATCH_INTERVAL_SECONDS, lambda: settings.check() or aliases.check())
+    ipc_server = IpcServer(CommandHandler(engine))
+    ipc_server.start()
+    engine.start()
+    engine.submit_activity("Idle budget check")
+    return engine, ipc_server
+
+
+def check_idle_budget(backend, idle_seconds):
+    """Leave the helper's background machinery idle and compare its usage with IDLE_BUDGET.
+
+    See start_idle_engine for what runs. Returns the report and any problems.
+    """
+    workdir = tempfile.mkdtemp(prefix='clockify_idle_')
+    try:
+        os.chdir(workdir)
+        engine, ipc_server = start_idle_engine(backend)
+        try:
+            time.sleep(2)  # Let startup work settle before measuring
+            engine.resources.sample()
+            time.sleep(idle_seconds)
+            report = engine.resources.report(window_seconds=idle_seconds + 1)
+        finally:
+            ipc_server.stop()
+            engine.stop()
+        return report, check_budget(report)
+    finally:
+        os.chdir(tempfile.gettempdir())
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable regressions of `results` against `baseline`"""
+    regressions = []
+    for size, metrics in results['results'].items():
+        previous = baseline.get('results', {}).get(size)
+        if not previous:
+            continue
+        for name, value in metrics.items():
+            old = previous.get(name)
+            if name in ('rows', 'generate_seconds', 'history_names') or not value or not old:
+                continue
+            noise = next((floor for suffix, floor in NOISE_FLOOR.items() if name.endswith(suffix)), 0)
+            if name in HIGHER_IS_BETTER:
+                worse = value < old * (1 - tolerance)
+            else:
+                worse = value > old * (1 + tolerance) and value - old > noise
+            if worse:
+                regressions.append(f"{size} rows: {name} {old:.4g} -> {value:.4g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Clockify Helper against synthetic logs")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated log sizes in rows")
+    parser.add_argument('--backend', default='csv', choices=['csv', 'sqlite', 'partitioned'])
+    parser.add_argument('--output', default='bench_results.json', help="where to write the results")
+    parser.add_argument('--baseline', help="compare against this results file")
+    parser.add_argument('--save-baseline', help="also write the results to this baseline file")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument('--check-idle-budget', action='store_true',
+                        help="measure the idle helper's wakeups, CPU and memory against its budget")
+    parser.add_argument('--idle-seconds', type=float, default=DEFAULT_IDLE_SECONDS,
+                        help="how long to stay idle for --check-idle-budget")
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_size(args.child, args.backend, args.workdir)))
+        return 0
+
+    if args.check_idle_budget:
+        print(f"Idling for {args.idle_seconds:.0f}s with the {args.backend} backend...")
+        report, problems = check_idle_budget(args.backend, args.idle_seconds)
+        print(f"  wakeups per minute: {report['wakeups_per_minute']:.2f} (budget {IDLE_BUDGET['wakeups_per_minute']})"
+              if report['wakeups_per_minute'] is not None else "  wakeups per minute: n/a")
+        print(f"  cpu percent: {report['cpu_percent']:.4f} (budget {IDLE_BUDGET['cpu_percent']})")
+        print(f"  rss mb: {report['rss_mb']:.1f} (budget {IDLE_BUDGET['rss_mb']})"
+              if report['rss_mb'] is not None else "  rss mb: n/a")
+        if problems:
+            print("Over the idle budget:")
+            for problem in problems:
+                print(f"  {problem}")
+            return 1
+        print("Within the idle budget.")
+        return 0
+
+    results = {
+        'created': datetime.now().strftime(TIMESTAMP_FORMAT),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'results': {},
+    }
+    for size in [int(size) for size in args.sizes.split(',') if size.strip()]:
+        print(f"Benchmarking {size} rows...")
+        metrics = run_child(size, args.backend)
+        results['results'][str(size)] = metrics
+        for name, value in metrics.items():
+            if name != 'rows':
+                print(f"  {name}: {value:.4g}" if value is not None else f"  {name}: n/a")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Command-line client for a running Clockify Helper.
+
+Talks to the helper over its local socket without importing Tk or PIL, so
+it is cheap enough to call from shell scripts, editor hooks and cron:
+
+    python clockify_cli.py log "Code review"
+    python clockify_cli.py break --minutes 15
+    python clockify_cli.py end-break
+    python clockify_cli.py status
+    python clockify_cli.py last -n 5
+    python clockify_cli.py metrics
+    python clockify_cli.py resources --minutes 60
+
+Run it from the helper's working directory, or point --dir (or the
+CLOCKIFY_HELPER_DIR environment variable) at it.
+"""
+import argparse
+import json
+import os
+import sys
+
+from clockify_ipc import PORT_FILE, SOCKET_FILE, send_command
+from clockify_resources import check_budget
+
+
+def build_request(args):
+    if args.command == 'log':
+        return {'cmd': 'log', 'activity': ' '.join(args.activity)}
+    if args.command == 'break':
+        return {'cmd': 'break', 'minutes': args.minutes}
+    if args.command == 'end-break':
+        return {'cmd': 'end_break'}
+    if args.command == 'last':
+        return {'cmd': 'last', 'count': args.n}
+    if args.command == 'resources':
+        return {'cmd': 'resources', 'window_seconds': args.minutes * 60 if args.minutes else None}
+    return {'cmd': args.command}
+
+
+def print_response(command, response):
+    if command == 'status':
+        print(f"Current activity: {response['last_activity'] or 'None'}")
+        if response['in_break']:
+            print(f"Break: until {response['break_end_time']}" if response['break_end_time'] else "Break: indefinite")
+        else:
+            print("Break: not in break")
+        print(f"Next reminder: {response['next_reminder'] or 'soon'}")
+        print(f"Autocomplete history: {response['history_names']} names, {response['history_bytes'] / 1024:.0f} KB")
+        if 'ui_refreshes_per_minute' in response:
+            print(f"UI refreshes: {response['ui_refreshes_per_minute']} in the last minute")
+    elif command == 'last':
+        for entry in response['entries']:
+            print(f"{entry['Timestamp']} - {entry['Activity']} ({entry['Type']})")
+    elif command == 'metrics':
+        metrics = response['metrics']
+        if not metrics['enabled']:
+            print("Metrics are off (set metrics_enabled = True in the helper's config)")
+            return
+        print(f"{'metric':<28} {'count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name, summary in metrics['histograms'].items():
+            print(f"{name:<28} {summary['count']:>7} {summary['p50_ms']:>9.2f} {summary['p90_ms']:>9.2f} "
+                  f"{summary['p99_ms']:>9.2f} {summary['max_ms']:>9.2f}")
+        for name, summary in metrics['rates'].items():
+            print(f"{name + ' (last hour)':<28} {summary['last_hour']:>7}")
+    elif command == 'resources':
+        usage = response['resources']
+        wakeups = usage['wakeups_per_minute']
+        print(f"Over the last {usage['minutes']:.1f} minutes:")
+        print(f"  CPU time: {usage['cpu_seconds']:.2f}s ({usage['cpu_percent']:.3f}%)")
+        print(f"  Wakeups: {'unknown' if wakeups is None else f'{wakeups:.2f} per minute'}")
+        if usage['rss_mb'] is not None:
+            print(f"  Memory: {usage['rss_mb']:.1f} MB now, {usage['peak_rss_mb']:.1f} MB peak")
+        if usage['minutes'] >= 1:  # Rates over a shorter window say nothing
+            problems = check_budget(usage)
+            print("  Within the idle budget" if not problems else "  Over the idle budget: " + "; ".join(problems))
+    elif command == 'ping':
+        print(f"Clockify Helper is running (pid {response['pid']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control a running Clockify Helper")
+    parser.add_argument('--dir', default=os.environ.get('CLOCKIFY_HELPER_DIR', '.'),
+                        help="the helper's working directory")
+    parser.add_argument('--json', action='store_true', help="print the raw JSON response")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    log_parser = commands.add_parser('log', help="log what you are working on")
+    log_parser.add_argument('activity', nargs='+')
+    break_parser = commands.add_parser('break', help="start a break")
+    break_parser.add_argument('--minutes', type=int, help="break length; indefinite if omitted")
+    commands.add_parser('end-break', help="end the current break")
+    commands.add_parser('status', help="show the current activity and next reminder")
+    last_parser = commands.add_parser('last', help="show the most recent entries")
+    last_parser.add_argument('-n', type=int, default=10)
+    commands.add_parser('show', help="open the main window")
+    commands.add_parser('metrics', help="show latency histograms, if metrics are enabled")
+    resources_parser = commands.add_parser('resources', help="show the helper's CPU time, wakeups and memory")
+    resources_parser.add_argument('--minutes', type=float, help="only the last N minutes (default: since startup)")
+    commands.add_parser('ping', help="check that the helper is running")
+    args = parser.parse_args(argv)
+
+    try:
+        response = send_command(
+            build_request(args),
+            socket_path=os.path.join(args.dir, SOCKET_FILE),
+            port_file=os.path.join(args.dir, PORT_FILE)
+        )
+    except ConnectionError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(response, indent=2))
+    elif not response.get('ok'):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+    else:
+        print_response(args.command, response)
+    return 0 if response.get('ok') else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
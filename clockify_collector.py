@@ -0,0 +1,454 @@
+"""Team collector: gathers log rows from many helpers for org-wide reports.
+
+Run the collector on one machine:
+
+    python clockify_collector.py serve --host 0.0.0.0 --port 8765 --token SECRET
+
+and set `collector_url = http://that-host:8765` and `collector_token =
+SECRET` in each helper's config. It listens on 127.0.0.1 unless `--host`
+says otherwise. Every request must carry the shared token as
+`Authorization: Bearer SECRET`; without `--token` (or the
+CLOCKIFY_COLLECTOR_TOKEN environment variable) a random one is made up
+and printed. Helpers push their new rows in append-only batches; rows are stored once
+per (user, timestamp, activity), so repeated pushes are harmless.
+
+    python clockify_collector.py report --group user --from 2026-10-01
+    python clockify_collector.py loadgen --requests 20000 --concurrency 16
+
+HTTP endpoints:
+    POST /ingest   {"user": "...", "entries": [[timestamp, activity, type, minutes], ...]}
+    GET  /report   ?group=user|day|month|activity&from=...&to=...&user=...
+    GET  /stats
+"""
+import argparse
+import hmac
+import json
+import os
+import queue
+import random
+import secrets
+import socket
+import socketserver
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+TOKEN_ENV = 'CLOCKIFY_COLLECTOR_TOKEN'
+DEFAULT_DB_FILE = "collector.db"
+MAX_BODY_BYTES = 4 * 1024 * 1024
+MAX_BATCH_ROWS = 5000
+REPORT_GROUPS = {
+    'user': "user",
+    'day': "substr(prev_timestamp, 1, 10)",
+    'month': "substr(prev_timestamp, 1, 7)",
+    'activity': "prev_activity",
+}
+
+
+class CollectorStore:
+    """Collected rows in an SQLite database in WAL mode.
+
+    Ingest requests from all server threads are handed to one writer
+    thread, which inserts everything queued since its last wake-up in a
+    single transaction (group commit) and then reports to each request how
+    many of its rows were new. Reads use one connection per thread.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entries ("
+        " id INTEGER PRIMARY KEY,"
+        " user TEXT NOT NULL,"
+        " timestamp TEXT NOT NULL,"
+        " activity TEXT NOT NULL,"
+        " type TEXT NOT NULL,"
+        " duration INTEGER NOT NULL DEFAULT 0,"
+        " UNIQUE (user, timestamp, activity))",
+        "CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp)",
+    )
+    INSERT_ENTRY = (
+        "INSERT OR IGNORE INTO entries (user, timestamp, activity, type, duration)"
+        " VALUES (?, ?, ?, ?, ?)"
+    )
+    # A row's duration belongs to the activity logged before it by the same
+    # user, so LAG runs over each user's whole stream and the range is applied
+    # afterwards, to the start of that activity
+    SELECT_REPORT = (
+        "WITH ordered AS ("
+        " SELECT user, duration,"
+        "  LAG(timestamp) OVER w AS prev_timestamp,"
+        "  LAG(activity) OVER w AS prev_activity,"
+        "  LAG(type) OVER w AS prev_type"
+        " FROM entries WHERE ? IS NULL OR user = ?"
+        " WINDOW w AS (PARTITION BY user ORDER BY timestamp, id))"
+        " SELECT {group} AS key,"
+        "  SUM(CASE WHEN prev_type = 'Break' OR prev_activity = 'Break' THEN 0 ELSE duration END),"
+        "  SUM(CASE WHEN prev_type = 'Break' OR prev_activity = 'Break' THEN duration ELSE 0 END)"
+        " FROM ordered WHERE prev_timestamp >= ? AND prev_timestamp < ? GROUP BY key ORDER BY key"
+    )
+    SELECT_STATS = "SELECT COUNT(*), COUNT(DISTINCT user), MAX(timestamp) FROM entries"
+    MIN_TIMESTAMP = ""
+    MAX_TIMESTAMP = "~"
+
+    def __init__(self, db_file=DEFAULT_DB_FILE):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_file, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def open(self):
+        connection = self._connect()
+        try:
+            with connection:
+                for statement in self.SCHEMA:
+                    connection.execute(statement)
+        finally:
+            connection.close()
+        self._thread = threading.Thread(target=self._run_writer, name="collector-writer", daemon=True)
+        self._thread.start()
+
+    def ingest(self, user, rows):
+        """Store rows for `user`; return (new rows, duplicates) once committed"""
+        request = {'user': user, 'rows': rows, 'done': threading.Event()}
+        self._queue.put(request)
+        request['done'].wait()
+        if 'error' in request:
+            raise request['error']
+        return request['accepted'], len(rows) - request['accepted']
+
+    def _run_writer(self):
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(item is None for item in items)
+            requests = [item for item in items if item is not None]
+            try:
+                with connection:
+                    for request in requests:
+                        before = connection.total_changes
+                        connection.executemany(self.INSERT_ENTRY, [
+                            (request['user'],) + row for row in request['rows']
+                        ])
+                        request['accepted'] = connection.total_changes - before
+            except sqlite3.Error as e:
+                for request in requests:
+                    request['error'] = e
+            for request in requests:
+                request['done'].set()
+        connection.close()
+
+    def report(self, group='user', start=None, end=None, user=None):
+        """Return (key, work minutes, break minutes) grouped by `group`"""
+        if group not in REPORT_GROUPS:
+            raise ValueError(f"Unknown report group: {group}")
+        query = self.SELECT_REPORT.format(group=REPORT_GROUPS[group])
+        return self._reader().execute(query, (
+            user, user,
+            self.MIN_TIMESTAMP if start is None else start,
+            self.MAX_TIMESTAMP if end is None else end,
+        )).fetchall()
+
+    def stats(self):
+        rows, users, newest = self._reader().execute(self.SELECT_STATS).fetchone()
+        return {'rows': rows, 'users': users, 'newest': newest}
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+
+def parse_rows(entries):
+    """Validate pushed rows and convert them to (timestamp, activity, type, minutes)"""
+    if not isinstance(entries, list) or len(entries) > MAX_BATCH_ROWS:
+        raise ValueError(f"entries must be a list of at most {MAX_BATCH_ROWS} rows")
+    rows = []
+    for entry in entries:
+        if not isinstance(entry, list) or len(entry) < 3 or not all(isinstance(value, str) for value in entry):
+            raise ValueError("each entry must be [timestamp, activity, type, minutes] strings")
+        timestamp = entry[0]
+        if len(timestamp) != 19 or timestamp[4] != '-' or timestamp[10] != ' ':
+            raise ValueError(f"bad timestamp: {timestamp!r}")
+        try:
+            minutes = int(entry[3]) if len(entry) > 3 and entry[3] else 0
+        except ValueError:
+            minutes = 0
+        rows.append((timestamp, entry[1], entry[2], minutes))
+    return rows
+
+
+class CollectorServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address, store, token):
+        super().__init__(address, _Handler)
+        self.store = store
+        self.token = token
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        """Check the request's bearer token; reply 401 and return False if it is wrong"""
+        expected = f"Bearer {self.server.token}".encode('utf-8')
+        if hmac.compare_digest(self.headers.get('Authorization', '').encode('utf-8'), expected):
+            return True
+        self._reply(401, {'error': "Missing or wrong token"})
+        return False
+
+    def do_POST(self):
+        if not self._authorized():
+            self.close_connection = True
+            return
+        if self.path != '/ingest':
+            self._reply(404, {'error': "Not found"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self._reply(413, {'error': "Request too large"})
+            self.close_connection = True
+            return
+        try:
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            user = request['user']
+            if not isinstance(user, str) or not user:
+                raise ValueError("user must be a non-empty string")
+            rows = parse_rows(request['entries'])
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'error': f"Bad request: {e}"})
+            return
+        try:
+            accepted, duplicates = self.server.store.ingest(user, rows)
+        except sqlite3.Error as e:
+            self._reply(503, {'error': f"Store unavailable: {e}"})
+            return
+        self._reply(200, {'accepted': accepted, 'duplicates': duplicates})
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == '/stats':
+            self._reply(200, self.server.store.stats())
+        elif url.path == '/report':
+            try:
+                rows = self.server.store.report(
+                    params.get('group', 'user'), params.get('from'), params.get('to'), params.get('user')
+                )
+            except ValueError as e:
+                self._reply(400, {'error': str(e)})
+                return
+            self._reply(200, {'group': params.get('group', 'user'), 'rows': rows})
+        else:
+            self._reply(404, {'error': "Not found"})
+
+
+def serve(args):
+    token = args.token or os.environ.get(TOKEN_ENV) or secrets.token_urlsafe(24)
+    store = CollectorStore(args.db)
+    store.open()
+    server = CollectorServer((args.host, args.port), store, token)
+    print(f"Collecting on http://{args.host}:{server.server_address[1]} into {args.db}")
+    if not (args.token or os.environ.get(TOKEN_ENV)):
+        print(f"Set collector_token = {token} in each helper's config")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.close()
+    return 0
+
+
+def report(args):
+    if not os.path.exists(args.db):
+        print(f"No collector database at {args.db}", file=sys.stderr)
+        return 1
+    store = CollectorStore(args.db)
+    try:
+        rows = store.report(args.group, args.start, args.end, args.user)
+    except sqlite3.Error as e:
+        print(f"Failed to read {args.db}: {e}", file=sys.stderr)
+        return 1
+    print(f"{args.group:<30} {'work (h)':>10} {'break (h)':>10}")
+    for key, work, on_break in rows:
+        print(f"{str(key):<30} {work / 60:>10.2f} {on_break / 60:>10.2f}")
+    return 0
+
+
+def loadgen(args):
+    """Push synthetic batches from many simulated users and report throughput"""
+    from clockify_sync import ConnectionPool
+
+    store = server = None
+    url = args.url
+    token = args.token or os.environ.get(TOKEN_ENV, '')
+    if url is None:
+        # No collector given: run a private one on a throwaway database
+        handle, database = tempfile.mkstemp(prefix='collector_', suffix='.db')
+        os.close(handle)
+        store = CollectorStore(database)
+        store.open()
+        token = secrets.token_urlsafe(24)
+        server = CollectorServer(('127.0.0.1', 0), store, token)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    users = [f"user{i:04}" for i in range(args.users)]
+    clocks = {user: 1_600_000_000 + random.randrange(86400) for user in users}
+    clock_lock = threading.Lock()
+    latencies = []
+    totals = {'accepted': 0, 'duplicates': 0, 'errors': 0}
+    counter = iter(range(args.requests))
+    counter_lock = threading.Lock()
+
+    def next_batch():
+        user = random.choice(users)
+        rows = []
+        with clock_lock:
+            for _ in range(args.batch):
+                clocks[user] += random.choice((300, 900, 1800, 3600))
+                rows.append([
+                    time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(clocks[user])),
+                    random.choice(("Development", "Code review", "Meetings", "Email", "Break")),
+                    "Work", str(random.choice((5, 15, 30, 60))),
+                ])
+        return {'user': user, 'entries': rows}
+
+    def worker():
+        pool = ConnectionPool(url)
+        sent = None
+        while True:
+            with counter_lock:
+                if next(counter, None) is None:
+                    break
+            # Some requests resend the previous batch, as a helper retrying would
+            batch = sent if sent is not None and random.random() < args.repeat_rate else next_batch()
+            body = json.dumps(batch).encode('utf-8')
+            start = time.perf_counter()
+            try:
+                status, _, data = pool.request('POST', '/ingest', body, {
+                    'Content-Type': 'application/json', 'Authorization': f"Bearer {token}",
+                })
+                result = json.loads(data.decode('utf-8')) if status == 200 else None
+            except (OSError, ValueError):
+                result = None
+            elapsed = time.perf_counter() - start
+            with counter_lock:
+                latencies.append(elapsed)
+                if result is None:
+                    totals['errors'] += 1
+                else:
+                    totals['accepted'] += result['accepted']
+                    totals['duplicates'] += result['duplicates']
+            sent = batch
+        pool.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{args.requests} requests in {elapsed:.2f}s: {args.requests / elapsed:.0f} requests/s, "
+          f"{(totals['accepted'] + totals['duplicates']) / elapsed:.0f} rows/s")
+    print(f"Latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    print(f"New rows {totals['accepted']}, duplicates {totals['duplicates']}, errors {totals['errors']}")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        store.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(database + suffix)
+            except OSError:
+                pass
+    return 1 if totals['errors'] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect Clockify Helper logs from a team")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    serve_parser = commands.add_parser('serve', help="run the collector")
+    serve_parser.add_argument('--host', default=DEFAULT_HOST,
+                              help="address to listen on; 0.0.0.0 accepts helpers from other machines")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--token', help=f"shared token helpers must send (default: ${TOKEN_ENV} or random)")
+    serve_parser.add_argument('--db', default=DEFAULT_DB_FILE)
+
+    report_parser = commands.add_parser('report', help="print totals from the collected rows")
+    report_parser.add_argument('--db', default=DEFAULT_DB_FILE)
+    report_parser.add_argument('--group', default='user', choices=sorted(REPORT_GROUPS))
+    report_parser.add_argument('--from', dest='start', help="first timestamp, e.g. 2026-10-01")
+    report_parser.add_argument('--to', dest='end', help="timestamp to stop before")
+    report_parser.add_argument('--user')
+
+    load_parser = commands.add_parser('loadgen', help="measure ingest throughput")
+    load_parser.add_argument('--url', help="collector to load; a private one is started if omitted")
+    load_parser.add_argument('--token', help=f"token of the collector at --url (default: ${TOKEN_ENV})")
+    load_parser.add_argument('--requests', type=int, default=20000)
+    load_parser.add_argument('--concurrency', type=int, default=16)
+    load_parser.add_argument('--users', type=int, default=200)
+    load_parser.add_argument('--batch', type=int, default=10, help="rows per request")
+    load_parser.add_argument('--repeat-rate', type=float, default=0.1,
+                             help="share of requests that resend the previous batch")
+
+    args = parser.parse_args()
+    return {'serve': serve, 'report': report, 'loadgen': loadgen}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
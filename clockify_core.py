@@ -0,0 +1,543 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from clockify_autocomplete import MAX_HISTORY_NAMES, AutocompleteIndex
+from clockify_metrics import NULL_METRICS
+from clockify_reports import ReportAggregator
+from clockify_resources import SAMPLE_INTERVAL_SECONDS, ResourceMonitor
+from clockify_storage import LOG_HEADER, TIMESTAMP_FORMAT
+
+
+RECENT_ACTIVITIES_LIMIT = 10
+# Upper bound on one scheduler sleep. Sleeps run on the monotonic clock, which
+# stops during a suspend, so this bounds how late a deadline missed while
+# suspended is noticed after resume.
+MAX_SCHEDULER_SLEEP_SECONDS = 15 * 60
+CHECKPOINT_VERSION = 1
+
+
+class SystemClock:
+    """The real wall clock and monotonic clock"""
+
+    def now(self):
+        return datetime.now()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def wait(self, event, timeout):
+        """Block until `event` is set or `timeout` seconds pass"""
+        return event.wait(timeout)
+
+
+class SimulatedClock:
+    """A clock that only moves when told to.
+
+    `wait` returns immediately after advancing time by the timeout, so an
+    engine driven by this clock runs through weeks of schedule in moments.
+    `suspend` moves only the wall clock, like a laptop lid being closed.
+    """
+
+    def __init__(self, start=None):
+        self._now = start or datetime(2026, 1, 5, 8, 0)
+        self._monotonic = 0.0
+
+    def now(self):
+        return self._now
+
+    def monotonic(self):
+        return self._monotonic
+
+    def advance(self, seconds):
+        self._now += timedelta(seconds=seconds)
+        self._monotonic += seconds
+
+    def suspend(self, seconds):
+        self._now += timedelta(seconds=seconds)
+
+    def wait(self, event, timeout):
+        if not event.is_set():
+            self.advance(MAX_SCHEDULER_SLEEP_SECONDS if timeout is None else timeout)
+        return event.is_set()
+
+
+def format_time(value):
+    return value.strftime(TIMESTAMP_FORMAT) if value else None
+
+
+def parse_time(value):
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def load_checkpoint(path):
+    """Return the saved engine state, or None if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get('version') != CHECKPOINT_VERSION:
+        return None
+    return state
+
+
+class CheckpointWriter:
+    """Atomically write the newest engine state from a background thread.
+
+    Callers hand over a complete snapshot and return at once. Snapshots
+    that arrive while a write is in progress replace each other, so a burst
+    of changes costs one write and the file always holds a whole state.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._state = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def update(self, state):
+        with self._condition:
+            self._state = state
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def close(self):
+        """Write the last snapshot and stop the thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._state is None and not self._closed:
+                    self._condition.wait()
+                state, self._state = self._state, None
+                if state is None:
+                    return
+            self._write(state)
+
+    def _write(self, state):
+        temp_file = f"{self.path}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_file, self.path)
+        except OSError as e:
+            print(f"Error saving state checkpoint: {e}")
+
+
+class PeriodicTask:
+    """A callback the scheduler runs every `interval` seconds"""
+
+    __slots__ = ('interval', 'callback', 'due')
+
+    def __init__(self, interval, callback, due):
+        self.interval = interval
+        self.callback = callback
+        self.due = due
+
+
+class ClockifyEngine:
+    """Reminder scheduling, breaks, logging and activity history without any UI.
+
+    The engine owns all tracking state and is safe to drive from several
+    threads. A front end plugs in through three callbacks, each called on
+    whichever thread caused the event:
+
+    - on_reminder_due(): it is time to ask what the user is doing
+    - on_change(): state shown to the user changed (break ended, entry logged)
+    - on_error(error): a storage write failed
+
+    Time comes from `clock`, so a SimulatedClock makes the whole engine
+    deterministic and lets it be fast-forwarded.
+
+    Every state change is checkpointed next to the storage, so a restarted
+    engine resumes its break, reminder timer and entry durations.
+
+    Options are read from `settings.current` (see clockify_settings), and
+    the scheduler re-plans whenever the settings are reloaded.
+
+    Submitted activity names are mapped through `aliases` (an AliasTable
+    from clockify_names), if given, so known variants are logged under
+    their canonical name.
+
+    Log writes and scheduler wakeups are recorded in `metrics`; the
+    'reminder_to_popup' span begun here is ended by the front end.
+
+    Other periodic background work is registered with `every` and run by
+    the scheduler in the same sleep, so an idle helper has one thread that
+    wakes at the earliest deadline of all of them. The process's own CPU
+    time, wakeups and memory are sampled into `resources` that way.
+    """
+
+    def __init__(self, settings, storage, clock=None, checkpoint_file=None, metrics=None, aliases=None):
+        self.settings = settings
+        self.storage = storage
+        self.aliases = aliases
+        self.clock = clock or SystemClock()
+        self.metrics = metrics or NULL_METRICS
+        self.lock = threading.RLock()
+        self.running = True
+
+        self.in_break = False
+        self.break_end_time = None
+        self.last_activity = ""
+        self.last_log_time = None
+        self.last_reminder_time = None
+        self.reminder_popup_active = False
+        self._reminder_fired_for = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._tasks = []
+
+        self.on_reminder_due = None
+        self.on_change = None
+
+        self.activity_history = AutocompleteIndex(
+            max_names=settings.config.getint('SETTINGS', 'max_history_names', fallback=MAX_HISTORY_NAMES)
+        )
+        self.load_activity_history()
+        # Ring buffer of the newest log rows for the recent-activities view
+        self.recent_activities = deque(
+            self.storage.last_entries(RECENT_ACTIVITIES_LIMIT),
+            maxlen=RECENT_ACTIVITIES_LIMIT
+        )
+        # Loaded on first use, then kept current by log_activity
+        self.reports = ReportAggregator(self.storage)
+
+        self.checkpoint_file = checkpoint_file or f"{storage.location}.state.json"
+        self._checkpoint_writer = CheckpointWriter(self.checkpoint_file)
+        self.restore_state()
+        # Re-plan with the new interval or work hours as soon as they change
+        settings.subscribe(lambda current: self.reschedule())
+        self.resources = ResourceMonitor()
+        self.every(SAMPLE_INTERVAL_SECONDS, self.resources.sample)
+
+    def restore_state(self):
+        """Resume from the checkpoint, or from the newest log row without one"""
+        last_entry = self.recent_activities[-1] if self.recent_activities else None
+        state = load_checkpoint(self.checkpoint_file)
+        if state and last_entry and state.get('last_entry') != [last_entry.get(column) for column in LOG_HEADER]:
+            state = None  # The log changed behind our back; trust the log
+
+        with self.lock:
+            if state:
+                self.last_activity = state.get('last_activity') or ""
+                self.last_log_time = parse_time(state.get('last_log_time'))
+                self.last_reminder_time = parse_time(state.get('last_reminder_time'))
+                self.in_break = bool(state.get('in_break'))
+                self.break_end_time = parse_time(state.get('break_end_time'))
+            elif last_entry:
+                self.last_log_time = parse_time(last_entry.get('Timestamp'))
+                self.last_reminder_time = self.last_log_time
+                if last_entry.get('Type') == 'Work':
+                    self.last_activity = last_entry.get('Activity') or ""
+
+    def _checkpoint(self):
+        """Queue a snapshot of the current state for writing; call with the lock held"""
+        last_entry = self.recent_activities[-1] if self.recent_activities else None
+        self._checkpoint_writer.update({
+            'version': CHECKPOINT_VERSION,
+            'last_activity': self.last_activity,
+            'last_log_time': format_time(self.last_log_time),
+            'last_reminder_time': format_time(self.last_reminder_time),
+            'in_break': self.in_break,
+            'break_end_time': format_time(self.break_end_time),
+            'last_entry': [last_entry.get(column) for column in LOG_HEADER] if last_entry else None,
+        })
+
+    def load_activity_history(self):
+        """Load previous activities for autocomplete"""
+        try:
+            self.activity_history.extend(self.storage.activity_stats())
+        except Exception as e:
+            print(f"Error loading activity history: {e}")
+
+    def _notify_change(self):
+        if self.on_change:
+            self.on_change()
+
+    # Tracking state
+
+    def log_activity(self, activity, activity_type="Work"):
+        """Append an entry to storage, with the minutes since the previous one"""
+        with self.lock, self.metrics.timer('log_activity'):
+            now = self.clock.now()
+            timestamp = now.strftime(TIMESTAMP_FORMAT)
+
+            # Calculate duration if there was a previous activity
+            duration = ""
+            if self.last_log_time:
+                duration = str(int((now - self.last_log_time).total_seconds() / 60))
+            self.last_log_time = now
+
+            self.storage.append([timestamp, activity, activity_type, duration])
+            self.reports.record(timestamp, activity, activity_type, duration)
+            self.recent_activities.append({
+                'Timestamp': timestamp,
+                'Activity': activity,
+                'Type': activity_type,
+                'Duration_Minutes': duration
+            })
+            self._checkpoint()
+        self._notify_change()
+
+    def begin_prompt(self):
+        """Claim the activity prompt; False if on a break or a prompt is already open"""
+        with self.lock:
+            if self.in_break or self.reminder_popup_active:
+                return False
+            self.reminder_popup_active = True
+            return True
+
+    def submit_activity(self, activity):
+        """Record what the user is working on and restart the reminder interval"""
+        activity = activity.strip()
+        if self.aliases is not None:
+            activity = self.aliases.apply(activity)
+        with self.lock:
+            self.log_activity(activity, "Work")
+            self.last_activity = activity
+            self.last_reminder_time = self.clock.now()
+            self.activity_history.add(activity, self.last_reminder_time.timestamp())
+            self.reminder_popup_active = False
+            self._checkpoint()
+        self.reschedule()
+
+    def confirm_still_working(self):
+        """The user is still on the last activity; restart the reminder interval"""
+        with self.lock:
+            self.last_reminder_time = self.clock.now()
+            self.reminder_popup_active = False
+            self._checkpoint()
+        self.reschedule()
+
+    def snooze(self, minutes=None):
+        """Postpone the next reminder by `minutes` (the configured snooze by default)"""
+        if minutes is None:
+            minutes = self.settings.current.snooze_duration_minutes
+        with self.lock:
+            self.last_reminder_time = self.clock.now() + timedelta(minutes=minutes)
+            self.reminder_popup_active = False
+            self._checkpoint()
+        self.reschedule()
+
+    def start_break(self, duration_minutes=None):
+        """Start a break period"""
+        with self.lock:
+            self.in_break = True
+            if duration_minutes:
+                self.break_end_time = self.clock.now() + timedelta(minutes=duration_minutes)
+            else:
+                self.break_end_time = None
+
+            # Reset reminder timer when break starts
+            self.last_reminder_time = self.clock.now()
+            self._checkpoint()
+        self.reschedule()
+        self._notify_change()
+
+    def end_break(self):
+        """End the current break"""
+        with self.lock:
+            self.in_break = False
+            self.break_end_time = None
+            # Reset reminder timer when break ends
+            self.last_reminder_time = self.clock.now()
+            self._checkpoint()
+        self.reschedule()
+        self._notify_change()
+
+    def next_reminder_time(self):
+        """Return when the next reminder is due, or None before the first one"""
+        with self.lock:
+            if not self.last_reminder_time:
+                return None
+            interval_seconds = self.settings.current.reminder_interval_seconds
+            return self.last_reminder_time + timedelta(seconds=interval_seconds)
+
+    # Scheduling
+
+    def reschedule(self):
+        """Wake the scheduler so it re-plans after a state or settings change"""
+        self._wakeup.set()
+
+    def every(self, seconds, callback):
+        """Run `callback()` on the scheduler thread every `seconds`; return the task"""
+        task = PeriodicTask(seconds, callback, self.clock.monotonic() + seconds)
+        with self.lock:
+            self._tasks.append(task)
+        self.reschedule()
+        return task
+
+    def retime(self, task, seconds):
+        """Change how often `task` runs; it runs no later than `seconds` from now"""
+        with self.lock:
+            task.interval = seconds
+            task.due = min(task.due, self.clock.monotonic() + seconds)
+        self.reschedule()
+
+    def run_due_tasks(self):
+        """Run periodic tasks that are due and return seconds until the next one"""
+        now = self.clock.monotonic()
+        with self.lock:
+            due = [task for task in self._tasks if task.due <= now]
+            for task in due:
+                task.due = now + task.interval
+        for task in due:
+            try:
+                task.callback()
+            except Exception as e:
+                print(f"Error in background task: {e}")
+        with self.lock:
+            if not self._tasks:
+                return MAX_SCHEDULER_SLEEP_SECONDS
+            return max(0, min(task.due for task in self._tasks) - self.clock.monotonic())
+
+    def start(self):
+        """Run the scheduler on a background thread"""
+        self._thread = threading.Thread(target=self.run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler, save report totals and close storage"""
+        self.running = False
+        self.reschedule()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._checkpoint_writer.close()
+        try:
+            self.reports.save()
+        except OSError as e:
+            print(f"Error saving report totals: {e}")
+        self.storage.close()
+
+    def run(self):
+        """Scheduler loop that sleeps until the next reminder-related event"""
+        while self.running:
+            timeout = min(self.run_scheduler_step(), self.run_due_tasks())
+            self.clock.wait(self._wakeup, timeout)
+            self._wakeup.clear()
+            self.metrics.mark('scheduler_wakeups')
+
+    def run_scheduler_step(self, now=None):
+        """Handle events that are due and return seconds until the next one.
+
+        Events are: a timed break ending, work hours starting or ending, and
+        the reminder falling due. Each reminder deadline fires at most once, so
+        reminders missed while suspended collapse into a single popup.
+        """
+        now = now or self.clock.now()
+        deadlines = []
+        reminder_due_now = False
+        break_ended = False
+
+        with self.lock:
+            if self.in_break:
+                if not self.break_end_time:
+                    return MAX_SCHEDULER_SLEEP_SECONDS  # Indefinite break, woken by end_break
+                if now < self.break_end_time:
+                    return self._seconds_until(now, [self.break_end_time])
+                self.in_break = False
+                self.break_end_time = None
+                self.last_reminder_time = now
+                break_ended = True
+                self._checkpoint()
+
+            settings = self.settings.current
+            if settings.enable_work_hours_only:
+                work_start = settings.work_hours_start
+                work_end = settings.work_hours_end
+                start_today = datetime.combine(now.date(), work_start)
+                end_today = datetime.combine(now.date(), work_end)
+
+                if not (work_start <= now.time() <= work_end):
+                    next_start = start_today if now < start_today else start_today + timedelta(days=1)
+                    deadlines.append(next_start)
+                else:
+                    deadlines.append(end_today + timedelta(seconds=1))
+                    reminder_due_now = self._check_reminder(now, deadlines, settings)
+            else:
+                reminder_due_now = self._check_reminder(now, deadlines, settings)
+
+        if break_ended:
+            self._notify_change()
+        if reminder_due_now and self.on_reminder_due:
+            self.metrics.begin('reminder_to_popup')
+            self.on_reminder_due()
+        return self._seconds_until(now, deadlines)
+
+    def _check_reminder(self, now, deadlines, settings):
+        """Add the reminder deadline, or return True if a reminder should fire now"""
+        if self.last_reminder_time is None:
+            self.last_reminder_time = now
+            self._reminder_fired_for = now
+            self._checkpoint()
+            return True
+
+        reminder_due = self.last_reminder_time + timedelta(seconds=settings.reminder_interval_seconds)
+        if now < reminder_due:
+            deadlines.append(reminder_due)
+        elif reminder_due != self._reminder_fired_for and not self.reminder_popup_active:
+            # Answering the popup moves last_reminder_time and wakes us again
+            self._reminder_fired_for = reminder_due
+            return True
+        return False
+
+    @staticmethod
+    def _seconds_until(now, deadlines):
+        """Seconds from `now` to the earliest deadline, capped at MAX_SCHEDULER_SLEEP_SECONDS"""
+        if not deadlines:
+            return MAX_SCHEDULER_SLEEP_SECONDS
+        seconds = (min(deadlines) - now).total_seconds()
+        return min(max(seconds, 0), MAX_SCHEDULER_SLEEP_SECONDS)
+
+    # Simulation
+
+    def simulate(self, seconds, respond=None):
+        """Fast-forward a SimulatedClock by `seconds`, running every due event.
+
+        Reminders are answered by `respond(engine)`, which should call
+        submit_activity, confirm_still_working or snooze; by default each
+        reminder logs the next of a few sample activities. Returns the
+        number of reminders that fired.
+        """
+        if respond is None:
+            samples = ["Development", "Code review", "Meetings", "Email", "Documentation"]
+
+            def respond(engine):
+                engine.submit_activity(samples[fired % len(samples)])
+
+        fired = 0
+        previous_callback = self.on_reminder_due
+        pending = []
+        self.on_reminder_due = lambda: pending.append(True)
+        try:
+            end = self.clock.monotonic() + seconds
+            while self.clock.monotonic() < end:
+                timeout = self.run_scheduler_step()
+                while pending:
+                    pending.pop()
+                    if self.begin_prompt():
+                        respond(self)
+                        fired += 1
+                self._wakeup.clear()
+                # Always move forward, even when an event is due right now
+                self.clock.advance(max(1, min(timeout, end - self.clock.monotonic())))
+        finally:
+            self.on_reminder_due = previous_callback
+        return fired
@@ -0,0 +1,154 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+from clockify_storage import TIMESTAMP_FORMAT
+
+
+CLOCKIFY_COLUMNS = [
+    'Project', 'Client', 'Description', 'Task', 'Email', 'Tags', 'Billable',
+    'Start Date', 'Start Time', 'End Date', 'End Time', 'Duration (h)', 'Duration (decimal)'
+]
+EXPORT_STATE_FILE = "clockify_export_state.json"
+
+
+class TimeEntry:
+    """One activity with a start and an end, as Clockify expects it"""
+
+    __slots__ = ('start', 'end', 'activity', 'activity_type')
+
+    def __init__(self, start, end, activity, activity_type):
+        self.start = start
+        self.end = end
+        self.activity = activity
+        self.activity_type = activity_type
+
+    @property
+    def seconds(self):
+        return max(0, int((self.end - self.start).total_seconds()))
+
+
+def to_time_entries(rows, state=None, aliases=None):
+    """Turn point-in-time log rows into TimeEntry objects.
+
+    Each row marks the moment an activity started; it lasts until the next
+    row. The newest row therefore has no end yet and is not yielded. If a
+    `state` dict is given, the timestamp of that still-open row is stored in
+    it as 'open_since' once the rows are exhausted. Work activities are
+    renamed through `aliases` (an AliasTable) if given.
+    """
+    previous = None
+    previous_start = None
+    for row in rows:
+        try:
+            start = datetime.strptime(row['Timestamp'], TIMESTAMP_FORMAT)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if previous is not None:
+            activity = previous['Activity']
+            if aliases is not None and previous['Type'] == 'Work':
+                activity = aliases.apply(activity)
+            yield TimeEntry(previous_start, start, activity, previous['Type'])
+        previous = row
+        previous_start = start
+
+    if state is not None and previous is not None:
+        state['open_since'] = previous['Timestamp']
+
+
+def rows_through(storage, start=None, end=None):
+    """Yield the rows from `start` to `end`, plus the first row at or after `end`.
+
+    That extra row is where the last entry in range ends; without it the
+    last entry would have no end and be left out.
+    """
+    for row in storage.entries_between(start):
+        yield row
+        if end is not None and row.get('Timestamp', '') >= end:
+            break
+
+
+def filter_entries(entries, include_breaks=True, min_seconds=0):
+    """Drop break entries unless asked for, and entries shorter than `min_seconds`"""
+    for entry in entries:
+        if not include_breaks and (entry.activity_type == 'Break' or entry.activity == 'Break'):
+            continue
+        if entry.seconds < min_seconds:
+            continue
+        yield entry
+
+
+def clockify_rows(entries, email='', project='', date_format='%Y-%m-%d', time_format='%H:%M:%S'):
+    """Format entries as rows of Clockify's CSV import columns"""
+    for entry in entries:
+        hours, remainder = divmod(entry.seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        yield [
+            project,
+            '',
+            entry.activity,
+            '',
+            email,
+            '',
+            'No' if entry.activity_type == 'Break' else 'Yes',
+            entry.start.strftime(date_format),
+            entry.start.strftime(time_format),
+            entry.end.strftime(date_format),
+            entry.end.strftime(time_format),
+            f"{hours}:{minutes:02}:{seconds:02}",
+            f"{entry.seconds / 3600:.2f}",
+        ]
+
+
+def load_export_state(state_file=EXPORT_STATE_FILE):
+    """Return the stored export high-water mark, or an empty dict"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_export_state(state, state_file=EXPORT_STATE_FILE):
+    """Atomically store the export high-water mark"""
+    temp_file = f"{state_file}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(temp_file, state_file)
+
+
+def export_clockify_csv(storage, path, start=None, end=None, include_breaks=False,
+                        incremental=False, state_file=EXPORT_STATE_FILE, aliases=None, **format_options):
+    """Stream log entries from `storage` into a Clockify import file.
+
+    `start` and `end` are log timestamps bounding the entries' start times;
+    the last entry starting before `end` runs until the next row, even if
+    that row is past `end`. With `incremental`, only entries starting at or
+    after the stored high-water mark are exported and the mark is moved to
+    the entry that is still open, so repeated exports never repeat or skip
+    an entry. Rows are read from the storage lazily; older rows are never
+    touched. Returns the number of entries written.
+    """
+    state = load_export_state(state_file) if incremental else {}
+    if incremental and state.get('high_water'):
+        start = max(start, state['high_water']) if start else state['high_water']
+
+    progress = {}
+    entries = filter_entries(
+        to_time_entries(rows_through(storage, start, end), progress, aliases),
+        include_breaks=include_breaks
+    )
+
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CLOCKIFY_COLUMNS)
+        for row in clockify_rows(entries, **format_options):
+            writer.writerow(row)
+            written += 1
+
+    if incremental and progress.get('open_since'):
+        state['high_water'] = progress['open_since']
+        save_export_state(state, state_file)
+    return written
@@ -1,53 +1,221 @@
+import time
+_MODULE_START = time.perf_counter()
+
 import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
 import threading
-import time
-import csv
-import json
-import os
+import gc
 from datetime import datetime, timedelta
-import configparser
 import sys
-import webbrowser
-import pystray
-from PIL import Image, ImageDraw
+from bisect import bisect_left
+from collections import deque
+
+# pystray and PIL are imported on first use; they are slow to load and only
+# the tray icon needs them
+from clockify_core import ClockifyEngine
+from clockify_export import export_clockify_csv
+from clockify_history import HistoryPager
+from clockify_ipc import CommandHandler, InstanceLock, IpcServer, send_command
+from clockify_metrics import Metrics
+from clockify_names import AliasTable
+from clockify_settings import (
+    CONFIG_FILE, FILE_WATCH_INTERVAL_SECONDS, HIDDEN_FILE_WATCH_INTERVAL_SECONDS, Settings
+)
+from clockify_storage import LOG_FILE, open_storage
+
+
+AUTOCOMPLETE_SUGGESTIONS = 8
+UI_REFRESH_INTERVAL_MS = 1000
+UI_REFRESH_HISTORY_LIMIT = 1000
+TRAY_IMAGE_CACHE = "clockify_helper_tray.png"
+EVENT_LOOP_PROBE_INTERVAL_MS = 1000
+HISTORY_VISIBLE_ROWS = 20
+HISTORY_SEARCH_DELAY_MS = 250
+HISTORY_SEARCH_POLL_MS = 200
+
+
+class StartupProfile:
+    """Records how long each startup phase takes (enabled by --startup-profile)"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self._last = _MODULE_START
+
+    def mark(self, phase):
+        """Close the current phase under the given name"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        print("Startup profile:")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<28} {seconds * 1000:8.1f} ms")
+        print(f"  {'total':<28} {sum(seconds for _, seconds in self.phases) * 1000:8.1f} ms")
+
+
+class ActivityDialog(simpledialog.Dialog):
+    """Ask what the user is working on, suggesting previous activities as they type"""
+
+    def __init__(self, parent, title, prompt, history, initialvalue=""):
+        self.prompt = prompt
+        self.history = history
+        self.initialvalue = initialvalue
+        self._filling_from_list = False
+        super().__init__(parent, title)
+
+    def body(self, master):
+        ttk.Label(master, text=self.prompt).grid(row=0, column=0, sticky=tk.W, padx=5)
+
+        self.entry_var = tk.StringVar(value=self.initialvalue)
+        self.entry = ttk.Entry(master, textvariable=self.entry_var, width=45)
+        self.entry.grid(row=1, column=0, sticky=(tk.W, tk.E), padx=5)
+        self.entry.select_range(0, tk.END)
+
+        self.suggestions = tk.Listbox(master, height=AUTOCOMPLETE_SUGGESTIONS, exportselection=False)
+        self.suggestions.grid(row=2, column=0, sticky=(tk.W, tk.E), padx=5, pady=5)
+
+        self.entry_var.trace_add('write', self._update_suggestions)
+        self.entry.bind('<Down>', self._focus_suggestions)
+        self.suggestions.bind('<<ListboxSelect>>', self._fill_from_selection)
+        self.suggestions.bind('<Double-Button-1>', lambda e: self.ok())
+        self.suggestions.bind('<Up>', self._focus_entry_from_top)
+
+        self._update_suggestions()
+        return self.entry
+
+    def _update_suggestions(self, *args):
+        """Show the best matches for the current text"""
+        if self._filling_from_list:
+            return
+        self.suggestions.delete(0, tk.END)
+        for name in self.history.suggest(self.entry_var.get(), AUTOCOMPLETE_SUGGESTIONS):
+            self.suggestions.insert(tk.END, name)
+
+    def _fill_from_selection(self, event=None):
+        """Copy the highlighted suggestion into the entry without re-filtering"""
+        selection = self.suggestions.curselection()
+        if not selection:
+            return
+        self._filling_from_list = True
+        self.entry_var.set(self.suggestions.get(selection[0]))
+        self._filling_from_list = False
+
+    def _focus_suggestions(self, event):
+        if self.suggestions.size():
+            self.suggestions.focus_set()
+            self.suggestions.selection_clear(0, tk.END)
+            self.suggestions.selection_set(0)
+            self.suggestions.activate(0)
+            self._fill_from_selection()
+        return "break"
+
+    def _focus_entry_from_top(self, event):
+        if self.suggestions.index(tk.ACTIVE) == 0:
+            self.entry.focus_set()
+            self.entry.icursor(tk.END)
+            return "break"
+
+    def apply(self):
+        self.result = self.entry_var.get()
 
 
 class ClockifyHelper:
-    def __init__(self):
+    def __init__(self, profile=None):
         """Initialize the application"""
-        self.config_file = "clockify_helper_config.ini"
-        self.log_file = "time_tracking_log.csv"
-        self.load_config()
-        self.setup_logging()
+        self.profile = profile or StartupProfile()
+        self.profile.mark("imports")
+        self.config_file = CONFIG_FILE
+        self.log_file = LOG_FILE
+        self.settings = Settings(self.config_file)
         self.running = True
-        self.in_break = False
-        self.break_end_time = None
-        self.last_activity = ""
-        self.activity_history = []
-        self.reminder_popup_active = False
-
-        # Load activity history if it exists
-        self.load_activity_history()
-        
-        # Start background thread
-        self.background_thread = threading.Thread(target=self.background_worker, daemon=True)
-        self.background_thread.start()
+        self.main_window_built = False
+        self._ui_refresh_job = None
+        self._activities_list_dirty = True
+        self.ui_refresh_count = 0
+        self._ui_refresh_times = deque(maxlen=UI_REFRESH_HISTORY_LIMIT)
+        self.history_window = None
+        self._refresh_history = None
+        self.metrics = Metrics.from_config(self.settings.config)
+        self.profile.mark("config")
         
-        # Setup UI
+        # Setup UI: just the hidden root and the tray icon, the window is built when first shown
         self.setup_ui()
 
+        # Scheduling, breaks, logging and history live in the UI-free engine
+        self.setup_logging()
+        self.aliases = AliasTable()
+        self.engine = ClockifyEngine(self.settings, self.storage, metrics=self.metrics, aliases=self.aliases)
+        self.profile.mark("storage and history")
+
+        # Start the scheduler once the Tk root exists for it to post to
+        self.engine.on_reminder_due = lambda: self.root.after(0, self.show_activity_popup)
+        self.sync = None
+        self.collector = None
+        self.engine.on_change = self._engine_changed
+        self.engine.start()
+        self.settings.subscribe(lambda current: self.root.after(0, self.update_ui_status))
+        self._file_watch = self.engine.every(HIDDEN_FILE_WATCH_INTERVAL_SECONDS, self._check_files)
+        self.profile.mark("scheduler")
+
+        if self.settings.config.getboolean('SETTINGS', 'clockify_sync_enabled', fallback=False):
+            self.setup_sync()
+        if self.settings.config.get('SETTINGS', 'collector_url', fallback='').strip():
+            self.setup_collector()
+
+        # Serve commands from clockify_cli.py and from second launches
+        self.ipc_server = IpcServer(CommandHandler(
+            self.engine, show_window=lambda: self.root.after(0, self.show_window),
+            ui_status=lambda: {'ui_refreshes_per_minute': self.ui_refreshes_per_minute()}
+        ))
+        try:
+            self.ipc_server.start()
+        except OSError as e:
+            print(f"Error starting command socket: {e}")
+            self.ipc_server = None
+
+        if self.metrics.enabled:
+            self.setup_metrics()
+
     def _on_tray_notify(self, icon, item):
+        import pystray
         if item == pystray.MouseEventType.DOUBLE_CLICK:
             self.root.after(0, self.show_window)
 
-    def create_tray_icon(self):
+    def load_tray_image(self):
+        """Return the tray icon image, drawing and caching it on first launch"""
+        from PIL import Image
+        try:
+            with Image.open(TRAY_IMAGE_CACHE) as cached:
+                return cached.convert('RGB')
+        except (OSError, ValueError):
+            pass
+
+        from PIL import ImageDraw
         # Create a simple icon dynamically
         image = Image.new('RGB', (64, 64), color='white')
         draw = ImageDraw.Draw(image)
         draw.ellipse((16, 16, 48, 48), fill="dodgerblue")
         draw.rectangle((28, 28, 36, 48), fill="white")
         draw.rectangle((26, 42, 38, 52), fill="grey")
+        try:
+            image.save(TRAY_IMAGE_CACHE)
+        except OSError as e:
+            print(f"Could not cache tray icon: {e}")
+        return image
+
+    def create_tray_icon(self):
+        """Start the tray icon; it is built and run on its own thread so Tk never waits for it"""
+        threading.Thread(target=self._run_tray_icon, name="tray-icon", daemon=True).start()
+
+    def _run_tray_icon(self):
+        import pystray
+        image = self.load_tray_image()
         self.systray_icon = pystray.Icon(
             "clockify_helper",
             image,
@@ -58,9 +226,7 @@ class ClockifyHelper:
             )
         )
         self.systray_icon._icon._on_notify = self._on_tray_notify
-
-        # Start tray icon on another thread so it doesn't block Tk
-        threading.Thread(target=self.systray_icon.run, daemon=True).start()
+        self.systray_icon.run()
 
     def on_tray_show(self, icon, item):
         self.root.after(0, self.show_window)
@@ -71,57 +237,64 @@ class ClockifyHelper:
         self.quit_app()
 
 
-    def load_config(self):
-        """Load configuration from INI file or create default"""
-        self.config = configparser.ConfigParser()
-        
-        # Default configuration
-        default_config = {
-            'SETTINGS': {
-                'reminder_interval_hours': '2',
-                'enable_system_tray': 'True',
-                'auto_start': 'False',
-                'work_hours_start': '09:00',
-                'work_hours_end': '17:00',
-                'enable_work_hours_only': 'True',
-                'snooze_duration_minutes': '15'
-            }
-        }
-        
-        if os.path.exists(self.config_file):
-            self.config.read(self.config_file)
-        else:
-            # Create default config file
-            for section, options in default_config.items():
-                self.config.add_section(section)
-                for key, value in options.items():
-                    self.config.set(section, key, value)
-            
-            with open(self.config_file, 'w') as f:
-                self.config.write(f)
+    def _check_files(self):
+        """Pick up edits to the config file and alias table; runs on the scheduler thread"""
+        try:
+            if self.settings.check():
+                print(f"Reloaded settings from {self.config_file}")
+            if self.aliases.check():
+                print(f"Reloaded {len(self.aliases)} activity aliases")
+        except (OSError, ValueError) as e:
+            print(f"Error reloading settings: {e}")
     
     def setup_logging(self):
-        """Setup CSV logging with headers if file doesn't exist"""
-        if not os.path.exists(self.log_file):
-            with open(self.log_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Timestamp', 'Activity', 'Type', 'Duration_Minutes'])
-    
-    def load_activity_history(self):
-        """Load previous activities for autocomplete"""
-        if os.path.exists(self.log_file):
+        """Open the storage backend selected in the config (CSV log by default)"""
+        self.storage = open_storage(self.settings.config, self.log_file, on_error=self._on_log_write_error)
+
+    def setup_sync(self):
+        """Start uploading new entries to the Clockify API in the background"""
+        from clockify_sync import ClockifySync  # Only needed when sync is enabled
+        try:
+            self.sync = ClockifySync.from_config(self.storage, self.settings.config, aliases=self.aliases)
+            self.sync.start()
+        except ValueError as e:
+            print(f"Clockify sync disabled: {e}")
+            self.sync = None
+
+    def setup_collector(self):
+        """Start pushing new rows to the team collector in the background"""
+        from clockify_sync import CollectorPush  # Only needed when a collector is set
+        try:
+            self.collector = CollectorPush.from_config(self.storage, self.settings.config)
+            self.collector.start()
+        except ValueError as e:
+            print(f"Collector push disabled: {e}")
+            self.collector = None
+
+    def setup_metrics(self):
+        """Serve metrics locally if a port is set, and start measuring event loop lag"""
+        port = self.settings.config.getint('SETTINGS', 'metrics_port', fallback=0)
+        if port:
             try:
-                with open(self.log_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    activities = set()
-                    for row in reader:
-                        if row['Activity'] and row['Activity'] != 'Break':
-                            activities.add(row['Activity'])
-                    self.activity_history = list(activities)
-            except Exception as e:
-                print(f"Error loading activity history: {e}")
-                self.activity_history = []
+                self.metrics.serve(port)
+            except OSError as e:
+                print(f"Error starting metrics endpoint: {e}")
+        self._schedule_event_loop_probe()
+
+    def _schedule_event_loop_probe(self):
+        expected = time.perf_counter() + EVENT_LOOP_PROBE_INTERVAL_MS / 1000
+        self.root.after(EVENT_LOOP_PROBE_INTERVAL_MS, lambda: self._on_event_loop_probe(expected))
 
+    def _on_event_loop_probe(self, expected):
+        """How late a timer runs is how long the Tk event loop was busy"""
+        self.metrics.observe('event_loop_lag', max(0.0, time.perf_counter() - expected))
+        if self.running:
+            self._schedule_event_loop_probe()
+
+    def _on_log_write_error(self, error):
+        """Called on the writer thread; report the failure on the Tk thread"""
+        self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to log activity: {error}"))
+    
     def on_minimize(self, event):
         # If the user minimized (iconified), withdraw and show tray
         if self.root.state() == 'iconic':
@@ -135,6 +308,16 @@ class ClockifyHelper:
         self.root.withdraw()  # Hide initially
         self.root.protocol("WM_DELETE_WINDOW", self.hide_window)
         self.root.bind('<Unmap>', self.on_minimize)
+        self.profile.mark("tk root")
+
+        self.create_tray_icon()
+        self.profile.mark("tray icon")
+
+    def build_main_window(self):
+        """Create the main window's widgets the first time they are needed"""
+        if self.main_window_built:
+            return
+        self.main_window_built = True
 
         # Create main frame
         main_frame = ttk.Frame(self.root, padding="10")
@@ -203,7 +386,9 @@ class ClockifyHelper:
         footer_frame = ttk.Frame(main_frame)
         footer_frame.grid(row=9, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
         
-        ttk.Button(footer_frame, text="Export Log", command=self.export_csv).pack(side=tk.LEFT, padx=5)
+        ttk.Button(footer_frame, text="Export Log", command=self.show_export_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(footer_frame, text="Reports", command=self.show_reports).pack(side=tk.LEFT, padx=5)
+        ttk.Button(footer_frame, text="History", command=self.show_history).pack(side=tk.LEFT, padx=5)
         
         help_link = ttk.Label(footer_frame, text="Help", foreground="blue", cursor="hand2")
         help_link.pack(side=tk.RIGHT, padx=5)
@@ -215,13 +400,17 @@ class ClockifyHelper:
         
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="File", menu=file_menu)
+        file_menu.add_command(label="Export for Clockify...", command=self.show_export_dialog)
         file_menu.add_command(label="Export to CSV", command=self.export_csv)
+        file_menu.add_command(label="Reports...", command=self.show_reports)
+        file_menu.add_command(label="History...", command=self.show_history)
         file_menu.add_command(label="Settings", command=self.show_settings)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.quit_app)
         
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Help", menu=help_menu)
+        help_menu.add_command(label="Metrics...", command=self.show_metrics)
         help_menu.add_command(label="About", command=self.show_about)
         
         # Protocol for window close
@@ -229,156 +418,176 @@ class ClockifyHelper:
         
         # Load recent activities
         self.refresh_activities_list()
-        self.create_tray_icon()
 
     def refresh_activities_list(self):
         """Refresh the activities listbox with recent entries"""
-        self.activities_listbox.delete(0, tk.END)
-        
-        try:
-            if os.path.exists(self.log_file):
-                with open(self.log_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    activities = list(reader)
-                    # Show last 10 activities
-                    for activity in activities[-10:]:
-                        timestamp = activity['Timestamp']
-                        activity_name = activity['Activity']
-                        activity_type = activity['Type']
-                        self.activities_listbox.insert(0, f"{timestamp} - {activity_name} ({activity_type})")
-        except Exception as e:
-            print(f"Error refreshing activities: {e}")
-    
-    def background_worker(self):
-        """Background thread that handles periodic reminders"""
-        reminder_interval = float(self.config.get('SETTINGS', 'reminder_interval_hours')) * 3600  # Convert to seconds
-        
-        while self.running:
-            time.sleep(5)  # Check every minute
-            
-            # Check if we should show reminder
-            current_time = datetime.now()
-            
-            # Check work hours if enabled
-            if self.config.getboolean('SETTINGS', 'enable_work_hours_only'):
-                work_start = datetime.strptime(self.config.get('SETTINGS', 'work_hours_start'), '%H:%M').time()
-                work_end = datetime.strptime(self.config.get('SETTINGS', 'work_hours_end'), '%H:%M').time()
-                current_time_only = current_time.time()
-                
-                if not (work_start <= current_time_only <= work_end):
-                    continue  # Skip if outside work hours
-            
-            # Check if in break
-            if self.in_break:
-                if self.break_end_time and current_time >= self.break_end_time:
-                    self.end_break()
-                else:
-                    continue  # Skip reminder during break
+        if not self.main_window_built or self.root.state() != 'normal':
+            # Nobody can see the list; rebuild it the next time the window is shown
+            self._activities_list_dirty = True
+            return
+        self._activities_list_dirty = False
+        with self.metrics.timer('refresh_activities_list'):
+            self.activities_listbox.delete(0, tk.END)
             
-            # Show reminder based on interval
-            if not hasattr(self, 'last_reminder_time'):
-                self.last_reminder_time = current_time
-                self.root.after(0, self.show_activity_popup)
-
-            elif (current_time - self.last_reminder_time).total_seconds() >= reminder_interval:
-                if not self.reminder_popup_active:
-                    self.root.after(0, self.show_activity_popup)
+            for activity in list(self.engine.recent_activities):
+                timestamp = activity['Timestamp']
+                activity_name = activity['Activity']
+                activity_type = activity['Type']
+                self.activities_listbox.insert(0, f"{timestamp} - {activity_name} ({activity_type})")
+    
+    def _engine_changed(self):
+        """Engine callback, on any thread: send new entries now and update the UI"""
+        for uploader in (self.sync, self.collector):
+            if uploader:
+                uploader.trigger()
+        self.root.after(0, self._on_engine_change)
 
+    def _on_engine_change(self):
+        """Engine state changed on some thread; refresh what the user can see"""
+        if self._refresh_history:
+            self._refresh_history()
+        self._activities_list_dirty = True
+        if self.root.state() == 'normal':
+            self.refresh_activities_list()
+        self.update_ui_status()
 
     def update_ui_status(self):
-        """Update UI status information"""
-        self.current_activity_var.set(self.last_activity if self.last_activity else "None")
+        """Refresh UI status now and keep the single countdown tick running.
+
+        All callers share one timer: a pending tick is cancelled before the
+        refresh and re-armed afterwards, so repeated calls never stack. While
+        the window is hidden nothing is refreshed; show_window refreshes
+        everything when it becomes visible again.
+        """
+        self.cancel_ui_refresh()
+        if not self.main_window_built or self.root.state() != 'normal':
+            return
+
+        countdown_running = self._refresh_ui_status()
+        if countdown_running:
+            self._ui_refresh_job = self.root.after(UI_REFRESH_INTERVAL_MS, self._on_ui_refresh_tick)
+
+    def _on_ui_refresh_tick(self):
+        """Timer callback for the countdown tick"""
+        self._ui_refresh_job = None
+        self.update_ui_status()
+
+    def cancel_ui_refresh(self):
+        """Stop the countdown tick, e.g. when the window is hidden to the tray"""
+        if self._ui_refresh_job is not None:
+            self.root.after_cancel(self._ui_refresh_job)
+            self._ui_refresh_job = None
+
+    def ui_refreshes_per_minute(self):
+        """Return how many UI status refreshes ran during the last minute"""
+        # Called from the command socket thread, so count a copy rather than trimming
+        times = list(self._ui_refresh_times)
+        return len(times) - bisect_left(times, time.monotonic() - 60)
+
+    def _set_ui_var(self, var, value):
+        """Set a Tk variable only when its text actually changes"""
+        if var.get() != value:
+            var.set(value)
+
+    def _refresh_ui_status(self):
+        """Recompute the status strings; return True while a countdown is visible"""
+        self.ui_refresh_count += 1
+        self._ui_refresh_times.append(time.monotonic())
+        self.metrics.mark('ui_refreshes')
+        countdown_running = False
+        engine = self.engine
+        now = engine.clock.now()
+
+        self._set_ui_var(self.current_activity_var, engine.last_activity if engine.last_activity else "None")
         
-        if self.in_break:
-            if self.break_end_time:
-                remaining = self.break_end_time - datetime.now()
+        if engine.in_break:
+            if engine.break_end_time:
+                remaining = engine.break_end_time - now
                 if remaining.total_seconds() > 0:
                     minutes_left = int(remaining.total_seconds() / 60)
-                    self.break_status_var.set(f"In break ({minutes_left} min left)")
+                    self._set_ui_var(self.break_status_var, f"In break ({minutes_left} min left)")
+                    countdown_running = True
                 else:
-                    self.break_status_var.set("Break ending...")
+                    self._set_ui_var(self.break_status_var, "Break ending...")
             else:
-                self.break_status_var.set("In break (indefinite)")
+                self._set_ui_var(self.break_status_var, "In break (indefinite)")
         else:
-            self.break_status_var.set("Not in break")
+            self._set_ui_var(self.break_status_var, "Not in break")
         
         # Improved next reminder display
-        if hasattr(self, 'last_reminder_time'):
-            interval_seconds = float(self.config.get('SETTINGS', 'reminder_interval_hours')) * 3600
-            next_reminder = self.last_reminder_time + timedelta(seconds=interval_seconds)
-            remaining = next_reminder - datetime.now()
+        next_reminder = engine.next_reminder_time()
+        if next_reminder:
+            remaining = next_reminder - now
             if remaining.total_seconds() > 0:
                 h, rem = divmod(int(remaining.total_seconds()), 3600)
                 m, s = divmod(rem, 60)
                 if h > 0:
-                    self.next_reminder_var.set(f"{h:02}:{m:02}:{s:02} left")
+                    self._set_ui_var(self.next_reminder_var, f"{h:02}:{m:02}:{s:02} left")
                 else:
-                    self.next_reminder_var.set(f"{m:02}:{s:02} left")
+                    self._set_ui_var(self.next_reminder_var, f"{m:02}:{s:02} left")
+                countdown_running = True
             else:
-                self.next_reminder_var.set("Due now!")
+                self._set_ui_var(self.next_reminder_var, "Due now!")
         else:
-            self.next_reminder_var.set("Soon")
-        
-        # Schedule next update for live countdown
-        self.root.after(1000, self.update_ui_status)
+            self._set_ui_var(self.next_reminder_var, "Soon")
+
+        return countdown_running
 
 
     def _show_popup_main(self, was_hidden):
+        # The popup is about to appear; this closes the span the engine opened
+        self.metrics.end('reminder_to_popup')
         try:
-            if self.last_activity:
+            last_activity = self.engine.last_activity
+            if last_activity:
                 still_working = messagebox.askyesno(
                     "Activity Tracker",
-                    f"Still working on \"{self.last_activity}\"?",
+                    f"Still working on \"{last_activity}\"?",
                     parent=self.root
                 )
                 if still_working:
-                    self.last_reminder_time = datetime.now()
-                    self.reminder_popup_active = False
+                    self.engine.confirm_still_working()
                     return
 
-            activity = simpledialog.askstring(
+            activity = ActivityDialog(
+                self.root,
                 "Activity Tracker",
                 "What are you currently working on?",
-                initialvalue=self.last_activity if self.last_activity else "",
-                parent=self.root
-            )
+                self.engine.activity_history,
+                initialvalue=last_activity if last_activity else ""
+            ).result
 
             if activity:
-                self.log_activity(activity.strip(), "Work")
-                self.last_activity = activity.strip()
-                self.last_reminder_time = datetime.now()
-                if activity.strip() not in self.activity_history:
-                    self.activity_history.append(activity.strip())
+                self.engine.submit_activity(activity)
                 self.refresh_activities_list()
-                self.reminder_popup_active = False  # ADD THIS
             else:
-                snooze_minutes = int(self.config.get('SETTINGS', 'snooze_duration_minutes'))
-                self.last_reminder_time = datetime.now() + timedelta(minutes=snooze_minutes)
-                self.reminder_popup_active = False  # ADD THIS
+                self.engine.snooze()
 
         finally:
             self.root.attributes('-topmost', False)
             if was_hidden:
                 self.root.withdraw()
+                self.release_main_window()
 
     def show_activity_popup(self):
-        if self.in_break or self.reminder_popup_active:
+        if not self.engine.begin_prompt():
             return
-        self.reminder_popup_active = True
 
         # Remember if window was hidden
         was_hidden = self.root.state() == 'withdrawn'
         
-        # Temporarily show main window to ensure dialogs appear
-        if was_hidden:
-            self.root.deiconify()
-        
-        # Make sure window is visible and on top
-        self.root.state('normal')
-        self.root.lift()
-        self.root.focus_force()
-        self.root.attributes('-topmost', True)
-        self.root.update()
+        with self.metrics.timer('popup_raise_window'):
+            # Temporarily show main window to ensure dialogs appear
+            if was_hidden:
+                self.build_main_window()
+                self.root.deiconify()
+            
+            # Make sure window is visible and on top
+            self.root.state('normal')
+            self.root.lift()
+            self.root.focus_force()
+            self.root.attributes('-topmost', True)
+            self.root.update()
 
         # Add a tiny pause to let window manager catch up
         self.root.after(100, lambda: self._show_popup_main(was_hidden))
@@ -387,7 +596,7 @@ class ClockifyHelper:
         popup.destroy()
 
         if still_working:
-            self.last_reminder_time = datetime.now()
+            self.engine.confirm_still_working()
         else:
             # Show activity entry dialog
             pass
@@ -430,51 +639,26 @@ class ClockifyHelper:
         """Start break with specified duration"""
         popup.destroy()
         self.start_break(duration_minutes)
-        self.log_activity("Break", "Break")
+        self.engine.log_activity("Break", "Break")
     
     def snooze_reminder(self, popup, minutes):
         """Snooze reminder for specified minutes"""
         popup.destroy()
-        self.last_reminder_time = datetime.now() + timedelta(minutes=minutes)
+        self.engine.snooze(minutes)
     
     def start_break(self, duration_minutes=None):
         """Start a break period"""
-        self.in_break = True
-        if duration_minutes:
-            self.break_end_time = datetime.now() + timedelta(minutes=duration_minutes)
-        else:
-            self.break_end_time = None
-        
-        # Reset reminder timer when break starts
-        self.last_reminder_time = datetime.now()
+        self.engine.start_break(duration_minutes)
         self.update_ui_status()
     
     def end_break(self):
         """End the current break"""
-        self.in_break = False
-        self.break_end_time = None
-        # Reset reminder timer when break ends
-        self.last_reminder_time = datetime.now()
+        self.engine.end_break()
         self.update_ui_status()
     
     def log_activity(self, activity, activity_type="Work"):
-        """Log activity to CSV file"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Calculate duration if there was a previous activity
-        duration = ""
-        if hasattr(self, 'last_log_time') and self.last_log_time:
-            duration_delta = datetime.now() - self.last_log_time
-            duration = str(int(duration_delta.total_seconds() / 60))  # Duration in minutes
-        
-        self.last_log_time = datetime.now()
-        
-        try:
-            with open(self.log_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([timestamp, activity, activity_type, duration])
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to log activity: {e}")
+        """Log activity to storage"""
+        self.engine.log_activity(activity, activity_type)
     
     def show_settings(self):
         """Show settings window"""
@@ -488,71 +672,50 @@ class ClockifyHelper:
         
         # Reminder interval
         ttk.Label(main_frame, text="Reminder Interval (hours):").grid(row=0, column=0, sticky=tk.W, pady=2)
-        interval_var = tk.StringVar(value=self.config.get('SETTINGS', 'reminder_interval_hours'))
+        current = self.settings.current
+        interval_var = tk.StringVar(value=f"{current.reminder_interval_hours:g}")
         ttk.Entry(main_frame, textvariable=interval_var, width=10).grid(row=0, column=1, sticky=tk.W, pady=2)
         
         # Snooze duration
         ttk.Label(main_frame, text="Snooze Duration (minutes):").grid(row=1, column=0, sticky=tk.W, pady=2)
-        snooze_var = tk.StringVar(value=self.config.get('SETTINGS', 'snooze_duration_minutes'))
+        snooze_var = tk.StringVar(value=str(current.snooze_duration_minutes))
         ttk.Entry(main_frame, textvariable=snooze_var, width=10).grid(row=1, column=1, sticky=tk.W, pady=2)
         
         # Work hours
         ttk.Label(main_frame, text="Enable Work Hours Only:").grid(row=2, column=0, sticky=tk.W, pady=2)
-        work_hours_var = tk.BooleanVar(value=self.config.getboolean('SETTINGS', 'enable_work_hours_only'))
+        work_hours_var = tk.BooleanVar(value=current.enable_work_hours_only)
         ttk.Checkbutton(main_frame, variable=work_hours_var).grid(row=2, column=1, sticky=tk.W, pady=2)
         
         ttk.Label(main_frame, text="Work Start Time (HH:MM):").grid(row=3, column=0, sticky=tk.W, pady=2)
-        start_time_var = tk.StringVar(value=self.config.get('SETTINGS', 'work_hours_start'))
+        start_time_var = tk.StringVar(value=current.work_hours_start.strftime('%H:%M'))
         ttk.Entry(main_frame, textvariable=start_time_var, width=10).grid(row=3, column=1, sticky=tk.W, pady=2)
         
         ttk.Label(main_frame, text="Work End Time (HH:MM):").grid(row=4, column=0, sticky=tk.W, pady=2)
-        end_time_var = tk.StringVar(value=self.config.get('SETTINGS', 'work_hours_end'))
+        end_time_var = tk.StringVar(value=current.work_hours_end.strftime('%H:%M'))
         ttk.Entry(main_frame, textvariable=end_time_var, width=10).grid(row=4, column=1, sticky=tk.W, pady=2)
         
         # Log file location
         ttk.Label(main_frame, text="Log File:").grid(row=5, column=0, sticky=tk.W, pady=2)
-        ttk.Label(main_frame, text=os.path.abspath(self.log_file)).grid(row=5, column=1, columnspan=2, sticky=tk.W, pady=2)
+        ttk.Label(main_frame, text=self.storage.location).grid(row=5, column=1, columnspan=2, sticky=tk.W, pady=2)
         
         def save_settings():
             try:
-                # Validate inputs
-                try:
-                    interval = float(interval_var.get())
-                    if interval <= 0:
-                        raise ValueError("Reminder interval must be positive")
-                except ValueError:
-                    messagebox.showerror("Error", "Invalid reminder interval value")
-                    return
-                
-                try:
-                    snooze = int(snooze_var.get())
-                    if snooze <= 0:
-                        raise ValueError("Snooze duration must be positive")
-                except ValueError:
-                    messagebox.showerror("Error", "Invalid snooze duration value")
-                    return
-                
-                # Validate time format
-                try:
-                    datetime.strptime(start_time_var.get(), '%H:%M')
-                    datetime.strptime(end_time_var.get(), '%H:%M')
-                except ValueError:
-                    messagebox.showerror("Error", "Invalid time format. Please use HH:MM")
-                    return
-                
-                self.config.set('SETTINGS', 'reminder_interval_hours', interval_var.get())
-                self.config.set('SETTINGS', 'snooze_duration_minutes', snooze_var.get())
-                self.config.set('SETTINGS', 'enable_work_hours_only', str(work_hours_var.get()))
-                self.config.set('SETTINGS', 'work_hours_start', start_time_var.get())
-                self.config.set('SETTINGS', 'work_hours_end', end_time_var.get())
-                
-                with open(self.config_file, 'w') as f:
-                    self.config.write(f)
-                
-                messagebox.showinfo("Success", "Settings saved successfully!")
-                settings_window.destroy()
+                # Validated and applied by Settings; the scheduler and status re-plan on their own
+                self.settings.save({
+                    'reminder_interval_hours': interval_var.get(),
+                    'snooze_duration_minutes': snooze_var.get(),
+                    'enable_work_hours_only': work_hours_var.get(),
+                    'work_hours_start': start_time_var.get(),
+                    'work_hours_end': end_time_var.get(),
+                })
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save settings: {e}")
+                return
+            messagebox.showinfo("Success", "Settings saved successfully!")
+            settings_window.destroy()
         
         # Save and cancel buttons
         button_frame = ttk.Frame(main_frame)
@@ -566,13 +729,341 @@ class ClockifyHelper:
         export_filename = f"clockify_export_{timestamp}.csv"
         
         try:
-            import shutil
-            shutil.copy2(self.log_file, export_filename)
+            self.storage.export_csv(export_filename)
             messagebox.showinfo("Success", f"Log exported to {export_filename}")
             return export_filename
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export: {e}")
             return None
+
+    def show_export_dialog(self):
+        """Show options for exporting entries in Clockify's import format"""
+        export_window = tk.Toplevel(self.root)
+        export_window.title("Export for Clockify")
+        export_window.geometry("350x220")
+        export_window.transient(self.root)
+        
+        main_frame = ttk.Frame(export_window, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        ttk.Label(main_frame, text="From (YYYY-MM-DD):").grid(row=0, column=0, sticky=tk.W, pady=2)
+        start_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=start_var, width=12).grid(row=0, column=1, sticky=tk.W, pady=2)
+        
+        ttk.Label(main_frame, text="To (YYYY-MM-DD):").grid(row=1, column=0, sticky=tk.W, pady=2)
+        end_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=end_var, width=12).grid(row=1, column=1, sticky=tk.W, pady=2)
+        
+        ttk.Label(main_frame, text="Include Breaks:").grid(row=2, column=0, sticky=tk.W, pady=2)
+        breaks_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, variable=breaks_var).grid(row=2, column=1, sticky=tk.W, pady=2)
+        
+        ttk.Label(main_frame, text="Only New Since Last Export:").grid(row=3, column=0, sticky=tk.W, pady=2)
+        incremental_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(main_frame, variable=incremental_var).grid(row=3, column=1, sticky=tk.W, pady=2)
+        
+        def run_export():
+            try:
+                start = datetime.strptime(start_var.get(), '%Y-%m-%d') if start_var.get().strip() else None
+                end = datetime.strptime(end_var.get(), '%Y-%m-%d') + timedelta(days=1) if end_var.get().strip() else None
+            except ValueError:
+                messagebox.showerror("Error", "Invalid date format. Please use YYYY-MM-DD")
+                return
+            export_window.destroy()
+            self.export_clockify(
+                start.strftime("%Y-%m-%d %H:%M:%S") if start else None,
+                end.strftime("%Y-%m-%d %H:%M:%S") if end else None,
+                include_breaks=breaks_var.get(),
+                incremental=incremental_var.get()
+            )
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=4, column=0, columnspan=2, pady=10)
+        ttk.Button(button_frame, text="Export", command=run_export).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=export_window.destroy).pack(side=tk.LEFT, padx=5)
+
+    def export_clockify(self, start=None, end=None, include_breaks=False, incremental=True):
+        """Export entries to a new file in Clockify's CSV import format"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        export_filename = f"clockify_import_{timestamp}.csv"
+        
+        try:
+            count = export_clockify_csv(
+                self.storage,
+                export_filename,
+                start=start,
+                end=end,
+                include_breaks=include_breaks,
+                incremental=incremental,
+                aliases=self.aliases,
+                email=self.settings.config.get('SETTINGS', 'clockify_email', fallback=''),
+                project=self.settings.config.get('SETTINGS', 'clockify_project', fallback=''),
+                date_format=self.settings.config.get('SETTINGS', 'export_date_format', raw=True, fallback='%Y-%m-%d'),
+                time_format=self.settings.config.get('SETTINGS', 'export_time_format', raw=True, fallback='%H:%M:%S')
+            )
+            messagebox.showinfo("Success", f"Exported {count} entries to {export_filename}")
+            return export_filename
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export: {e}")
+            return None
+    
+    def show_reports(self):
+        """Show work and break totals per day, week, month or activity"""
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Reports")
+        report_window.geometry("420x400")
+        report_window.transient(self.root)
+        
+        main_frame = ttk.Frame(report_window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        controls = ttk.Frame(main_frame)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Totals per:").pack(side=tk.LEFT)
+        period_var = tk.StringVar(value="Day")
+        period_box = ttk.Combobox(controls, textvariable=period_var, state="readonly", width=10,
+                                  values=["Day", "Week", "Month", "Activity"])
+        period_box.pack(side=tk.LEFT, padx=5)
+        
+        tree = ttk.Treeview(main_frame, columns=("period", "work", "break"), show="headings")
+        tree.heading("period", text="Period")
+        tree.heading("work", text="Work (h)")
+        tree.heading("break", text="Break (h)")
+        tree.column("work", width=80, anchor=tk.E)
+        tree.column("break", width=80, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, pady=5)
+        scrollbar = ttk.Scrollbar(tree, orient=tk.VERTICAL, command=tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.configure(yscrollcommand=scrollbar.set)
+        
+        status_var = tk.StringVar(value="Loading...")
+        ttk.Label(main_frame, textvariable=status_var).pack(anchor=tk.W)
+        
+        def fill(*args):
+            tree.delete(*tree.get_children())
+            period = period_var.get()
+            if period == "Activity":
+                tree.heading("period", text="Activity")
+                rows = [(name, f"{minutes / 60:.2f}", "") for name, minutes in self.engine.reports.activity_totals()]
+            else:
+                tree.heading("period", text=period)
+                totals = self.engine.reports.totals(period.lower())
+                rows = [(key, f"{work / 60:.2f}", f"{on_break / 60:.2f}") for key, work, on_break in reversed(totals)]
+            for row in rows:
+                tree.insert("", tk.END, values=row)
+            status_var.set(f"{len(rows)} rows")
+        
+        def load():
+            # The first report may have to read the whole log; keep the UI responsive
+            try:
+                self.engine.reports.ensure_loaded()
+            except Exception as e:
+                message = f"Failed to load reports: {e}"
+                self.root.after(0, lambda: status_var.set(message))
+                return
+            self.root.after(0, lambda: report_window.winfo_exists() and fill())
+        
+        period_box.bind("<<ComboboxSelected>>", fill)
+        threading.Thread(target=load, daemon=True).start()
+    
+    def show_metrics(self):
+        """Show latency histograms and event rates"""
+        if not self.metrics.enabled:
+            messagebox.showinfo("Metrics", "Metrics are off. Set metrics_enabled = True in "
+                                f"{self.config_file} and restart to collect them.")
+            return
+        metrics_window = tk.Toplevel(self.root)
+        metrics_window.title("Metrics")
+        metrics_window.geometry("620x320")
+        metrics_window.transient(self.root)
+        
+        main_frame = ttk.Frame(metrics_window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        columns = ("count", "p50", "p90", "p99", "max")
+        tree = ttk.Treeview(main_frame, columns=("name",) + columns, show="headings")
+        tree.heading("name", text="Metric")
+        tree.column("name", width=180)
+        for column, title in zip(columns, ("Count", "p50 (ms)", "p90 (ms)", "p99 (ms)", "Max (ms)")):
+            tree.heading(column, text=title)
+            tree.column(column, width=80, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        def fill():
+            tree.delete(*tree.get_children())
+            snapshot = self.metrics.snapshot()
+            for name, summary in snapshot['histograms'].items():
+                tree.insert("", tk.END, values=(
+                    name, summary['count'], f"{summary['p50_ms']:.2f}", f"{summary['p90_ms']:.2f}",
+                    f"{summary['p99_ms']:.2f}", f"{summary['max_ms']:.2f}"
+                ))
+            for name, summary in snapshot['rates'].items():
+                tree.insert("", tk.END, values=(f"{name} (last hour)", summary['last_hour'], "", "", "", ""))
+        
+        def save():
+            path = filedialog.asksaveasfilename(
+                parent=metrics_window, defaultextension=".json", initialfile="clockify_metrics.json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            )
+            if not path:
+                return
+            try:
+                self.metrics.dump(path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save metrics: {e}", parent=metrics_window)
+        
+        buttons = ttk.Frame(main_frame)
+        buttons.pack(fill=tk.X)
+        ttk.Button(buttons, text="Refresh", command=fill).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Save JSON...", command=save).pack(side=tk.LEFT, padx=5)
+        fill()
+    
+    def show_history(self):
+        """Browse, search and jump through the whole log.
+
+        Only the visible rows exist as Treeview items; scrolling just refills
+        them from the HistoryPager, which reads the log a page at a time.
+        """
+        if self.history_window is not None and self.history_window.winfo_exists():
+            self.history_window.deiconify()
+            self.history_window.lift()
+            return
+        history_window = tk.Toplevel(self.root)
+        history_window.title("History")
+        history_window.geometry("640x520")
+        self.history_window = history_window
+        pager = HistoryPager(self.engine.storage)
+        view = {'first': 0, 'search_job': None}
+        
+        main_frame = ttk.Frame(history_window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        controls = ttk.Frame(main_frame)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Search:").pack(side=tk.LEFT)
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(controls, textvariable=search_var, width=24)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(controls, text="Go to date:").pack(side=tk.LEFT, padx=(10, 0))
+        date_var = tk.StringVar(value=datetime.now().strftime('%Y-%m-%d'))
+        date_entry = ttk.Entry(controls, textvariable=date_var, width=12)
+        date_entry.pack(side=tk.LEFT, padx=5)
+        
+        body = ttk.Frame(main_frame)
+        body.pack(fill=tk.BOTH, expand=True, pady=5)
+        tree = ttk.Treeview(body, columns=("time", "activity", "type", "minutes"), show="headings",
+                            height=HISTORY_VISIBLE_ROWS, selectmode="browse")
+        for column, title, width in (("time", "Time", 140), ("activity", "Activity", 300),
+                                     ("type", "Type", 60), ("minutes", "Minutes", 60)):
+            tree.heading(column, text=title)
+            tree.column(column, width=width, anchor=tk.E if column == "minutes" else tk.W)
+        items = [tree.insert("", tk.END, values=("", "", "", "")) for _ in range(HISTORY_VISIBLE_ROWS)]
+        scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        status_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=status_var).pack(anchor=tk.W)
+        
+        def render():
+            size = len(pager)
+            view['first'] = max(0, min(view['first'], size - HISTORY_VISIBLE_ROWS))
+            rows = pager.rows(view['first'], HISTORY_VISIBLE_ROWS)
+            for position, item in enumerate(items):
+                if position < len(rows):
+                    row = rows[position]
+                    values = (row.get('Timestamp', ''), row.get('Activity', ''), row.get('Type', ''),
+                              row.get('Duration_Minutes', ''))
+                else:
+                    values = ("", "", "", "")
+                tree.item(item, values=values)
+            if size:
+                scrollbar.set(view['first'] / size, min(1.0, (view['first'] + HISTORY_VISIBLE_ROWS) / size))
+            else:
+                scrollbar.set(0, 1)
+            if pager.searching:
+                status_var.set(f"Searching... {size} matches in {pager.scanned} of {pager.total} entries")
+            elif pager.matches is not None:
+                status_var.set(f"{size} of {pager.total} entries match")
+            else:
+                status_var.set(f"{size} entries")
+        
+        def scroll_to(index):
+            view['first'] = index
+            render()
+        
+        def on_scrollbar(action, amount, unit=None):
+            if action == 'moveto':
+                scroll_to(int(float(amount) * len(pager)))
+            else:
+                step = HISTORY_VISIBLE_ROWS - 1 if unit == 'pages' else 1
+                scroll_to(view['first'] + int(amount) * step)
+        
+        def on_wheel(event):
+            if event.num == 4 or event.delta > 0:
+                scroll_to(view['first'] - 3)
+            else:
+                scroll_to(view['first'] + 3)
+            return "break"
+        
+        def poll_search():
+            if not history_window.winfo_exists():
+                return
+            render()
+            if pager.searching:
+                history_window.after(HISTORY_SEARCH_POLL_MS, poll_search)
+        
+        def start_search():
+            view['search_job'] = None
+            view['first'] = 0
+            pager.search(search_var.get())
+            poll_search()
+        
+        def on_search_changed(*args):
+            # Wait for a pause in typing before scanning the log
+            if view['search_job'] is not None:
+                history_window.after_cancel(view['search_job'])
+            view['search_job'] = history_window.after(HISTORY_SEARCH_DELAY_MS, start_search)
+        
+        def jump_to_date(event=None):
+            day = date_var.get().strip()
+            try:
+                datetime.strptime(day, '%Y-%m-%d')
+            except ValueError:
+                messagebox.showerror("Error", "Enter a date as YYYY-MM-DD", parent=history_window)
+                return
+            scroll_to(pager.index_for_day(day))
+            tree.selection_set(items[0])
+        
+        def refresh():
+            # New entries appear at the top; keep the rows the user is reading in view
+            before = len(pager)
+            if pager.refresh() and view['first'] and pager.matches is None:
+                view['first'] += len(pager) - before
+            render()
+        
+        def close():
+            self._refresh_history = None
+            self.history_window = None
+            pager.close()
+            history_window.destroy()
+        
+        scrollbar.configure(command=on_scrollbar)
+        search_var.trace_add('write', on_search_changed)
+        ttk.Button(controls, text="Go", command=jump_to_date).pack(side=tk.LEFT)
+        date_entry.bind('<Return>', jump_to_date)
+        for widget in (tree, history_window):
+            widget.bind('<MouseWheel>', on_wheel)
+            widget.bind('<Button-4>', on_wheel)
+            widget.bind('<Button-5>', on_wheel)
+        tree.bind('<Prior>', lambda e: on_scrollbar('scroll', -1, 'pages') or "break")
+        tree.bind('<Next>', lambda e: on_scrollbar('scroll', 1, 'pages') or "break")
+        tree.bind('<Home>', lambda e: scroll_to(0) or "break")
+        tree.bind('<End>', lambda e: scroll_to(len(pager)) or "break")
+        history_window.protocol("WM_DELETE_WINDOW", close)
+        self._refresh_history = refresh
+        refresh()
+        search_entry.focus_set()
     
     def show_about(self):
         """Show about dialog"""
@@ -600,32 +1091,82 @@ asks what you're working on and logs your activities."""
     
     def hide_window(self):
         """Hide the main window"""
+        self.cancel_ui_refresh()
         self.root.withdraw()
+        self.release_main_window()
+        self.engine.retime(self._file_watch, HIDDEN_FILE_WATCH_INTERVAL_SECONDS)
+    
+    def release_main_window(self):
+        """In low-power mode, destroy the hidden main window's widgets; show_window rebuilds them"""
+        if not self.main_window_built or not self.settings.current.low_power_mode:
+            return
+        self.cancel_ui_refresh()
+        self.root.config(menu='')
+        for child in self.root.winfo_children():
+            if not isinstance(child, tk.Toplevel):  # Leave open dialogs alone
+                child.destroy()
+        self.main_window_built = False
+        self._activities_list_dirty = True
+        gc.collect()
     
     def show_window(self):
+        self.engine.retime(self._file_watch, FILE_WATCH_INTERVAL_SECONDS)
+        self.build_main_window()
         self.root.deiconify()
         self.root.state('normal')  # Ensure not minimized
         self.root.lift()
-        self.refresh_activities_list()
+        if self._activities_list_dirty:
+            self.refresh_activities_list()
         self.update_ui_status()
     
     def quit_app(self):
         """Quit the application"""
         self.running = False
+        if self.ipc_server:
+            self.ipc_server.stop()
+        if self.sync:
+            self.sync.stop()
+        if self.collector:
+            self.collector.stop()
+        self.metrics.close()
+        try:
+            self.engine.stop()
+        except Exception as e:
+            print(f"Error closing storage: {e}")
         self.root.quit()
         sys.exit()
 
 def main():
     """Main application entry point"""
+    profile = StartupProfile(enabled='--startup-profile' in sys.argv)
+    start_minimized = '--minimized' in sys.argv
+
+    # Only one helper may own the log; a second launch just raises the first
+    instance_lock = InstanceLock()
+    if not instance_lock.acquire():
+        try:
+            send_command({'cmd': 'show'})
+        except (ConnectionError, OSError, ValueError) as e:
+            print(f"Could not reach the running instance: {e}")
+        print("Clockify Helper is already running.")
+        return
+
     print("Clockify Helper Application")
     print("==========================")
     print("Starting application...")
     
-    app = ClockifyHelper()
-    app.show_window()  # Show the main window
+    app = ClockifyHelper(profile)
+    if not start_minimized:
+        app.show_window()  # Show the main window
+        profile.mark("main window")
     
     print("Application started successfully!")
     print("The application is running.")
+
+    def first_idle():
+        profile.mark("first event loop pass")
+        profile.report()
+    app.root.after_idle(first_idle)
     
     try:
         app.root.mainloop()
@@ -634,4 +1175,4 @@ def main():
         app.quit_app()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
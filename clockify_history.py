@@ -0,0 +1,144 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+
+PAGE_SIZE = 200
+MAX_CACHED_PAGES = 32
+SEARCH_PAGE_SIZE = 5000
+
+
+class HistoryPager:
+    """Newest-first view over every logged entry, read a page at a time.
+
+    Index 0 is the newest entry. Entries are fetched from the storage by
+    position in pages of `page_size` and at most `max_cached_pages` pages
+    are kept, so memory stays flat however long the history is. A search
+    narrows the view to entries whose activity contains the query; it scans
+    the log from the newest entry back on a background thread, so matches
+    are appended below the ones already shown. Only the positions of
+    matches are kept.
+    """
+
+    def __init__(self, storage, page_size=PAGE_SIZE, max_cached_pages=MAX_CACHED_PAGES):
+        self.storage = storage
+        self.page_size = page_size
+        self.max_cached_pages = max_cached_pages
+        self.total = 0
+        self.query = ""
+        self.matches = None      # Negated positions of matches, newest first, while searching
+        self.searching = False
+        self.scanned = 0
+        self._pages = OrderedDict()  # page number -> list of entries
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Pick up entries logged since the last refresh; return True if there are new ones"""
+        total = self.storage.entry_count()
+        with self._lock:
+            if total < self.total:
+                self._pages.clear()  # The log was rewritten
+            else:
+                # The page holding the old newest entry may have been partial
+                self._pages.pop(max(self.total - 1, 0) // self.page_size, None)
+            changed = total != self.total
+            self.total = total
+        if changed and self.query:
+            self.search(self.query)
+        return changed
+
+    def __len__(self):
+        with self._lock:
+            return len(self.matches) if self.matches is not None else self.total
+
+    def _position(self, index):
+        if self.matches is not None:
+            return -self.matches[index]
+        return self.total - 1 - index
+
+    def rows(self, first, count):
+        """Return the entries at view indexes first .. first + count - 1"""
+        with self._lock:
+            size = len(self.matches) if self.matches is not None else self.total
+            positions = [self._position(index) for index in range(max(first, 0), min(first + count, size))]
+        entries = []
+        for position in positions:
+            page = self._page(position // self.page_size)
+            offset = position % self.page_size
+            if offset < len(page):
+                entries.append(page[offset])
+        return entries
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+        page = self.storage.entries_at(number * self.page_size, self.page_size)
+        with self._lock:
+            self._pages[number] = page
+            while len(self._pages) > self.max_cached_pages:
+                self._pages.popitem(last=False)
+        return page
+
+    def index_for_day(self, day):
+        """Return the view index of the newest entry on or before `day` ('YYYY-MM-DD')"""
+        next_day = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        position = self.storage.position_of(next_day) - 1
+        with self._lock:
+            if self.matches is not None:
+                return min(bisect_left(self.matches, -position), max(len(self.matches) - 1, 0))
+            if position < 0:
+                return max(self.total - 1, 0)  # Everything is newer; show the oldest entry
+            return self.total - 1 - position
+
+    def search(self, query):
+        """Show only entries whose activity contains `query` (all entries if empty)"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self.query = query
+            self.scanned = 0
+            if not query.strip():
+                self.matches = None
+                self.searching = False
+                return
+            self.matches = array('l')
+            self.searching = True
+            total = self.total
+        threading.Thread(target=self._scan, args=(query.strip().casefold(), total, generation),
+                         name="history-search", daemon=True).start()
+
+    def _scan(self, needle, total, generation):
+        scanned = 0
+        try:
+            end = total
+            while end > 0 and generation == self._generation:
+                start = max(0, end - SEARCH_PAGE_SIZE)
+                entries = self.storage.entries_at(start, end - start)
+                found = [
+                    -(start + offset) for offset in range(len(entries) - 1, -1, -1)
+                    if needle in entries[offset].get('Activity', '').casefold()
+                ]
+                scanned += end - start
+                self._publish(found, scanned, generation)
+                end = start
+        finally:
+            self._publish([], scanned, generation, done=True)
+
+    def _publish(self, found, scanned, generation, done=False):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.matches.extend(found)
+            self.scanned = scanned
+            if done:
+                self.searching = False
+
+    def close(self):
+        """Stop any running search"""
+        with self._lock:
+            self._generation += 1
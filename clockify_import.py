@@ -0,0 +1,377 @@
+"""Bulk import of historical time entries into the helper's log.
+
+    python clockify_import.py old_laptop_log.csv clockify_detailed_2019-2025.csv
+
+Accepts our own log format (Timestamp,Activity,Type,Duration_Minutes) and
+Clockify's detailed CSV export (Description, Start Date, Start Time, End
+Date, End Time, ...). Input files are cut into byte ranges that a process
+pool parses, normalizes and sorts into run files; the runs are then merged
+with the existing log in one streaming pass that drops duplicates,
+computes the durations of imported rows and rebuilds the indexes. Memory
+use depends on --chunk-mb and --workers, not on the size of the input.
+
+Close Clockify Helper before importing.
+"""
+import argparse
+import csv
+import heapq
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from clockify_ipc import LOCK_FILE, InstanceLock
+from clockify_settings import CONFIG_FILE, Settings
+from clockify_storage import LOG_FILE, TIMESTAMP_FORMAT, open_storage, parse_timestamp
+
+
+DEFAULT_CHUNK_MB = 8
+# How much of an input file split_ranges reads at a time
+SPLIT_BLOCK_BYTES = 1024 * 1024
+# Most run files merged at once; more runs are merged in several passes
+MAX_MERGE_FANIN = 128
+# Tried in order for Clockify exports unless --date-format is given
+CLOCKIFY_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%d.%m.%Y')
+CLOCKIFY_TIME_FORMATS = ('%H:%M:%S', '%I:%M:%S %p', '%H:%M', '%I:%M %p')
+LOG_TIMESTAMP_FORMATS = (TIMESTAMP_FORMAT, '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M')
+
+
+def detect_format(header):
+    """Return 'log' or 'clockify' for a CSV header row"""
+    if header[:2] == ['Timestamp', 'Activity']:
+        return 'log'
+    if {'Description', 'Start Date', 'Start Time', 'End Date', 'End Time'} <= set(header):
+        return 'clockify'
+    raise ValueError(f"Unrecognized CSV header: {','.join(header)}")
+
+
+def split_ranges(path, chunk_bytes):
+    """Cut a file after its header into byte ranges that end on record boundaries.
+
+    A quoted field may span lines, so a line break only ends a record when
+    an even number of quote characters comes before it. That holds for CSV
+    as Clockify and the csv module write it, where quotes only appear
+    around fields and doubled inside them. If no boundary is found, the
+    rest of the file is one range.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        start = position = f.tell()
+        in_quotes = False
+        while position < size:
+            block = f.read(SPLIT_BLOCK_BYTES)
+            if not block:
+                break
+            scan = 0  # in_quotes is known up to this offset in the block
+            while scan < len(block):
+                target = start + chunk_bytes - position
+                if target >= len(block):
+                    in_quotes ^= block.count(b'"', scan) % 2 == 1
+                    break
+                if target > scan:
+                    in_quotes ^= block.count(b'"', scan, target) % 2 == 1
+                    scan = target
+                newline = block.find(b'\n', scan)
+                if newline == -1:
+                    in_quotes ^= block.count(b'"', scan) % 2 == 1
+                    break
+                in_quotes ^= block.count(b'"', scan, newline) % 2 == 1
+                scan = newline + 1
+                if not in_quotes:
+                    yield start, position + scan
+                    start = position + scan
+            position += len(block)
+        if start < size:
+            yield start, size
+
+
+class TimestampParser:
+    """Parses timestamps in the first of several formats that works, trying
+    the last successful one first."""
+
+    def __init__(self, formats):
+        self.formats = list(formats)
+
+    def __call__(self, text):
+        for position, fmt in enumerate(self.formats):
+            try:
+                value = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            if position:
+                self.formats.insert(0, self.formats.pop(position))
+            return value
+        return None
+
+
+def normalize_type(activity, activity_type):
+    return 'Break' if activity_type == 'Break' or activity == 'Break' else (activity_type or 'Work')
+
+
+def parse_log_rows(records, header):
+    """Yield run rows from our own log format"""
+    columns = {name: position for position, name in enumerate(header)}
+    timestamp_column = columns['Timestamp']
+    activity_column = columns['Activity']
+    type_column = columns.get('Type')
+    parse = TimestampParser(LOG_TIMESTAMP_FORMATS)
+    for record in records:
+        try:
+            timestamp = record[timestamp_column].strip()
+            activity = ' '.join(record[activity_column].split())
+            activity_type = record[type_column].strip() if type_column is not None else ''
+        except IndexError:
+            yield None
+            continue
+        if parse_timestamp(timestamp) is None:
+            value = parse(timestamp)
+            if value is None:
+                yield None
+                continue
+            timestamp = value.strftime(TIMESTAMP_FORMAT)
+        if not activity:
+            yield None
+            continue
+        yield [timestamp, activity, normalize_type(activity, activity_type), '', '']
+
+
+def parse_clockify_rows(records, header, date_formats):
+    """Yield run rows from Clockify's detailed export.
+
+    Each time entry becomes a row at its start, plus a Break row at its end
+    that the merge keeps only if nothing else starts by then.
+    """
+    columns = {name: position for position, name in enumerate(header)}
+    parse_date = TimestampParser(f"{d} {t}" for d in date_formats for t in CLOCKIFY_TIME_FORMATS)
+    for record in records:
+        try:
+            activity = ' '.join(record[columns['Description']].split())
+            if not activity and 'Project' in columns:
+                activity = record[columns['Project']].strip()
+            start = parse_date(f"{record[columns['Start Date']].strip()} {record[columns['Start Time']].strip()}")
+            end = parse_date(f"{record[columns['End Date']].strip()} {record[columns['End Time']].strip()}")
+        except IndexError:
+            yield None
+            continue
+        if not activity or start is None or end is None or end < start:
+            yield None
+            continue
+        started = start.strftime(TIMESTAMP_FORMAT)
+        yield [started, activity, normalize_type(activity, ''), '', '']
+        if end > start:
+            yield [end.strftime(TIMESTAMP_FORMAT), 'Break', 'Break', started, activity]
+
+
+def sort_chunk(task):
+    """Parse one byte range of an input file into a sorted run file.
+
+    Run rows are [timestamp, activity, type, ends_timestamp, ends_activity];
+    the last two are set on the Break rows that mark a Clockify entry's end.
+    Returns (run path, rows, rejected).
+    """
+    path, start, end, file_format, header, run_path, date_formats = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8-sig', errors='replace')
+    records = csv.reader(io.StringIO(text, newline=''))
+    if file_format == 'log':
+        parsed = parse_log_rows(records, header)
+    else:
+        parsed = parse_clockify_rows(records, header, date_formats)
+
+    rows = []
+    rejected = 0
+    for row in parsed:
+        if row is None:
+            rejected += 1
+        else:
+            rows.append(row)
+    rows.sort(key=run_order)  # Stable, so file order breaks ties
+    with open(run_path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return run_path, len(rows), rejected
+
+
+def run_order(row):
+    """Sort key for run rows: by time, with end markers after rows starting at that time"""
+    return row[0], row[3] != ''
+
+
+def read_run(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        yield from csv.reader(f)
+
+
+def merge_runs(paths, workdir):
+    """Merge run files in passes of at most MAX_MERGE_FANIN until few enough remain"""
+    generation = 0
+    while len(paths) > MAX_MERGE_FANIN:
+        merged = []
+        for group_start in range(0, len(paths), MAX_MERGE_FANIN):
+            group = paths[group_start:group_start + MAX_MERGE_FANIN]
+            target = os.path.join(workdir, f"merge{generation}_{group_start}.csv")
+            with open(target, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(heapq.merge(*map(read_run, group), key=run_order))
+            for path in group:
+                os.remove(path)
+            merged.append(target)
+        paths = merged
+        generation += 1
+    return [read_run(path) for path in paths]
+
+
+class TimestampClock:
+    """Turns log timestamps into seconds since year 1, caching the date part"""
+
+    def __init__(self):
+        self._days = {}
+
+    def seconds(self, timestamp):
+        day = timestamp[:10]
+        ordinal = self._days.get(day)
+        if ordinal is None:
+            ordinal = date(int(day[:4]), int(day[5:7]), int(day[8:10])).toordinal()
+            self._days[day] = ordinal
+        return ordinal * 86400 + int(timestamp[11:13]) * 3600 + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+
+
+def merge_with_log(existing, runs, stats):
+    """Yield the combined log as entry dicts, oldest first.
+
+    `existing` yields the current log's rows; at equal timestamps they come
+    first, so re-importing an exported log changes nothing. A row whose
+    (timestamp, activity) was already written is dropped. Existing rows
+    keep their Duration_Minutes as they are, unless an imported row was
+    inserted right before them. Those rows and imported rows get the
+    minutes since the previous row, like log_activity does.
+    """
+    # Existing rows carry their duration as a sixth field; imported run rows have five
+    existing_runs = (
+        [row['Timestamp'], row['Activity'], row['Type'], '', '', row.get('Duration_Minutes') or '']
+        for row in existing
+    )
+    clock = TimestampClock()
+    seen_at = None
+    seen = set()
+    current = None      # (timestamp, activity) of the newest row that starts an activity
+    previous_seconds = None
+    previous_imported = False
+
+    for row in heapq.merge(existing_runs, *runs, key=run_order):
+        timestamp, activity, activity_type, ends_timestamp, ends_activity = row[:5]
+        if ends_timestamp and current != (ends_timestamp, ends_activity):
+            stats['superseded'] += 1
+            continue  # Something else started before this entry ended
+        if timestamp != seen_at:
+            seen_at = timestamp
+            seen = set()
+        if activity in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add(activity)
+        try:
+            seconds = clock.seconds(timestamp)
+        except ValueError:
+            seconds = None  # A damaged row already in the log; keep it as it is
+        imported = len(row) == 5
+        if not imported and not previous_imported:
+            duration = row[5]
+        elif seconds is not None and previous_seconds is not None:
+            duration = str((seconds - previous_seconds) // 60)
+        else:
+            duration = row[5] if not imported else ''
+        if seconds is not None:
+            previous_seconds = seconds
+        previous_imported = imported
+        current = (timestamp, activity)
+        yield {'Timestamp': timestamp, 'Activity': activity, 'Type': activity_type, 'Duration_Minutes': duration}
+
+
+def import_files(paths, storage, workers=None, chunk_mb=DEFAULT_CHUNK_MB, date_formats=CLOCKIFY_DATE_FORMATS,
+                 workdir=None):
+    """Import CSV files into an open storage; return a stats dict"""
+    stats = {'parsed': 0, 'rejected': 0, 'duplicates': 0, 'superseded': 0, 'written': 0}
+    tasks = []
+    workdir = tempfile.mkdtemp(prefix='clockify_import_', dir=workdir)
+    try:
+        for path in paths:
+            with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+                header = next(csv.reader([f.readline()]), [])
+            file_format = detect_format(header)
+            for start, end in split_ranges(path, chunk_mb * 1024 * 1024):
+                run_path = os.path.join(workdir, f"run{len(tasks):06}.csv")
+                tasks.append((path, start, end, file_format, header, run_path, tuple(date_formats)))
+
+        started = time.perf_counter()
+        run_paths = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for run_path, rows, rejected in executor.map(sort_chunk, tasks):
+                run_paths.append(run_path)
+                stats['parsed'] += rows
+                stats['rejected'] += rejected
+        stats['sort_seconds'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        runs = merge_runs(run_paths, workdir)
+        stats['written'] = storage.replace_entries(merge_with_log(storage.entries_between(), runs, stats))
+        stats['merge_seconds'] = time.perf_counter() - started
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Report totals must be recomputed from the new log
+    summary_file = f"{storage.location}.reports.json"
+    if os.path.exists(summary_file):
+        os.remove(summary_file)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import historical time entries into the Clockify Helper log")
+    parser.add_argument('files', nargs='+', help="our own CSV logs or Clockify detailed exports")
+    parser.add_argument('--dir', default=os.environ.get('CLOCKIFY_HELPER_DIR', '.'),
+                        help="the helper's working directory")
+    parser.add_argument('--workers', type=int, help="parser processes (default: one per CPU)")
+    parser.add_argument('--chunk-mb', type=int, default=DEFAULT_CHUNK_MB,
+                        help="input parsed per task; memory use is about ten times this per worker")
+    parser.add_argument('--date-format', help="date format of the Clockify export, e.g. %%d/%%m/%%Y")
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(path) for path in args.files]
+    os.chdir(args.dir)
+    lock = InstanceLock(LOCK_FILE)
+    if not lock.acquire():
+        print("Clockify Helper is running; close it before importing.", file=sys.stderr)
+        return 2
+
+    input_bytes = sum(os.path.getsize(path) for path in paths)
+    try:
+        storage = open_storage(Settings(CONFIG_FILE).config, LOG_FILE)
+        try:
+            date_formats = (args.date_format,) if args.date_format else CLOCKIFY_DATE_FORMATS
+            started = time.perf_counter()
+            stats = import_files(paths, storage, args.workers, args.chunk_mb, date_formats, workdir='.')
+            elapsed = time.perf_counter() - started
+        finally:
+            storage.close()
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        lock.release()
+
+    print(f"Parsed {stats['parsed']} rows from {input_bytes / 1e6:.1f} MB in {stats['sort_seconds']:.2f}s "
+          f"({stats['parsed'] / max(stats['sort_seconds'], 1e-9):.0f} rows/s)")
+    print(f"Merged into {stats['written']} log rows in {stats['merge_seconds']:.2f}s "
+          f"({stats['written'] / max(stats['merge_seconds'], 1e-9):.0f} rows/s)")
+    print(f"Skipped {stats['duplicates']} duplicates and {stats['rejected']} unreadable rows; "
+          f"{elapsed:.2f}s in total")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""Single-instance lock and local command socket for Clockify Helper.
+
+The first running helper holds LOCK_FILE and serves newline-delimited JSON
+commands on a Unix-domain socket (or a localhost TCP port where Unix
+sockets are unavailable). This module deliberately imports nothing from
+the GUI so that `clockify_cli.py` starts in milliseconds.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+
+
+LOCK_FILE = "clockify_helper.lock"
+SOCKET_FILE = "clockify_helper.sock"
+PORT_FILE = "clockify_helper.port"
+CLIENT_TIMEOUT_SECONDS = 5
+MAX_REQUEST_BYTES = 64 * 1024
+MAX_LAST_ENTRIES = 1000
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class InstanceLock:
+    """An exclusive lock file held for as long as the helper runs"""
+
+    def __init__(self, path=LOCK_FILE):
+        self.path = path
+        self._handle = None
+
+    def acquire(self):
+        """Take the lock; return False if another instance already holds it"""
+        handle = open(self.path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._handle = handle
+        return True
+
+    def release(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class CommandHandler:
+    """Maps JSON commands onto a ClockifyEngine.
+
+    `show_window` is an optional callable used by the 'show' command; the
+    engine's own callbacks take care of updating any UI after a change.
+    """
+
+    def __init__(self, engine, show_window=None, ui_status=None):
+        self.engine = engine
+        self.show_window = show_window
+        self.ui_status = ui_status
+
+    def handle(self, request):
+        command = request.get('cmd')
+        method = getattr(self, f"cmd_{command}", None) if isinstance(command, str) else None
+        if method is None:
+            return {'ok': False, 'error': f"Unknown command: {command}"}
+        try:
+            result = method(request)
+        except (KeyError, TypeError, ValueError) as e:
+            return {'ok': False, 'error': f"Bad request: {e}"}
+        response = {'ok': True}
+        response.update(result or {})
+        return response
+
+    def cmd_ping(self, request):
+        return {'pid': os.getpid()}
+
+    def cmd_log(self, request):
+        activity = str(request['activity']).strip()
+        if not activity:
+            raise ValueError("activity must not be empty")
+        self.engine.submit_activity(activity)
+        return {}
+
+    def cmd_break(self, request):
+        minutes = request.get('minutes')
+        self.engine.start_break(int(minutes) if minutes else None)
+        self.engine.log_activity("Break", "Break")
+        return {}
+
+    def cmd_end_break(self, request):
+        self.engine.end_break()
+        return {}
+
+    def cmd_status(self, request):
+        engine = self.engine
+        with engine.lock:
+            next_reminder = engine.next_reminder_time()
+            status = {
+                'last_activity': engine.last_activity,
+                'in_break': engine.in_break,
+                'break_end_time': engine.break_end_time.isoformat(sep=' ') if engine.break_end_time else None,
+                'next_reminder': next_reminder.isoformat(sep=' ') if next_reminder else None,
+                'history_names': len(engine.activity_history),
+                'history_bytes': engine.activity_history.memory_usage(),
+            }
+        if self.ui_status is not None:
+            status.update(self.ui_status())
+        return status
+
+    def cmd_last(self, request):
+        count = max(0, min(int(request.get('count', 10)), MAX_LAST_ENTRIES))
+        recent = list(self.engine.recent_activities)
+        if count <= len(recent):
+            entries = recent[len(recent) - count:] if count else []
+        else:
+            self.engine.storage.flush()
+            entries = self.engine.storage.last_entries(count)
+        return {'entries': entries}
+
+    def cmd_metrics(self, request):
+        return {'metrics': self.engine.metrics.snapshot()}
+
+    def cmd_resources(self, request):
+        window = request.get('window_seconds')
+        return {'resources': self.engine.resources.report(float(window) if window else None)}
+
+    def cmd_show(self, request):
+        if self.show_window is None:
+            raise ValueError("this instance has no window")
+        self.show_window()
+        return {}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # One JSON object per line; a connection may send several
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                return
+            if len(line) > MAX_REQUEST_BYTES:
+                self._reply({'ok': False, 'error': "Request too large"})
+                return
+            try:
+                request = json.loads(line.decode('utf-8'))
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                self._reply({'ok': False, 'error': f"Invalid JSON: {e}"})
+                continue
+            self._reply(self.server.command_handler.handle(request))
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+if hasattr(socket, 'AF_UNIX'):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class _TcpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class IpcServer:
+    """Serves commands for the instance that holds the lock"""
+
+    def __init__(self, command_handler, socket_path=SOCKET_FILE, port_file=PORT_FILE):
+        self.command_handler = command_handler
+        self.socket_path = socket_path
+        self.port_file = port_file
+        self._server = None
+
+    def start(self):
+        if hasattr(socket, 'AF_UNIX'):
+            # We hold the instance lock, so any socket file left here is stale
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            # Create the socket owner-only, so no other user can connect before the chmod
+            previous_umask = os.umask(0o177)
+            try:
+                self._server = _UnixServer(self.socket_path, _RequestHandler)
+            finally:
+                os.umask(previous_umask)
+            os.chmod(self.socket_path, 0o600)
+        else:
+            self._server = _TcpServer(('127.0.0.1', 0), _RequestHandler)
+            with open(self.port_file, 'w') as f:
+                f.write(str(self._server.server_address[1]))
+        self._server.command_handler = self.command_handler
+        # Block until a client connects rather than polling twice a second; stop() wakes it
+        threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': None},
+                         name="ipc-server", daemon=True).start()
+
+    def _wake(self):
+        try:
+            with socket.socket(self._server.address_family, socket.SOCK_STREAM) as sock:
+                sock.settimeout(1)
+                sock.connect(self._server.server_address)
+        except OSError:
+            pass
+
+    def stop(self):
+        if self._server is None:
+            return
+        # shutdown() waits for serve_forever to notice the request, which it
+        # only does when a connection arrives, so keep connecting until it has
+        stopper = threading.Thread(target=self._server.shutdown, daemon=True)
+        stopper.start()
+        while stopper.is_alive():
+            self._wake()
+            stopper.join(0.05)
+        self._server.server_close()
+        self._server = None
+        for path in (self.socket_path, self.port_file):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def connect(socket_path=SOCKET_FILE, port_file=PORT_FILE, timeout=CLIENT_TIMEOUT_SECONDS):
+    """Open a connection to the running helper, raising ConnectionError if there is none"""
+    try:
+        if hasattr(socket, 'AF_UNIX'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+        else:
+            with open(port_file) as f:
+                port = int(f.read().strip())
+            sock = socket.create_connection(('127.0.0.1', port), timeout)
+    except (OSError, ValueError) as e:
+        raise ConnectionError(f"Clockify Helper is not running ({e})")
+    return sock
+
+
+def send_command(request, socket_path=SOCKET_FILE, port_file=PORT_FILE, timeout=CLIENT_TIMEOUT_SECONDS):
+    """Send one command to the running helper and return its response"""
+    with connect(socket_path, port_file, timeout) as sock:
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as reply:
+            line = reply.readline()
+    if not line:
+        raise ConnectionError("Clockify Helper closed the connection")
+    return json.loads(line.decode('utf-8'))
@@ -0,0 +1,254 @@
+"""Latency histograms and event rates for the helper's hot paths.
+
+Disabled by default. When `metrics_enabled` is off, `Metrics.from_config`
+returns NULL_METRICS, whose methods do nothing, so instrumented code costs
+one method call. When on, every observation is a bisect into fixed
+log-scaled buckets, and the numbers can be viewed from Help > Metrics,
+saved as JSON, fetched with `clockify_cli.py metrics`, or served at
+http://127.0.0.1:<metrics_port>/metrics.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+
+# Bucket upper bounds in seconds: 10 µs to about 3 minutes, each sqrt(2) wider
+BUCKET_BOUNDS = tuple(1e-5 * 2 ** (i / 2) for i in range(49))
+PERCENTILES = (50, 90, 99)
+RATE_WINDOW_SECONDS = 3600
+RATE_HISTORY_LIMIT = 100000
+
+
+class Histogram:
+    """Counts of observed durations in log-scaled buckets"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        bucket = bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, percent):
+        """Upper bound of the bucket holding the given percentile, in seconds"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = self.count * percent / 100
+            seen = 0
+            for bucket, count in enumerate(self.counts):
+                seen += count
+                if seen >= target:
+                    bound = BUCKET_BOUNDS[bucket] if bucket < len(BUCKET_BOUNDS) else self.max
+                    return min(bound, self.max)
+            return self.max
+
+    def snapshot(self):
+        summary = {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+        }
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = self.percentile(percent) * 1000
+        return summary
+
+
+class Rate:
+    """Counts events and how many happened within the last hour"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self._times = deque(maxlen=RATE_HISTORY_LIMIT)
+
+    def mark(self):
+        now = time.monotonic()
+        with self._lock:
+            self.count += 1
+            self._times.append(now)
+
+    def per_hour(self):
+        cutoff = time.monotonic() - RATE_WINDOW_SECONDS
+        with self._lock:
+            while self._times and self._times[0] < cutoff:
+                self._times.popleft()
+            return len(self._times)
+
+    def snapshot(self):
+        return {'count': self.count, 'last_hour': self.per_hour()}
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Named histograms and rates, created on first use.
+
+    `begin(name)` and `end(name)` time spans that start and finish in
+    different places, such as a reminder falling due on the scheduler
+    thread and its popup appearing on the Tk thread.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.rates = {}
+        self._started = {}
+        self.created = time.time()
+        self._server = None
+
+    @classmethod
+    def from_config(cls, config):
+        if not config.getboolean('SETTINGS', 'metrics_enabled', fallback=False):
+            return NULL_METRICS
+        return cls()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def timer(self, name):
+        """Context manager that observes how long its block took"""
+        return _Timer(self.histogram(name))
+
+    def begin(self, name):
+        self._started[name] = time.perf_counter()
+
+    def end(self, name):
+        started = self._started.pop(name, None)
+        if started is not None:
+            self.observe(name, time.perf_counter() - started)
+
+    def mark(self, name):
+        rate = self.rates.get(name)
+        if rate is None:
+            with self._lock:
+                rate = self.rates.setdefault(name, Rate())
+        rate.mark()
+
+    def snapshot(self):
+        with self._lock:
+            histograms = dict(self.histograms)
+            rates = dict(self.rates)
+        return {
+            'enabled': True,
+            'uptime_seconds': time.time() - self.created,
+            'histograms': {name: histogram.snapshot() for name, histogram in sorted(histograms.items())},
+            'rates': {name: rate.snapshot() for name, rate in sorted(rates.items())},
+        }
+
+    def dump(self, path):
+        """Atomically write a snapshot to `path` as JSON"""
+        temp_file = f"{path}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temp_file, path)
+
+    def serve(self, port):
+        """Serve snapshots at http://127.0.0.1:<port>/metrics from a daemon thread"""
+        self._server = _make_server(('127.0.0.1', port), self)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullMetrics:
+    """Stands in for Metrics when instrumentation is disabled"""
+
+    enabled = False
+    _timer = _NullTimer()
+
+    def observe(self, name, seconds):
+        pass
+
+    def timer(self, name):
+        return self._timer
+
+    def begin(self, name):
+        pass
+
+    def end(self, name):
+        pass
+
+    def mark(self, name):
+        pass
+
+    def snapshot(self):
+        return {'enabled': False, 'histograms': {}, 'rates': {}}
+
+    def close(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def _make_server(address, metrics):
+    # http.server is slow to import and only needed when metrics_port is set
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class MetricsServer(socketserver.ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = json.dumps(metrics.snapshot(), indent=2).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return MetricsServer(address, MetricsHandler)
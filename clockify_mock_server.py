@@ -0,0 +1,201 @@
+"""A local stand-in for the parts of the Clockify API the sync uses.
+
+Serve it and point `clockify_api_url` at it:
+
+    python clockify_mock_server.py --port 8099 --fail-rate 0.05
+    # clockify_api_url = http://127.0.0.1:8099/api/v1
+
+Or load-test the whole pipeline offline, from a synthetic log through the
+sync to this server:
+
+    python clockify_mock_server.py --load-test 5000 --fail-rate 0.1
+
+Time entries are kept in memory. Requests repeating an Idempotency-Key
+return the stored entry instead of creating a second one, and
+`--fail-rate` answers that share of requests with 503 to exercise retries.
+"""
+import argparse
+import configparser
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+TIME_ENTRIES_PATH = re.compile(r'^/api/v1/workspaces/([^/]+)/time-entries$')
+
+
+class MockClockifyServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fail_rate=0.0, latency_ms=0):
+        super().__init__(address, _Handler)
+        self.fail_rate = fail_rate
+        self.latency = latency_ms / 1000.0
+        self.lock = threading.Lock()
+        self.entries = {}   # idempotency key (or generated id) -> entry
+        self.stats = {'requests': 0, 'created': 0, 'duplicates': 0, 'injected_failures': 0, 'connections': 0}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="mock-clockify", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.stats['connections'] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.server.lock:
+                self._reply(200, dict(self.server.stats, stored=len(self.server.entries)))
+        else:
+            self._reply(404, {'message': 'Not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        server = self.server
+        with server.lock:
+            server.stats['requests'] += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        match = TIME_ENTRIES_PATH.match(self.path)
+        if not match:
+            self._reply(404, {'message': 'Not found'})
+            return
+        if not self.headers.get('X-Api-Key'):
+            self._reply(401, {'message': 'Missing X-Api-Key'})
+            return
+        if random.random() < server.fail_rate:
+            with server.lock:
+                server.stats['injected_failures'] += 1
+            self._reply(503, {'message': 'Injected failure'})
+            return
+        try:
+            entry = json.loads(body.decode('utf-8'))
+            if not entry.get('start') or not entry.get('end'):
+                raise ValueError("start and end are required")
+        except ValueError as e:
+            self._reply(400, {'message': str(e)})
+            return
+
+        key = self.headers.get('Idempotency-Key')
+        with server.lock:
+            if key and key in server.entries:
+                server.stats['duplicates'] += 1
+                self._reply(200, server.entries[key])
+                return
+            entry['id'] = f"{len(server.entries) + 1:024x}"
+            entry['workspaceId'] = match.group(1)
+            server.entries[key or entry['id']] = entry
+            server.stats['created'] += 1
+        self._reply(201, entry)
+
+
+def load_test(rows, fail_rate, latency_ms, batch_size, concurrency):
+    """Sync a synthetic log of `rows` entries into a fresh mock server and report"""
+    from clockify_bench import generate_log
+    from clockify_storage import open_storage
+    from clockify_sync import ClockifySync
+
+    server = MockClockifyServer(('127.0.0.1', 0), fail_rate, latency_ms).start()
+    workdir = tempfile.mkdtemp(prefix='clockify_sync_')
+    previous_dir = os.getcwd()
+    try:
+        os.chdir(workdir)
+        generate_log('time_tracking_log.csv', rows)
+        config = configparser.ConfigParser()
+        config.read_dict({'SETTINGS': {'log_flush_policy': 'interval'}})
+        storage = open_storage(config, 'time_tracking_log.csv')
+        sync = ClockifySync(storage, api_key='load-test', workspace_id='mock', api_url=server.url,
+                            batch_size=batch_size, concurrency=concurrency, since='2000-01-01',
+                            state_file='clockify_sync_state.json', backoff_base=0.01)
+
+        start = time.perf_counter()
+        cycles = 0
+        while True:
+            cycles += 1
+            try:
+                if not sync.sync_once():
+                    break
+            except Exception as e:
+                print(f"Cycle {cycles} stopped early: {e}")
+        elapsed = time.perf_counter() - start
+        sync.stop()
+        storage.close()
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+        server.stop()
+
+    print(f"Uploaded {sync.stats['sent']} entries in {elapsed:.2f}s "
+          f"({sync.stats['sent'] / elapsed:.0f}/s) over {cycles} cycles")
+    print(f"Retries: {sync.stats['retries']}, rejected: {sync.stats['failed']}")
+    print(f"Server: {json.dumps(server.stats)}")
+    return 0 if server.stats['created'] == sync.stats['sent'] else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Clockify API for offline sync testing")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument('--latency-ms', type=int, default=0, help="delay added to every request")
+    parser.add_argument('--load-test', type=int, metavar='ROWS',
+                        help="sync a synthetic log of ROWS entries into a private server and exit")
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    if args.load_test:
+        return load_test(args.load_test, args.fail_rate, args.latency_ms, args.batch_size, args.concurrency)
+
+    server = MockClockifyServer(('127.0.0.1', args.port), args.fail_rate, args.latency_ms)
+    print(f"Mock Clockify API at {server.url} (stats at /stats), started {datetime.now():%H:%M:%S}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
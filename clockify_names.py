@@ -0,0 +1,325 @@
+"""Find and merge near-duplicate activity names.
+
+    python clockify_names.py scan            # list likely duplicates
+    python clockify_names.py scan --save     # add them to the alias table
+    python clockify_names.py alias "code-review" "Code review"
+    python clockify_names.py rewrite         # rename logged entries
+
+Names are first normalized (case, whitespace, punctuation, with ticket IDs
+such as `#123` or `ABC-123` set aside), so "Code review", "code review "
+and "Code-review #123" share the key "code review". Keys that are still
+different but look alike ("Email" and "E-mail", "Code reviews") are then
+grouped by spelling without spaces and by trigram similarity. Each
+group's most used spelling becomes the canonical name; ticket IDs are
+kept, so "Code-review #123" becomes "Code review #123".
+
+The alias table in clockify_aliases.json maps variants to canonical
+names. The helper applies it when an activity is logged and when entries
+are exported or synced; `rewrite` applies it to the whole history. The
+table is plain JSON and can be edited by hand.
+
+Close Clockify Helper before running `scan` or `rewrite`.
+"""
+import csv
+import json
+import os
+import random
+import re
+import sys
+import zlib
+from collections import Counter, defaultdict
+
+from clockify_autocomplete import fold, trigrams
+from clockify_ipc import LOCK_FILE, InstanceLock
+from clockify_settings import CONFIG_FILE, Settings
+from clockify_storage import LOG_FILE, open_storage
+
+
+ALIASES_FILE = "clockify_aliases.json"
+DEFAULT_SIMILARITY = 0.7
+TICKET_PATTERN = re.compile(r'(?<!\w)(?:#\d+|[A-Z][A-Z0-9]+-\d+)(?!\w)')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]|_')
+# Numbers and one- or two-letter words tell apart otherwise similar names ("Sprint 12", "Meeting B")
+MARKER_PATTERN = re.compile(r'\b(?:\d+|\w{1,2})\b')
+# MinHash signature: LSH_BANDS bands of LSH_ROWS rows, tuned for similarities around 0.7
+LSH_BANDS = 10
+LSH_ROWS = 4
+MINHASH_PRIME = (1 << 61) - 1
+
+
+def split_tickets(name):
+    """Return `name` without ticket IDs, and the ticket IDs in order"""
+    tickets = TICKET_PATTERN.findall(name)
+    return ' '.join(TICKET_PATTERN.sub(' ', name).split()), tickets
+
+
+def name_key(name):
+    """Normalized form of a name without its ticket IDs; equal keys are duplicates"""
+    base, tickets = split_tickets(name)
+    return fold(PUNCTUATION_PATTERN.sub(' ', base)) or ' '.join(tickets).casefold()
+
+
+def jaccard(a, b):
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def _minhash_rows():
+    # One (a, b) pair per MinHash row; fixed so suggestions are the same on every run
+    rng = random.Random(0)
+    return [(rng.randrange(1, MINHASH_PRIME), rng.randrange(MINHASH_PRIME))
+            for _ in range(LSH_BANDS * LSH_ROWS)]
+
+
+def similar_groups(keys, threshold=DEFAULT_SIMILARITY):
+    """Group keys whose trigram sets have Jaccard similarity >= `threshold`.
+
+    Candidates come from MinHash locality-sensitive hashing: each key gets a
+    signature of LSH_BANDS * LSH_ROWS minimum trigram hashes, and keys that
+    agree on every row of some band share a bucket. A pair at similarity
+    0.7 lands in a common bucket about 94% of the time, and keys sharing no
+    trigram never do, so the work grows linearly with the number of keys.
+    Candidates are then checked against the exact similarity. Keys with
+    different numbers or short words in them ("Sprint 12" and "Sprint 13",
+    "Meeting" and "Meeting B") are never grouped, so buckets are also split
+    by those. Keys that only differ in spacing ("e mail", "email") are
+    always grouped. Returns lists of two or more keys.
+    """
+    keys = sorted(set(keys))
+    grams = [trigrams(key) for key in keys]
+    markers = [tuple(MARKER_PATTERN.findall(key)) for key in keys]
+
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        parent[find(i)] = find(j)
+
+    compact = {}
+    for i, key in enumerate(keys):
+        j = compact.setdefault(key.replace(' ', ''), i)
+        if j != i:
+            union(i, j)
+
+    rows = _minhash_rows()
+    gram_hashes = {}  # trigram -> its hash under every MinHash row
+    buckets = defaultdict(list)
+    for i, key_grams in enumerate(grams):
+        hashes = []
+        for gram in key_grams:
+            row = gram_hashes.get(gram)
+            if row is None:
+                h = zlib.crc32(gram.encode('utf-8'))
+                row = gram_hashes[gram] = [(a * h + b) % MINHASH_PRIME for a, b in rows]
+            hashes.append(row)
+        signature = tuple(map(min, zip(*hashes)))
+        for band in range(LSH_BANDS):
+            bucket = buckets[markers[i], band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]]
+            for j in bucket:
+                if find(i) != find(j) and jaccard(key_grams, grams[j]) >= threshold:
+                    union(i, j)
+            bucket.append(i)
+
+    groups = defaultdict(list)
+    for i, key in enumerate(keys):
+        groups[find(i)].append(key)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def suggest_aliases(stats, threshold=DEFAULT_SIMILARITY):
+    """Return {variant: canonical name} for duplicate names in `stats`.
+
+    `stats` holds (name, use count, ...) tuples, as from activity_stats().
+    """
+    counts = Counter()
+    by_key = defaultdict(list)
+    for name, count, *_ in stats:
+        counts[name] += count
+        by_key[name_key(name)].append(name)
+
+    group_of = {key: key for key in by_key}
+    for group in similar_groups(by_key, threshold):
+        for key in group:
+            group_of[key] = group[0]
+
+    # The most used spelling (ticket IDs aside) of each group is its canonical base
+    votes = defaultdict(Counter)
+    for key, names in by_key.items():
+        for name in names:
+            votes[group_of[key]][split_tickets(name)[0]] += counts[name]
+    bases = {group: spellings.most_common(1)[0][0] for group, spellings in votes.items()}
+
+    aliases = {}
+    for key, names in by_key.items():
+        base = bases[group_of[key]]
+        for name in names:
+            tickets = split_tickets(name)[1]
+            canonical = ' '.join([base] + tickets) if base else ' '.join(tickets)
+            if canonical != name:
+                aliases[name] = canonical
+    return aliases
+
+
+class AliasTable:
+    """Variant -> canonical activity names, kept in a JSON file.
+
+    `apply` looks names up exactly, then by their folded form, so a
+    variant typed with different case or spacing is also caught.
+    """
+
+    def __init__(self, path=ALIASES_FILE):
+        self.path = path
+        self.aliases = {}
+        self._folded = {}
+        self._stamp = None
+        self.load()
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        self._stamp = self._file_stamp()
+        aliases = {}
+        if self._stamp is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    aliases = json.load(f).get('aliases', {})
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"Error loading activity aliases: {e}")
+        self._set(aliases)
+
+    def _set(self, aliases):
+        # Resolve chains so every variant points straight at a final name
+        resolved = {}
+        for variant, canonical in aliases.items():
+            seen = {variant}
+            while canonical in aliases and canonical not in seen:
+                seen.add(canonical)
+                canonical = aliases[canonical]
+            if canonical != variant:
+                resolved[variant] = canonical
+        self._folded = {fold(variant): canonical for variant, canonical in resolved.items()}
+        self.aliases = resolved
+
+    def check(self):
+        """Reload if the file changed on disk; return True if it did"""
+        if self._file_stamp() == self._stamp:
+            return False
+        self.load()
+        return True
+
+    def apply(self, name):
+        """Return the canonical name for `name` (`name` itself if it has none)"""
+        if not self.aliases:
+            return name
+        return self.aliases.get(name) or self._folded.get(fold(name), name)
+
+    def update(self, aliases):
+        """Add or replace aliases and save the table"""
+        merged = dict(self.aliases)
+        merged.update(aliases)
+        self._set(merged)
+        self.save()
+
+    def save(self):
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'aliases': dict(sorted(self.aliases.items()))}, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, self.path)
+        self._stamp = self._file_stamp()
+
+
+def rewrite_history(storage, aliases):
+    """Rename every logged work entry to its canonical name; return how many changed"""
+    changed = sum(
+        1 for row in storage.entries_between()
+        if row.get('Type') == 'Work' and aliases.apply(row['Activity']) != row['Activity']
+    )
+    if not changed:
+        return 0
+
+    def renamed():
+        for row in storage.entries_between():
+            if row.get('Type') == 'Work':
+                row['Activity'] = aliases.apply(row['Activity'])
+            yield row
+
+    storage.replace_entries(renamed())
+    # Report totals must be recomputed from the new log
+    summary_file = f"{storage.location}.reports.json"
+    if os.path.exists(summary_file):
+        os.remove(summary_file)
+    return changed
+
+
+def main():
+    import argparse  # Only needed on the command line, not when the helper imports AliasTable
+    parser = argparse.ArgumentParser(description="Find and merge near-duplicate activity names")
+    parser.add_argument('--dir', default=os.environ.get('CLOCKIFY_HELPER_DIR', '.'),
+                        help="the helper's working directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+    scan = commands.add_parser('scan', help="list likely duplicate names")
+    scan.add_argument('--threshold', type=float, default=DEFAULT_SIMILARITY,
+                      help="trigram similarity (0-1) for names to count as duplicates")
+    scan.add_argument('--save', action='store_true', help="add the suggestions to the alias table")
+    alias = commands.add_parser('alias', help="map a name to its canonical name")
+    alias.add_argument('variant')
+    alias.add_argument('canonical')
+    commands.add_parser('rewrite', help="rename logged entries using the alias table")
+    args = parser.parse_args()
+
+    os.chdir(args.dir)
+    aliases = AliasTable()
+    if args.command == 'alias':
+        aliases.update({args.variant: args.canonical})
+        print(f"{args.variant!r} -> {aliases.apply(args.variant)!r}")
+        return 0
+
+    lock = InstanceLock(LOCK_FILE)
+    if not lock.acquire():
+        print("Clockify Helper is running; close it first.", file=sys.stderr)
+        return 2
+    try:
+        storage = open_storage(Settings(CONFIG_FILE).config, LOG_FILE)
+        try:
+            if args.command == 'scan':
+                stats = storage.activity_stats()
+                suggestions = suggest_aliases(stats, args.threshold)
+                by_canonical = defaultdict(list)
+                for variant, canonical in suggestions.items():
+                    by_canonical[canonical].append(variant)
+                for canonical, variants in sorted(by_canonical.items()):
+                    print(canonical)
+                    for variant in sorted(variants):
+                        print(f"    {variant}")
+                print(f"{len(suggestions)} of {len(stats)} names have a canonical spelling")
+                if args.save:
+                    aliases.update(suggestions)
+                    print(f"Saved {len(aliases)} aliases to {aliases.path}")
+            else:
+                changed = rewrite_history(storage, aliases)
+                print(f"Renamed {changed} entries")
+        finally:
+            storage.close()
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        lock.release()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
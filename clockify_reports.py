@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+from array import array
+from datetime import datetime
+
+
+REPORT_VERSION = 1
+REPORT_PERIODS = ('day', 'week', 'month')
+# Fewer rows than this are summed in Python; NumPy only pays off on full rebuilds
+NUMPY_MIN_ROWS = 10000
+_numpy = None
+
+
+def parse_minutes(value):
+    """Return the whole minutes in a Duration_Minutes cell, or 0"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_break(activity, activity_type):
+    return activity_type == 'Break' or activity == 'Break'
+
+
+def week_key(day):
+    """Return the ISO week ('2026-W02') of a 'YYYY-MM-DD' day"""
+    year, week, _ = datetime.strptime(day, '%Y-%m-%d').isocalendar()
+    return f"{year}-W{week:02}"
+
+
+def valid_timestamp(timestamp):
+    return isinstance(timestamp, str) and len(timestamp) >= 10 and timestamp[4] == '-' and timestamp[7] == '-'
+
+
+def load_numpy():
+    """Import NumPy on first use; return None if it is not installed"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # Optional; only speeds up full rebuilds
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def aggregate_columns(rows, pending=None, seen=0):
+    """Total the minutes in `rows` per day and per (month, activity).
+
+    A row's Duration_Minutes is the time since the previous row, so it is
+    credited to the previous row's activity and to the day that activity
+    started on. `pending` is the (timestamp, activity, type) of the row
+    before `rows`, if any, and `seen` how many rows so far share its
+    timestamp. The rows are first turned into array-backed columns of small
+    integer codes, which NumPy (when installed, and only for NUMPY_MIN_ROWS
+    rows or more) sums in one pass each.
+
+    Returns (days, activities, pending, seen): days maps a day to [work,
+    break] minutes, activities maps (month, activity) to minutes, pending is
+    the last row, whose duration is not known yet, and seen is updated.
+    """
+    day_ids = {}
+    group_ids = {}
+    day_codes = array('l')
+    group_codes = array('l')
+    minutes = array('d')
+    breaks = array('d')
+
+    previous = pending
+    for row in rows:
+        timestamp = row.get('Timestamp')
+        if not valid_timestamp(timestamp):
+            continue
+        if previous is not None:
+            credited = parse_minutes(row.get('Duration_Minutes'))
+            if credited:
+                day = previous[0][:10]
+                day_code = day_ids.setdefault(day, len(day_ids))
+                group_code = group_ids.setdefault((day[:7], previous[1]), len(group_ids))
+                day_codes.append(day_code)
+                group_codes.append(group_code)
+                minutes.append(credited)
+                breaks.append(1.0 if is_break(previous[1], previous[2]) else 0.0)
+            seen = seen + 1 if timestamp == previous[0] else 1
+        else:
+            seen = 1
+        previous = (timestamp, row.get('Activity', ''), row.get('Type', ''))
+
+    numpy = load_numpy() if len(minutes) >= NUMPY_MIN_ROWS else None
+    if numpy is not None:
+        day_codes = numpy.frombuffer(day_codes, dtype=numpy.dtype('l'))
+        group_codes = numpy.frombuffer(group_codes, dtype=numpy.dtype('l'))
+        minutes = numpy.frombuffer(minutes)
+        breaks = numpy.frombuffer(breaks)
+        break_minutes = minutes * breaks
+        day_work = numpy.bincount(day_codes, minutes - break_minutes, len(day_ids))
+        day_break = numpy.bincount(day_codes, break_minutes, len(day_ids))
+        group_minutes = numpy.bincount(group_codes, minutes, len(group_ids))
+    else:
+        day_work = [0.0] * len(day_ids)
+        day_break = [0.0] * len(day_ids)
+        group_minutes = [0.0] * len(group_ids)
+        for day_code, group_code, credited, on_break in zip(day_codes, group_codes, minutes, breaks):
+            if on_break:
+                day_break[day_code] += credited
+            else:
+                day_work[day_code] += credited
+            group_minutes[group_code] += credited
+
+    days = {day: [int(day_work[code]), int(day_break[code])] for day, code in day_ids.items()}
+    activities = {group: int(group_minutes[code]) for group, code in group_ids.items()}
+    return days, activities, previous, seen
+
+
+class ReportAggregator:
+    """Rolling work and break totals per day, ISO week, month and activity.
+
+    The totals are materialized in a JSON file next to the storage together
+    with the newest row they include, so opening a report only reads rows
+    logged since the last save. While loaded, every logged entry updates the
+    totals in constant time through `record`. Nothing is read until the
+    first report is requested.
+    """
+
+    def __init__(self, storage, summary_file=None):
+        self.storage = storage
+        self.summary_file = summary_file or f"{storage.location}.reports.json"
+        self.loaded = False
+        self.dirty = False
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.periods = {period: {} for period in REPORT_PERIODS}  # key -> [work, break] minutes
+        self.activities = {}   # month -> {activity: minutes}
+        self.pending = None    # (timestamp, activity, type) of the newest row
+        self.seen_at_pending = 0  # Rows already counted that share the newest timestamp
+
+    def ensure_loaded(self):
+        """Load the stored totals and catch up with the log, once"""
+        with self._lock:
+            if self.loaded:
+                return
+            if not self._load_summary() or not self.catch_up():
+                self.rebuild()
+            self.loaded = True
+
+    def _load_summary(self):
+        """Read the summary file; return False if it is missing or unusable"""
+        try:
+            with open(self.summary_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') != REPORT_VERSION:
+                return False
+            self.periods = {period: state['periods'][period] for period in REPORT_PERIODS}
+            self.activities = state['activities']
+            self.pending = tuple(state['pending']) if state['pending'] else None
+            self.seen_at_pending = int(state['seen_at_pending'])
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            self._reset()
+            return False
+
+    def catch_up(self):
+        """Fold rows logged after the newest counted row into the totals.
+
+        Returns False if the storage no longer holds the rows the totals were
+        built from, in which case the caller should rebuild.
+        """
+        with self._lock:
+            if self.pending is None:
+                rows = self.storage.entries_between()
+            else:
+                rows = self.storage.entries_between(self.pending[0])
+                skipped = 0
+                while skipped < self.seen_at_pending:
+                    row = next(rows, None)
+                    if row is None or row.get('Timestamp') != self.pending[0]:
+                        return False
+                    skipped += 1
+            self._merge(rows)
+            return True
+
+    def rebuild(self):
+        """Recompute every total from the full log"""
+        with self._lock:
+            self._reset()
+            self._merge(self.storage.entries_between())
+            self.dirty = True
+
+    def _merge(self, rows):
+        before = (self.pending, self.seen_at_pending)
+        days, activities, self.pending, self.seen_at_pending = aggregate_columns(
+            rows, self.pending, self.seen_at_pending
+        )
+        for day, (work, on_break) in days.items():
+            self._add(day, work, on_break)
+        for (month, activity), minutes in activities.items():
+            month_totals = self.activities.setdefault(month, {})
+            month_totals[activity] = month_totals.get(activity, 0) + minutes
+        if (self.pending, self.seen_at_pending) != before:
+            self.dirty = True
+
+    def _add(self, day, work, on_break):
+        for period, key in (('day', day), ('week', week_key(day)), ('month', day[:7])):
+            totals = self.periods[period].setdefault(key, [0, 0])
+            totals[0] += work
+            totals[1] += on_break
+
+    def record(self, timestamp, activity, activity_type, duration):
+        """Count one newly logged row in constant time"""
+        with self._lock:
+            if not self.loaded:
+                return  # Picked up from storage when a report is first opened
+            credited = parse_minutes(duration)
+            if self.pending is not None and credited:
+                day = self.pending[0][:10]
+                if is_break(self.pending[1], self.pending[2]):
+                    self._add(day, 0, credited)
+                else:
+                    self._add(day, credited, 0)
+                month_totals = self.activities.setdefault(day[:7], {})
+                month_totals[self.pending[1]] = month_totals.get(self.pending[1], 0) + credited
+            if self.pending is not None and self.pending[0] == timestamp:
+                self.seen_at_pending += 1
+            else:
+                self.seen_at_pending = 1
+            self.pending = (timestamp, activity, activity_type)
+            self.dirty = True
+
+    def totals(self, period, start=None, end=None):
+        """Return (key, work minutes, break minutes) per period, oldest first.
+
+        `start` and `end` are inclusive keys in the period's own format:
+        '2026-01-05' for days, '2026-W02' for weeks, '2026-01' for months.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            return [
+                (key, work, on_break) for key, (work, on_break) in sorted(self.periods[period].items())
+                if (start is None or key >= start) and (end is None or key <= end)
+            ]
+
+    def activity_totals(self, start_month=None, end_month=None):
+        """Return (activity, minutes) over a range of months, largest first"""
+        self.ensure_loaded()
+        combined = {}
+        with self._lock:
+            for month, month_totals in self.activities.items():
+                if (start_month is None or month >= start_month) and (end_month is None or month <= end_month):
+                    for activity, minutes in month_totals.items():
+                        combined[activity] = combined.get(activity, 0) + minutes
+        return sorted(combined.items(), key=lambda item: item[1], reverse=True)
+
+    def save(self):
+        """Atomically write the totals if they changed"""
+        with self._lock:
+            if not self.loaded or not self.dirty:
+                return
+            state = {
+                'version': REPORT_VERSION,
+                'periods': self.periods,
+                'activities': self.activities,
+                'pending': list(self.pending) if self.pending else None,
+                'seen_at_pending': self.seen_at_pending,
+            }
+            temp_file = f"{self.summary_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_file, self.summary_file)
+            self.dirty = False
@@ -0,0 +1,166 @@
+"""The helper's own CPU time, wakeups and memory, sampled over time.
+
+Wakeups are counted as voluntary context switches of the whole process:
+every time any thread (scheduler, Tk, tray, IPC) blocks and is woken
+again counts once, including threads we do not control. Samples are taken
+by the scheduler, so measuring adds no wakeups of its own. View them with
+`python clockify_cli.py resources`.
+
+IDLE_BUDGET is what an idle helper hidden in the tray may use.
+tests/test_idle_budget.py verifies it by reading a child helper's usage
+with process_usage, from outside, so the check itself wakes nothing.
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+SAMPLE_INTERVAL_SECONDS = 10 * 60
+SAMPLE_HISTORY_LIMIT = 6 * 24 * 2  # Two days of samples
+IDLE_BUDGET = {
+    'wakeups_per_minute': 1.0,
+    'cpu_percent': 0.1,
+    'rss_mb': 80,
+}
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None if unknown"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def read_usage():
+    """One sample: clock times, CPU seconds, context switches and RSS"""
+    usage = resource.getrusage(resource.RUSAGE_SELF) if resource is not None else None
+    return {
+        'time': time.time(),
+        'monotonic': time.monotonic(),
+        'cpu_seconds': time.process_time(),
+        'wakeups': usage.ru_nvcsw if usage is not None else None,
+        'rss_mb': current_rss_mb(),
+    }
+
+
+def process_usage(pid):
+    """One sample of another process, like read_usage, read from /proc (Linux only).
+
+    Linux keeps no process-wide switch count that another process can read:
+    /proc/<pid>/status counts only the main thread. So wakeups are summed
+    over the threads alive at the time of the sample, and a thread that exits
+    between two samples takes its switches with it. `threads` holds their ids,
+    so callers can check that no thread exited in between.
+    """
+    wakeups = 0
+    threads = set()
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/status", 'r') as f:
+                for line in f:
+                    if line.startswith('voluntary_ctxt_switches:'):
+                        wakeups += int(line.split()[1])
+            threads.add(int(task))
+        except FileNotFoundError:
+            pass  # The thread exited
+    with open(f"/proc/{pid}/stat", 'r') as f:
+        fields = f.read().rsplit(')', 1)[1].split()  # The command name may hold spaces
+    with open(f"/proc/{pid}/statm", 'rb') as f:
+        resident_pages = int(f.read().split()[1])
+    return {
+        'time': time.time(),
+        'monotonic': time.monotonic(),
+        'cpu_seconds': (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK'),
+        'wakeups': wakeups,
+        'rss_mb': resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024),
+        'threads': threads,
+    }
+
+
+def usage_between(baseline, now):
+    """Minutes, CPU time and rates from one sample to a later one, and the RSS at the later one"""
+    minutes = max(now['monotonic'] - baseline['monotonic'], 1e-9) / 60
+    wakeups = None
+    if now['wakeups'] is not None and baseline['wakeups'] is not None:
+        wakeups = (now['wakeups'] - baseline['wakeups']) / minutes
+    cpu_seconds = now['cpu_seconds'] - baseline['cpu_seconds']
+    return {
+        'minutes': minutes,
+        'cpu_seconds': cpu_seconds,
+        'cpu_percent': cpu_seconds / (minutes * 60) * 100,
+        'wakeups_per_minute': wakeups,
+        'rss_mb': now['rss_mb'],
+    }
+
+
+class ResourceMonitor:
+    """A bounded history of usage samples and the rates between them"""
+
+    def __init__(self, limit=SAMPLE_HISTORY_LIMIT):
+        self._lock = threading.Lock()
+        self.started = read_usage()
+        self.samples = deque([self.started], maxlen=limit)
+
+    def sample(self):
+        usage = read_usage()
+        with self._lock:
+            self.samples.append(usage)
+        return usage
+
+    def report(self, window_seconds=None):
+        """Usage from `window_seconds` ago (or from startup) until now.
+
+        Rates compare a fresh reading with the oldest sample inside the
+        window, so a window shorter than SAMPLE_INTERVAL_SECONDS falls back
+        to the most recent sample.
+        """
+        now = read_usage()
+        with self._lock:
+            samples = list(self.samples)
+        baseline = samples[-1]
+        if window_seconds is None:
+            baseline = self.started
+        else:
+            for usage in samples:
+                if now['monotonic'] - usage['monotonic'] <= window_seconds:
+                    baseline = usage
+                    break
+        report = usage_between(baseline, now)
+        report.update({
+            'peak_rss_mb': max(filter(None, (peak_rss_mb(), now['rss_mb'])), default=None),
+            'samples': [
+                {'time': usage['time'], 'cpu_seconds': usage['cpu_seconds'],
+                 'wakeups': usage['wakeups'], 'rss_mb': usage['rss_mb']}
+                for usage in samples
+            ],
+        })
+        return report
+
+
+def check_budget(report, budget=IDLE_BUDGET):
+    """Return a description of every budget the report exceeds"""
+    problems = []
+    for key, limit in budget.items():
+        value = report.get(key)
+        if value is not None and value > limit:
+            problems.append(f"{key} is {value:.2f}, budget {limit}")
+    return problems
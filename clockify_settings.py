@@ -0,0 +1,210 @@
+"""Typed settings parsed once from clockify_helper_config.ini.
+
+The scheduler and UI read `settings.current`, a snapshot of plain,
+already-validated attributes, instead of re-parsing INI strings on every
+tick. The file is watched by mtime: `check()` reloads it when it changes
+on disk and tells subscribers, so edits made outside the Settings dialog
+take effect without a restart. Each reload builds a new snapshot and
+swaps it in whole, so readers on other threads never see half an update.
+
+Options only read at startup (storage backend, sync, collector, metrics)
+are still looked up on `settings.config`, the parsed ConfigParser.
+"""
+import configparser
+import os
+import threading
+from datetime import datetime
+
+
+CONFIG_FILE = "clockify_helper_config.ini"
+# How often the helper checks the file for edits, with its window shown and hidden
+FILE_WATCH_INTERVAL_SECONDS = 2
+HIDDEN_FILE_WATCH_INTERVAL_SECONDS = 5 * 60
+
+DEFAULTS = {
+    'reminder_interval_hours': '2',
+    'enable_system_tray': 'True',
+    'auto_start': 'False',
+    'work_hours_start': '09:00',
+    'work_hours_end': '17:00',
+    'enable_work_hours_only': 'True',
+    'snooze_duration_minutes': '15',
+    'log_flush_policy': 'interval',
+    'log_flush_interval_ms': '1000',
+    'log_fsync': 'False',
+    'storage_backend': 'csv',
+    'sqlite_path': 'time_tracking_log.db',
+    'log_dir': 'logs',
+    'compress_partitions': 'False',
+    'clockify_sync_enabled': 'False',
+    'clockify_api_url': 'https://api.clockify.me/api/v1',
+    'clockify_api_key': '',
+    'clockify_workspace_id': '',
+    'collector_url': '',
+    'collector_user': '',
+    'collector_token': '',
+    'max_history_names': '10000',
+    'metrics_enabled': 'False',
+    'metrics_port': '0',
+    'low_power_mode': 'False'
+}
+
+
+def _new_parser():
+    # No interpolation: strftime formats such as export_date_format = %Y-%m-%d
+    # must load and save verbatim
+    return configparser.ConfigParser(interpolation=None)
+
+
+def _positive_float(value):
+    number = float(value)
+    if number <= 0:
+        raise ValueError("must be positive")
+    return number
+
+
+def _positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise ValueError("must be positive")
+    return number
+
+
+def _boolean(value):
+    if value.strip().lower() not in configparser.ConfigParser.BOOLEAN_STATES:
+        raise ValueError("not a boolean")
+    return configparser.ConfigParser.BOOLEAN_STATES[value.strip().lower()]
+
+
+def _clock_time(value):
+    return datetime.strptime(value.strip(), '%H:%M').time()
+
+
+# Option name, parser, and the message shown when the Settings dialog rejects it
+FIELDS = (
+    ('reminder_interval_hours', _positive_float, "Invalid reminder interval value"),
+    ('snooze_duration_minutes', _positive_int, "Invalid snooze duration value"),
+    ('enable_work_hours_only', _boolean, "Invalid work hours setting"),
+    ('work_hours_start', _clock_time, "Invalid time format. Please use HH:MM"),
+    ('work_hours_end', _clock_time, "Invalid time format. Please use HH:MM"),
+    ('low_power_mode', _boolean, "Invalid low power mode setting"),
+)
+
+
+class SettingsSnapshot:
+    """Validated values from one version of the config file"""
+
+    __slots__ = tuple(name for name, _, _ in FIELDS) + ('reminder_interval_seconds',)
+
+    def __init__(self, values):
+        for name, value in values.items():
+            setattr(self, name, value)
+        self.reminder_interval_seconds = self.reminder_interval_hours * 3600
+
+
+def parse_settings(config, previous=None, strict=()):
+    """Build a snapshot from the SETTINGS section of `config`.
+
+    An invalid value for an option named in `strict` raises ValueError;
+    any other invalid value is reported and the previous (or default)
+    value is kept.
+    """
+    values = {}
+    for name, parse, message in FIELDS:
+        raw = config.get('SETTINGS', name, fallback=DEFAULTS[name])
+        try:
+            values[name] = parse(raw)
+        except ValueError:
+            if name in strict:
+                raise ValueError(message)
+            print(f"Ignoring invalid {name} = {raw!r} in the config")
+            values[name] = getattr(previous, name) if previous else parse(DEFAULTS[name])
+    return SettingsSnapshot(values)
+
+
+class Settings:
+    """The helper's configuration, reloaded when its file changes"""
+
+    def __init__(self, path=CONFIG_FILE, config=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._stamp = None
+        if config is None:
+            self.config = _new_parser()
+            self.current = None
+            self.load()
+        else:
+            self.config = config
+            self.current = parse_settings(config)
+
+    @classmethod
+    def from_dict(cls, options):
+        """Settings that are not backed by a file, e.g. for benchmarks"""
+        config = _new_parser()
+        config.read_dict({'SETTINGS': {**DEFAULTS, **options}})
+        return cls(path=None, config=config)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        """Read the config file, creating it with the defaults if missing"""
+        config = _new_parser()
+        config.read_dict({'SETTINGS': DEFAULTS})
+        if not os.path.exists(self.path):
+            self._write(config)
+        else:
+            config.read(self.path)
+        snapshot = parse_settings(config, self.current)
+        with self._lock:
+            self.config = config
+            self.current = snapshot
+            self._stamp = self._file_stamp()
+
+    def _write(self, config):
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, 'w') as f:
+            config.write(f)
+        os.replace(temp_file, self.path)
+
+    def subscribe(self, callback):
+        """Call `callback(snapshot)` after every reload"""
+        self._subscribers.append(callback)
+
+    def _notify(self):
+        for callback in list(self._subscribers):
+            try:
+                callback(self.current)
+            except Exception as e:
+                print(f"Error applying new settings: {e}")
+
+    def check(self):
+        """Reload and notify subscribers if the file changed; return True if it did"""
+        if self.path is None or self._file_stamp() == self._stamp:
+            return False
+        self.load()
+        self._notify()
+        return True
+
+    def save(self, options):
+        """Validate and write `options`, then apply them.
+
+        Raises ValueError with a message for the user if a value is invalid.
+        """
+        config = _new_parser()
+        config.read_dict(self.config)
+        for name, value in options.items():
+            config.set('SETTINGS', name, str(value))
+        snapshot = parse_settings(config, self.current, strict=options)
+        if self.path is not None:
+            self._write(config)
+        with self._lock:
+            self.config = config
+            self.current = snapshot
+            self._stamp = self._file_stamp() if self.path is not None else None
+        self._notify()
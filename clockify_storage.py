@@ -0,0 +1,1573 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+
+LOG_FILE = "time_tracking_log.csv"
+LOG_HEADER = ['Timestamp', 'Activity', 'Type', 'Duration_Minutes']
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+TAIL_BLOCK_SIZE = 8192
+FINGERPRINT_SIZE = 256
+FRECENCY_HALF_LIFE_DAYS = 14
+# Version 2: activity indexes are no longer capped, so capped version 1 files are rebuilt
+INDEX_VERSION = 2
+FLUSH_POLICIES = ('entry', 'interval', 'shutdown')
+STORAGE_BACKENDS = ('csv', 'sqlite', 'partitioned')
+# Monthly partition files: 2026-10.csv, or 2026-10.csv.gz once compressed
+PARTITION_PATTERN = re.compile(r'^(\d{4}-\d{2})\.csv(\.gz)?$')
+MIGRATION_CHUNK_SIZE = 5000
+# Every this many rows, the time index records a row's timestamp and byte offset
+SPARSE_INDEX_INTERVAL = 1000
+
+
+def parse_timestamp(value):
+    """Parse a log timestamp into epoch seconds, or None if it is malformed"""
+    try:
+        # Slicing the fixed-width format is several times faster than strptime
+        if len(value) == 19 and value[4] == value[7] == '-' and value[10] == ' ' and value[13] == value[16] == ':':
+            return datetime(int(value[:4]), int(value[5:7]), int(value[8:10]),
+                            int(value[11:13]), int(value[14:16]), int(value[17:19])).timestamp()
+        return datetime.strptime(value, TIMESTAMP_FORMAT).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def frecency_score(count, last_used):
+    """Rank an activity by how often and how recently it was used.
+
+    The score is an exponentially decaying count kept in log space, so the
+    ordering between two activities never changes as the clock moves on and
+    scores can be cached.
+    """
+    decay = math.log(2) / (FRECENCY_HALF_LIFE_DAYS * 86400)
+    return math.log(max(count, 1)) + (last_used or 0) * decay
+
+
+def log_fingerprint(path, offset):
+    """Hash the head of the log and the bytes just before `offset`.
+
+    Sidecar files store this next to the offset they cover so that a log
+    which was truncated or edited in place is detected on the next load.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(min(FINGERPRINT_SIZE, offset)))
+        f.seek(max(0, offset - FINGERPRINT_SIZE))
+        digest.update(f.read(min(FINGERPRINT_SIZE, offset)))
+    return digest.hexdigest()
+
+
+def sidecar_matches_log(log_file, state):
+    """Return True if the log still holds the bytes a sidecar file was built from"""
+    offset = int(state['offset'])
+    stat = os.stat(log_file)
+    if stat.st_size < offset:
+        return False  # Log was truncated
+    if stat.st_size == offset and stat.st_mtime != state.get('log_mtime'):
+        return False  # Log was rewritten without growing
+    # Otherwise the log was edited before the covered offset
+    return log_fingerprint(log_file, offset) == state['fingerprint']
+
+
+def iter_lines(path, offset=0):
+    """Yield (end_offset, text) for each complete line from `offset` onwards.
+
+    A trailing line without a line break is still being written, so it is
+    left for the next reader.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            yield offset, line.decode('utf-8', errors='replace')
+
+
+def read_header(path):
+    """Return the column names from the first line of a CSV log"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        header = next(csv.reader([f.readline()]), None)
+    return header or list(LOG_HEADER)
+
+
+def tail_rows(path, count, block_size=TAIL_BLOCK_SIZE):
+    """Return the last `count` rows of a CSV log as dicts, oldest first"""
+    if count <= 0 or not os.path.exists(path):
+        return []
+    header = read_header(path)
+    return [dict(zip(header, row)) for row in tail_records(path, count, block_size)]
+
+
+def tail_records(path, count, block_size=TAIL_BLOCK_SIZE):
+    """Return the last `count` rows of a CSV log as lists, oldest first.
+
+    The file is read backwards from EOF in fixed-size blocks until enough
+    line breaks have been seen, so the cost depends on `count` and not on
+    the size of the log. Activities are entered on a single line, so every
+    line break outside the header marks a row boundary.
+    """
+    if count <= 0 or not os.path.exists(path):
+        return []
+
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        # One extra line break is needed to know the oldest wanted row is complete
+        while position > 0 and data.count(b'\n') <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+
+    lines = data.splitlines()
+    if position == 0:
+        lines = lines[1:]  # Drop the header
+    elif lines:
+        lines = lines[1:]  # First line is only partially read
+    lines = [line for line in lines if line.strip()][-count:]
+
+    text = b'\n'.join(lines).decode('utf-8', errors='replace')
+    return list(csv.reader(io.StringIO(text)))
+
+
+class ActivityIndex:
+    """Sidecar cache of distinct activity names derived from the CSV log.
+
+    The index file stores each activity's use count and last-used time,
+    plus the byte offset of the log it covers and a fingerprint of the
+    bytes around that offset. Loading only parses rows appended after the
+    offset; a truncated or edited log triggers a full rebuild. Every name
+    is kept, however many there are: `max_history_names` only caps the
+    in-memory autocomplete index, so counts survive raising the cap.
+    """
+
+    def __init__(self, log_file, index_file=None):
+        self.log_file = log_file
+        self.index_file = index_file or f"{log_file}.index.json"
+        self.activities = {}  # name -> [use count, last used (epoch seconds)]
+        self.offset = 0
+        self.dirty = False
+
+    def load(self):
+        """Load the index from disk and catch up with the log"""
+        if not self._load_sidecar():
+            self.activities = {}
+            self.offset = 0
+            self.dirty = True
+        self.catch_up()
+
+    def _load_sidecar(self):
+        """Read the index file; return False if it is missing or stale"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') != INDEX_VERSION:
+                return False
+
+            if not sidecar_matches_log(self.log_file, state):
+                return False
+
+            self.activities = {sys.intern(name): list(stats) for name, stats in state['activities'].items()}
+            self.offset = int(state['offset'])
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def catch_up(self):
+        """Fold rows appended to the log since the covered offset into the index"""
+        if not os.path.exists(self.log_file):
+            return
+
+        start = self.offset
+        lines = iter_lines(self.log_file, start)
+
+        def texts():
+            for end, text in lines:
+                self.offset = end
+                yield text
+
+        rows = csv.reader(texts())
+        if start == 0:
+            next(rows, None)  # Skip the header
+        for row in rows:
+            if len(row) >= 2:
+                self.record(row[1], parse_timestamp(row[0]))
+
+        if self.offset != start:
+            self.dirty = True
+
+    def record(self, activity, last_used):
+        """Count one use of an activity"""
+        if not activity or activity == 'Break':
+            return
+        stats = self.activities.get(activity)
+        if stats is None:
+            self.activities[sys.intern(activity)] = [1, last_used or 0]
+        else:
+            stats[0] += 1
+            stats[1] = max(stats[1], last_used or 0)
+        self.dirty = True
+
+    def names(self):
+        """Return activity names, best frecency first"""
+        return sorted(
+            self.activities,
+            key=lambda name: frecency_score(*self.activities[name]),
+            reverse=True
+        )
+
+    def save(self):
+        """Atomically write the index file if anything changed"""
+        if not self.dirty or not os.path.exists(self.log_file):
+            return
+        state = {
+            'version': INDEX_VERSION,
+            'offset': self.offset,
+            'log_mtime': os.stat(self.log_file).st_mtime,
+            'fingerprint': log_fingerprint(self.log_file, self.offset),
+            'activities': self.activities,
+        }
+        temp_file = f"{self.index_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.index_file)
+        self.dirty = False
+
+
+class TimeIndex:
+    """Sparse sidecar map from log timestamps to byte offsets.
+
+    Rows are appended in time order, so remembering the timestamp and
+    offset of every `interval`-th row is enough to seek close to any point
+    in time: a range query bisects this small list, seeks, and skips at
+    most `interval` rows before reaching the range. Like ActivityIndex, the
+    file records the log offset it covers and is extended from there, and
+    a truncated or edited log triggers a rebuild.
+    """
+
+    def __init__(self, log_file, index_file=None, interval=SPARSE_INDEX_INTERVAL):
+        self.log_file = log_file
+        self.index_file = index_file or f"{log_file}.timeindex.json"
+        self.interval = interval
+        self.timestamps = []  # Timestamp of every `interval`-th row
+        self.offsets = []     # Byte offset where each of those rows starts
+        self.rows = 0
+        self.offset = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the index from disk and catch up with the log"""
+        if not self._load_sidecar():
+            self.timestamps = []
+            self.offsets = []
+            self.rows = 0
+            self.offset = 0
+            self.dirty = True
+        self.catch_up()
+
+    def _load_sidecar(self):
+        """Read the index file; return False if it is missing or stale"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') != INDEX_VERSION or state.get('interval') != self.interval:
+                return False
+            if not sidecar_matches_log(self.log_file, state):
+                return False
+
+            self.timestamps = [timestamp for timestamp, _ in state['entries']]
+            self.offsets = [int(offset) for _, offset in state['entries']]
+            self.rows = int(state['rows'])
+            self.offset = int(state['offset'])
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def catch_up(self):
+        """Index rows appended to the log since the covered offset"""
+        if not os.path.exists(self.log_file):
+            return
+        with self._lock:
+            start = self.offset
+            with open(self.log_file, 'rb') as f:
+                f.seek(start)
+                position = start
+                if position == 0:
+                    header = f.readline()
+                    if not header.endswith(b'\n'):
+                        return
+                    position = len(header)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # Still being written
+                    if line.strip():
+                        if self.rows % self.interval == 0:
+                            self.timestamps.append(line.split(b',', 1)[0].decode('utf-8', errors='replace'))
+                            self.offsets.append(position)
+                        self.rows += 1
+                    position += len(line)
+            if position != start:
+                self.offset = position
+                self.dirty = True
+
+    def offset_before(self, timestamp):
+        """Return the offset of an indexed row older than `timestamp`, or None.
+
+        Every row at or after `timestamp` starts at or after the returned
+        offset. None means the range may begin with the first row.
+        """
+        with self._lock:
+            position = bisect_left(self.timestamps, timestamp)
+            return self.offsets[position - 1] if position else None
+
+    def offset_of_row(self, position):
+        """Return (offset, rows to skip from there) for the `position`-th row.
+
+        The offset is None if the log has no such row.
+        """
+        with self._lock:
+            if position < 0 or position >= self.rows:
+                return None, 0
+            block = position // self.interval
+            return self.offsets[block], position - block * self.interval
+
+    def row_before(self, timestamp):
+        """Return (position, offset) of an indexed row older than `timestamp`.
+
+        Like offset_before, but also gives that row's position; the offset
+        is None (and the position 0) if the range may begin with the first row.
+        """
+        with self._lock:
+            block = bisect_left(self.timestamps, timestamp)
+            if not block:
+                return 0, None
+            return (block - 1) * self.interval, self.offsets[block - 1]
+
+    def save(self):
+        """Atomically write the index file if anything changed"""
+        with self._lock:
+            if not self.dirty or not os.path.exists(self.log_file):
+                return
+            state = {
+                'version': INDEX_VERSION,
+                'interval': self.interval,
+                'offset': self.offset,
+                'rows': self.rows,
+                'log_mtime': os.stat(self.log_file).st_mtime,
+                'fingerprint': log_fingerprint(self.log_file, self.offset),
+                'entries': list(zip(self.timestamps, self.offsets)),
+            }
+            temp_file = f"{self.index_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_file, self.index_file)
+            self.dirty = False
+
+
+class LogWriter:
+    """Append rows to the CSV log from a dedicated writer thread.
+
+    Callers hand rows to `write` and return immediately. The writer keeps
+    the log open, writes everything queued since its last wake-up as one
+    batch, and commits (flush, plus fsync if enabled) according to
+    `flush_policy`:
+
+    - 'entry': commit after every batch
+    - 'interval': commit at most every `flush_interval_ms` milliseconds
+    - 'shutdown': commit only on `flush` or `close`
+
+    When commits are deferred, each batch is first appended to a journal
+    next to the log. The journal is cleared after every commit, and any
+    rows left in it by a crash are replayed into the log by `start`.
+    Write errors are passed to `on_error` from the writer thread.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, log_file, flush_policy='interval', flush_interval_ms=1000, fsync=False, on_error=None):
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown log flush policy: {flush_policy}")
+        self.log_file = log_file
+        self.journal_file = f"{log_file}.journal"
+        self.flush_policy = flush_policy
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.fsync = fsync
+        self.on_error = on_error
+        self.use_journal = flush_policy != 'entry'
+        self._queue = queue.Queue()
+        self._thread = None
+        self._log = None
+        self._journal = None
+        self._unwritten = []  # Rows that failed to reach the log and will be retried
+        self._uncommitted = False
+        self._failing = False
+
+    def start(self):
+        """Replay any journal left by a crash and start the writer thread"""
+        self.replay_journal()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, row):
+        """Queue one row for appending to the log"""
+        self._queue.put(list(row))
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((self._FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Commit outstanding rows and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put((self._STOP, None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    def replay_journal(self):
+        """Append journaled rows that never made it into the log"""
+        if not os.path.exists(self.journal_file):
+            return 0
+
+        with open(self.journal_file, 'r', encoding='utf-8', newline='') as f:
+            journaled = [row for row in csv.reader(f) if row]
+        if not journaled:
+            os.remove(self.journal_file)
+            return 0
+
+        self._trim_partial_row()
+        # Rows are written in order, so the log ends with some prefix of the journal
+        existing = tail_records(self.log_file, len(journaled))
+        overlap = 0
+        for size in range(min(len(existing), len(journaled)), 0, -1):
+            if existing[-size:] == journaled[:size]:
+                overlap = size
+                break
+
+        missing = journaled[overlap:]
+        if missing:
+            with open(self.log_file, 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(missing)
+                f.flush()
+                os.fsync(f.fileno())
+        os.remove(self.journal_file)
+        return len(missing)
+
+    def _trim_partial_row(self):
+        """Drop a half-written last line left behind by a crash"""
+        with open(self.log_file, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            position = size
+            while position > 0:
+                read_size = min(TAIL_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                newline = f.read(read_size).rfind(b'\n')
+                if newline != -1:
+                    f.truncate(position + newline + 1)
+                    return
+
+    def _run(self):
+        last_commit = time.monotonic()
+        stopping = False
+
+        while not stopping:
+            timeout = None
+            if self._uncommitted and self.flush_policy == 'interval':
+                timeout = max(0, last_commit + self.flush_interval - time.monotonic())
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+            # Group commit: take everything that queued up while we were busy
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = [item for item in items if isinstance(item, list)]
+            flush_events = [item[1] for item in items if isinstance(item, tuple) and item[0] is self._FLUSH]
+            stopping = any(isinstance(item, tuple) and item[0] is self._STOP for item in items)
+
+            self._append(rows)
+
+            due = (
+                self.flush_policy == 'entry'
+                or flush_events
+                or stopping
+                or (self.flush_policy == 'interval'
+                    and time.monotonic() - last_commit >= self.flush_interval)
+            )
+            if due and self._uncommitted:
+                self._commit()
+                last_commit = time.monotonic()
+            for event in flush_events:
+                event.set()
+
+        self._close_files()
+        if self.use_journal and not self._unwritten and not self._uncommitted:
+            try:
+                os.remove(self.journal_file)
+            except OSError:
+                pass
+
+    def _append(self, rows):
+        """Journal and write a batch of rows without committing them"""
+        rows = self._unwritten + rows
+        if not rows:
+            return
+        try:
+            if self.use_journal:
+                if self._journal is None:
+                    self._journal = open(self.journal_file, 'a', newline='', encoding='utf-8')
+                csv.writer(self._journal).writerows(rows)
+                self._journal.flush()
+                if self.fsync:
+                    os.fsync(self._journal.fileno())
+            if self._log is None:
+                self._log = open(self.log_file, 'a', newline='', encoding='utf-8')
+            csv.writer(self._log).writerows(rows)
+            self._unwritten = []
+            self._uncommitted = True
+            self._failing = False
+        except Exception as e:
+            self._unwritten = rows
+            self._report_error(e)
+
+    def _commit(self):
+        """Make written rows durable and clear the journal"""
+        if self._log is None:
+            return
+        try:
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            if self._journal is not None:
+                self._journal.truncate(0)
+                self._journal.seek(0)
+            self._uncommitted = False
+        except Exception as e:
+            self._report_error(e)
+
+    def _report_error(self, error):
+        # Drop the handle so the next batch reopens the file
+        self._close_files()
+        if not self._failing and self.on_error:
+            self.on_error(error)
+        self._failing = True
+
+    def _close_files(self):
+        for handle in (self._log, self._journal):
+            if handle is not None:
+                try:
+                    handle.close()
+                except Exception:
+                    pass
+        self._log = None
+        self._journal = None
+
+
+class CsvStorage:
+    """Storage backend that keeps entries in the CSV log.
+
+    Rows are appended by a LogWriter, activity names come from the sidecar
+    ActivityIndex, date ranges are located with the sparse TimeIndex and
+    recent rows come from a tail read, so the common paths do not scan the
+    whole file.
+    """
+
+    def __init__(self, log_file, flush_policy='interval', flush_interval_ms=1000, fsync=False, on_error=None):
+        self.log_file = log_file
+        self.location = os.path.abspath(log_file)
+        self.writer = LogWriter(log_file, flush_policy, flush_interval_ms, fsync, on_error)
+        self.activity_index = ActivityIndex(log_file)
+        self.time_index = TimeIndex(log_file)
+
+    def open(self):
+        """Create the log if needed and start the writer"""
+        if not os.path.exists(self.log_file):
+            with open(self.log_file, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(LOG_HEADER)
+        self.writer.start()
+        self.activity_index.load()
+        self.activity_index.save()
+        self.time_index.load()
+        self.time_index.save()
+
+    def append(self, row):
+        """Queue a [timestamp, activity, type, duration] row for writing"""
+        self.writer.write(row)
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed"""
+        return self.writer.flush(timeout)
+
+    def last_entries(self, count):
+        """Return the newest `count` entries as dicts, oldest first"""
+        return tail_rows(self.log_file, count)
+
+    def activity_names(self):
+        """Return distinct work activity names, best frecency first"""
+        return self.activity_index.names()
+
+    def activity_stats(self):
+        """Return (name, use count, last used epoch seconds) for each work activity"""
+        return [(name, count, last_used) for name, (count, last_used) in self.activity_index.activities.items()]
+
+    def entries_between(self, start=None, end=None):
+        """Yield entries with start <= Timestamp < end; either bound may be None.
+
+        The sparse time index gives an offset close before `start`, so only
+        the requested range (plus at most one index interval) is parsed,
+        however large the log is.
+        """
+        self.flush()
+        if not os.path.exists(self.log_file):
+            return
+        header = read_header(self.log_file)
+        offset = None
+        if start is not None:
+            self.time_index.catch_up()
+            offset = self.time_index.offset_before(start)
+
+        with open(self.log_file, 'r', newline='', encoding='utf-8') as f:
+            if offset is None:
+                f.readline()  # Skip the header
+            else:
+                f.seek(offset)
+            for record in csv.reader(f):
+                if not record:
+                    continue
+                row = dict(zip(header, record))
+                timestamp = row['Timestamp']
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    break
+                yield row
+
+    def entry_count(self):
+        """Return the number of entries in the log"""
+        self.flush()
+        if not os.path.exists(self.log_file):
+            return 0
+        self.time_index.catch_up()
+        return self.time_index.rows
+
+    def entries_at(self, position, count):
+        """Return up to `count` entries starting at the `position`-th, oldest first.
+
+        The time index holds the offset of every `interval`-th row, so at
+        most that many lines are skipped before the page is read.
+        """
+        self.flush()
+        if count <= 0 or not os.path.exists(self.log_file):
+            return []
+        self.time_index.catch_up()
+        offset, skip = self.time_index.offset_of_row(position)
+        if offset is None:
+            return []
+        header = read_header(self.log_file)
+        lines = []
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                if not line.strip():
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                lines.append(line.decode('utf-8', errors='replace'))
+                if len(lines) >= count:
+                    break
+        return [dict(zip(header, record)) for record in csv.reader(lines)]
+
+    def position_of(self, timestamp):
+        """Return the position of the first entry at or after `timestamp`"""
+        self.flush()
+        if not os.path.exists(self.log_file):
+            return 0
+        self.time_index.catch_up()
+        position, offset = self.time_index.row_before(timestamp)
+        with open(self.log_file, 'rb') as f:
+            if offset is None:
+                f.readline()  # Skip the header
+            else:
+                f.seek(offset)
+            encoded = timestamp.encode('utf-8')
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                if not line.strip():
+                    continue
+                if line.split(b',', 1)[0] >= encoded:
+                    break
+                position += 1
+        return position
+
+    def export_csv(self, path):
+        """Write every entry to `path` in the log's CSV format"""
+        write_csv(path, self.entries_between())
+
+    def replace_entries(self, rows):
+        """Rewrite the log with `rows` (entry dicts, oldest first) in one pass.
+
+        `rows` may be read lazily from this storage: the new log is written
+        next to the old one and swapped in at the end. Both sidecar indexes
+        are rebuilt from the rows as they are written. Returns the number
+        of rows written.
+        """
+        self.writer.close()
+        temp_file = f"{self.log_file}.rewrite.tmp"
+        activity_index = ActivityIndex(self.log_file)
+        time_index = TimeIndex(self.log_file)
+        line = io.StringIO()
+        line_writer = csv.writer(line)
+
+        def encode(record):
+            line.seek(0)
+            line.truncate()
+            line_writer.writerow(record)
+            return line.getvalue().encode('utf-8')
+
+        try:
+            with open(temp_file, 'wb') as f:
+                position = f.write(encode(LOG_HEADER))
+                pending = []
+                for row in rows:
+                    record = [row.get(column, '') for column in LOG_HEADER]
+                    data = encode(record)
+                    if time_index.rows % time_index.interval == 0:
+                        time_index.timestamps.append(record[0])
+                        time_index.offsets.append(position)
+                    time_index.rows += 1
+                    activity_index.record(record[1], parse_timestamp(record[0]))
+                    pending.append(data)
+                    position += len(data)
+                    if len(pending) >= MIGRATION_CHUNK_SIZE:
+                        f.write(b''.join(pending))
+                        pending = []
+                f.write(b''.join(pending))
+            os.replace(temp_file, self.log_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            self.writer.start()
+
+        activity_index.offset = time_index.offset = position
+        activity_index.dirty = time_index.dirty = True
+        activity_index.save()
+        time_index.save()
+        self.activity_index = activity_index
+        self.time_index = time_index
+        return time_index.rows
+
+    def close(self):
+        """Commit pending rows and bring the sidecar indexes up to date"""
+        self.writer.close()
+        self.activity_index.catch_up()
+        self.activity_index.save()
+        self.time_index.catch_up()
+        self.time_index.save()
+
+
+class SqliteStorage:
+    """Storage backend that keeps entries in an SQLite database in WAL mode.
+
+    Writes go through a single writer thread that commits everything queued
+    since its last wake-up in one transaction. Reads use one connection per
+    thread, which WAL mode allows to run alongside the writer. The queries
+    below are constants so sqlite3's per-connection statement cache reuses
+    their compiled form.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entries ("
+        " id INTEGER PRIMARY KEY,"
+        " timestamp TEXT NOT NULL,"
+        " activity TEXT NOT NULL,"
+        " type TEXT NOT NULL,"
+        " duration TEXT NOT NULL DEFAULT '')",
+        "CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp)",
+        "CREATE INDEX IF NOT EXISTS entries_activity ON entries (activity, timestamp)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    )
+    INSERT_ENTRY = "INSERT INTO entries (timestamp, activity, type, duration) VALUES (?, ?, ?, ?)"
+    DELETE_ENTRIES = "DELETE FROM entries"
+    SELECT_LAST = (
+        "SELECT timestamp, activity, type, duration FROM entries"
+        " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    )
+    SELECT_ACTIVITY_STATS = (
+        "SELECT activity, COUNT(*), MAX(timestamp) FROM entries"
+        " WHERE activity != '' AND activity != 'Break' GROUP BY activity"
+    )
+    SELECT_RANGE = (
+        "SELECT timestamp, activity, type, duration FROM entries"
+        " WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp, id"
+    )
+    SELECT_COUNT = "SELECT COUNT(*) FROM entries"
+    SELECT_PAGE = (
+        "SELECT timestamp, activity, type, duration FROM entries"
+        " ORDER BY timestamp, id LIMIT ? OFFSET ?"
+    )
+    SELECT_POSITION = "SELECT COUNT(*) FROM entries WHERE timestamp < ?"
+    SELECT_META = "SELECT value FROM meta WHERE key = ?"
+    UPSERT_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+    # Bounds that sort before and after every real timestamp
+    MIN_TIMESTAMP = ""
+    MAX_TIMESTAMP = "~"
+
+    def __init__(self, db_file, legacy_csv=None, on_error=None):
+        self.db_file = db_file
+        self.legacy_csv = legacy_csv
+        self.location = os.path.abspath(db_file)
+        self.on_error = on_error
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def _connect(self):
+        import sqlite3  # Only needed with this backend, so kept off the startup path
+        connection = sqlite3.connect(self.db_file, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self):
+        """Return this thread's read connection"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def open(self):
+        """Create the schema, migrate the CSV log once and start the writer"""
+        connection = self._connect()
+        try:
+            with connection:
+                for statement in self.SCHEMA:
+                    connection.execute(statement)
+            if self.legacy_csv and os.path.exists(self.legacy_csv):
+                migrate_csv_to_sqlite(self.legacy_csv, connection)
+        finally:
+            connection.close()
+        self._thread = threading.Thread(target=self._run_writer, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, row):
+        """Queue a [timestamp, activity, type, duration] row for writing"""
+        self._queue.put(tuple(row))
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run_writer(self):
+        connection = self._connect()
+        stopping = False
+        failing = False
+        while not stopping:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [item for item in items if isinstance(item, tuple)]
+            stopping = any(item is None for item in items)
+            if rows:
+                try:
+                    with connection:
+                        connection.executemany(self.INSERT_ENTRY, rows)
+                    failing = False
+                except Exception as e:
+                    if not failing and self.on_error:
+                        self.on_error(e)
+                    failing = True
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+        connection.close()
+
+    def last_entries(self, count):
+        """Return the newest `count` entries as dicts, oldest first"""
+        rows = self._reader().execute(self.SELECT_LAST, (count,)).fetchall()
+        return [dict(zip(LOG_HEADER, row)) for row in reversed(rows)]
+
+    def activity_names(self):
+        """Return distinct work activity names, best frecency first"""
+        scored = [(frecency_score(count, last_used), name) for name, count, last_used in self.activity_stats()]
+        scored.sort(reverse=True)
+        return [name for _, name in scored]
+
+    def activity_stats(self):
+        """Return (name, use count, last used epoch seconds) for each work activity"""
+        stats = self._reader().execute(self.SELECT_ACTIVITY_STATS).fetchall()
+        return [(name, count, parse_timestamp(last) or 0) for name, count, last in stats]
+
+    def entries_between(self, start=None, end=None):
+        """Yield entries with start <= Timestamp < end; either bound may be None"""
+        self.flush()
+        cursor = self._reader().execute(self.SELECT_RANGE, (
+            self.MIN_TIMESTAMP if start is None else start,
+            self.MAX_TIMESTAMP if end is None else end,
+        ))
+        for row in cursor:
+            yield dict(zip(LOG_HEADER, row))
+
+    def entry_count(self):
+        """Return the number of entries"""
+        self.flush()
+        return self._reader().execute(self.SELECT_COUNT).fetchone()[0]
+
+    def entries_at(self, position, count):
+        """Return up to `count` entries starting at the `position`-th, oldest first"""
+        self.flush()
+        if count <= 0 or position < 0:
+            return []
+        rows = self._reader().execute(self.SELECT_PAGE, (count, position)).fetchall()
+        return [dict(zip(LOG_HEADER, row)) for row in rows]
+
+    def position_of(self, timestamp):
+        """Return the position of the first entry at or after `timestamp`"""
+        self.flush()
+        return self._reader().execute(self.SELECT_POSITION, (timestamp,)).fetchone()[0]
+
+    def export_csv(self, path):
+        """Write every entry to `path` in the log's CSV format"""
+        self.flush()
+        write_csv(path, self.entries_between())
+
+    def replace_entries(self, rows):
+        """Replace every entry with `rows` (entry dicts, oldest first) in one transaction.
+
+        `rows` may be read lazily from this storage; readers keep their WAL
+        snapshot until the transaction commits. Returns the number of rows written.
+        """
+        self.flush()
+        connection = self._connect()
+        written = 0
+        try:
+            with connection:
+                connection.execute(self.DELETE_ENTRIES)
+                chunk = []
+                for row in rows:
+                    chunk.append(tuple(row.get(column, '') for column in LOG_HEADER))
+                    if len(chunk) >= MIGRATION_CHUNK_SIZE:
+                        connection.executemany(self.INSERT_ENTRY, chunk)
+                        written += len(chunk)
+                        chunk = []
+                connection.executemany(self.INSERT_ENTRY, chunk)
+                written += len(chunk)
+        finally:
+            connection.close()
+        return written
+
+    def close(self):
+        """Commit pending rows and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class PartitionedStorage:
+    """Storage backend that keeps one CSV file per month in `log_dir`.
+
+    Rows go to the partition of their month ('logs/2026-10.csv'), written
+    by a LogWriter exactly like the single-file log. With `compress`, every
+    partition except the newest is gzipped once it is closed. Reads present
+    all partitions as one chronological stream but only open the months a
+    query covers, and a damaged partition is skipped instead of ending the
+    stream. Activity counts of closed partitions are kept in a summary file
+    so startup only indexes the open partition.
+    """
+
+    SUMMARY_FILE = "activity_index.json"
+    MIGRATION_MARKER = "migrated_from.txt"
+
+    def __init__(self, log_dir, legacy_csv=None, compress=False, flush_policy='interval',
+                 flush_interval_ms=1000, fsync=False, on_error=None):
+        self.log_dir = log_dir
+        self.legacy_csv = legacy_csv
+        self.location = os.path.abspath(log_dir)
+        self.compress = compress
+        self.flush_policy = flush_policy
+        self.flush_interval_ms = flush_interval_ms
+        self.fsync = fsync
+        self.on_error = on_error
+        self.month = None
+        self.writer = None
+        self.activity_index = None   # ActivityIndex of the open partition
+        self.closed_activities = {}  # name -> [use count, last used] over closed partitions
+        self._row_counts = {}  # partition path -> (size, mtime, rows)
+        self._lock = threading.RLock()
+
+    def partition_path(self, month):
+        return os.path.join(self.log_dir, f"{month}.csv")
+
+    def partitions(self):
+        """Return (month, path) for every partition, oldest first"""
+        found = {}
+        for name in os.listdir(self.log_dir):
+            match = PARTITION_PATTERN.match(name)
+            # A plain file next to its .gz means compression was interrupted
+            if match and (match.group(1) not in found or not match.group(2)):
+                found[match.group(1)] = os.path.join(self.log_dir, name)
+        return sorted(found.items())
+
+    def open(self):
+        """Migrate the single-file log once, tidy closed partitions and start the writer"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        marker = os.path.join(self.log_dir, self.MIGRATION_MARKER)
+        if self.legacy_csv and os.path.exists(self.legacy_csv) and not os.path.exists(marker):
+            migrate_csv_to_partitions(self.legacy_csv, self.log_dir)
+            with open(marker, 'w', encoding='utf-8') as f:
+                f.write(os.path.abspath(self.legacy_csv))
+
+        partitions = self.partitions()
+        for _, path in partitions:
+            if not path.endswith('.gz') and os.path.exists(f"{path}.journal"):
+                LogWriter(path).replay_journal()
+        if self.compress:
+            for _, path in partitions[:-1]:
+                if not path.endswith('.gz'):
+                    compress_partition(path)
+
+        month = partitions[-1][0] if partitions else datetime.now().strftime('%Y-%m')
+        self.closed_activities = self._load_closed_summary(month)
+        self._open_partition(month)
+
+    def _open_partition(self, month):
+        path = self.partition_path(month)
+        if not os.path.exists(path):
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(LOG_HEADER)
+        self.writer = LogWriter(path, self.flush_policy, self.flush_interval_ms, self.fsync, self.on_error)
+        self.writer.start()
+        self.activity_index = ActivityIndex(path)
+        self.activity_index.load()
+        self.activity_index.save()
+        self.month = month
+
+    def _close_partition(self):
+        """Commit the open partition, fold it into the summary and compress it"""
+        path = self.partition_path(self.month)
+        self.writer.close()
+        self.activity_index.catch_up()
+        activities = self.activity_index.activities
+        if os.path.exists(self.activity_index.index_file):
+            os.remove(self.activity_index.index_file)
+        if self.compress:
+            path = compress_partition(path)
+        self._add_to_summary(os.path.basename(path), activities)
+        for name, (count, last_used) in activities.items():
+            merge_activity(self.closed_activities, name, count, last_used)
+        self.writer = None
+        self.activity_index = None
+
+    def _summary_path(self):
+        return os.path.join(self.log_dir, self.SUMMARY_FILE)
+
+    def _read_summary(self):
+        try:
+            with open(self._summary_path(), 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+            if summary.get('version') == INDEX_VERSION:
+                return summary
+        except (OSError, ValueError):
+            pass
+        return {'version': INDEX_VERSION, 'partitions': {}}
+
+    def _write_summary(self, summary):
+        temp_file = f"{self._summary_path()}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f)
+        os.replace(temp_file, self._summary_path())
+
+    def _add_to_summary(self, name, activities):
+        summary = self._read_summary()
+        path = os.path.join(self.log_dir, name)
+        stat = os.stat(path)
+        summary['partitions'][name] = {
+            'signature': [stat.st_size, stat.st_mtime],
+            'activities': activities,
+        }
+        self._write_summary(summary)
+
+    def _load_closed_summary(self, open_month):
+        """Return activity counts over all partitions before `open_month`.
+
+        Partitions whose size or mtime differ from the summary (or that are
+        missing from it) are re-read; the rest come from the summary file.
+        """
+        summary = self._read_summary()
+        stored = summary['partitions']
+        current = {}
+        changed = False
+        for month, path in self.partitions():
+            if month >= open_month:
+                continue
+            name = os.path.basename(path)
+            stat = os.stat(path)
+            entry = stored.get(name)
+            if entry is None or entry.get('signature') != [stat.st_size, stat.st_mtime]:
+                entry = {'signature': [stat.st_size, stat.st_mtime], 'activities': count_activities(path)}
+                changed = True
+            current[name] = entry
+        if changed or set(current) != set(stored):
+            summary['partitions'] = current
+            self._write_summary(summary)
+
+        activities = {}
+        for entry in current.values():
+            for name, (count, last_used) in entry['activities'].items():
+                merge_activity(activities, sys.intern(name), count, last_used)
+        return activities
+
+    def append(self, row):
+        """Queue a [timestamp, activity, type, duration] row for writing.
+
+        A row for a later month closes the open partition and starts a new
+        one. A row dated before the open month (the clock was set back) is
+        inserted into its own month's partition, so every partition stays in
+        time order.
+        """
+        month = row[0][:7]
+        with self._lock:
+            if PARTITION_PATTERN.match(f"{month}.csv") and month > self.month:
+                self._close_partition()
+                self._open_partition(month)
+            elif PARTITION_PATTERN.match(f"{month}.csv") and month < self.month:
+                self._insert_closed(month, row)
+                return
+            self.writer.write(row)
+
+    def _insert_closed(self, month, row):
+        """Rewrite a closed partition with `row` in its place and refresh the summary"""
+        entries = []
+        existing = dict(self.partitions()).get(month)
+        if existing is not None:
+            entries = list(self._read_partition(existing))
+        timestamps = [entry.get('Timestamp', '') for entry in entries]
+        entries.insert(bisect_right(timestamps, row[0]), dict(zip(LOG_HEADER, row)))
+
+        path = self.partition_path(month)
+        temp_file = f"{path}.tmp"
+        write_csv(temp_file, entries)
+        os.replace(temp_file, path)
+        if self.compress or (existing is not None and existing.endswith('.gz')):
+            compress_partition(path)
+        self.closed_activities = self._load_closed_summary(self.month)
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed"""
+        with self._lock:
+            writer = self.writer
+        return writer.flush(timeout) if writer else True
+
+    def last_entries(self, count):
+        """Return the newest `count` entries as dicts, oldest first"""
+        entries = []
+        for _, path in reversed(self.partitions()):
+            needed = count - len(entries)
+            if needed <= 0:
+                break
+            if path.endswith('.gz'):
+                rows = list(deque(self._read_partition(path), maxlen=needed))
+            else:
+                rows = tail_rows(path, needed)
+            entries = rows + entries
+        return entries
+
+    def activity_names(self):
+        """Return distinct work activity names, best frecency first"""
+        scored = [(frecency_score(count, last_used), name) for name, count, last_used in self.activity_stats()]
+        scored.sort(reverse=True)
+        return [name for _, name in scored]
+
+    def activity_stats(self):
+        """Return (name, use count, last used epoch seconds) for each work activity"""
+        with self._lock:
+            merged = dict(self.closed_activities)
+            for name, (count, last_used) in self.activity_index.activities.items():
+                merge_activity(merged, name, count, last_used)
+        return [(name, count, last_used) for name, (count, last_used) in merged.items()]
+
+    def entries_between(self, start=None, end=None):
+        """Yield entries with start <= Timestamp < end; either bound may be None.
+
+        Only partitions whose month overlaps the range are opened.
+        """
+        self.flush()
+        for month, path in self.partitions():
+            if start is not None and month < start[:7]:
+                continue
+            if end is not None and month > end[:7]:
+                break
+            try:
+                for row in self._read_partition(path):
+                    timestamp = row.get('Timestamp', '')
+                    if start is not None and timestamp < start:
+                        continue
+                    if end is not None and timestamp >= end:
+                        break
+                    yield row
+            except (OSError, EOFError, csv.Error, zlib.error) as e:
+                print(f"Skipping damaged log partition {path}: {e}")
+
+    @staticmethod
+    def _read_partition(path):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None) or LOG_HEADER
+            for record in reader:
+                if record:
+                    yield dict(zip(header, record))
+
+    def _partition_rows(self, path):
+        """Return the number of rows in a partition, cached until the file changes"""
+        stat = os.stat(path)
+        cached = self._row_counts.get(path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime):
+            return cached[2]
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rb') as f:
+                rows = max(0, sum(1 for line in f if line.strip()) - 1)  # Minus the header
+        except (OSError, EOFError, zlib.error) as e:
+            print(f"Skipping damaged log partition {path}: {e}")
+            rows = 0
+        self._row_counts[path] = (stat.st_size, stat.st_mtime, rows)
+        return rows
+
+    def entry_count(self):
+        """Return the number of entries over all partitions"""
+        self.flush()
+        return sum(self._partition_rows(path) for _, path in self.partitions())
+
+    def entries_at(self, position, count):
+        """Return up to `count` entries starting at the `position`-th, oldest first.
+
+        Row counts per partition are cached, so only the partitions holding
+        the page are read.
+        """
+        self.flush()
+        if count <= 0 or position < 0:
+            return []
+        entries = []
+        for _, path in self.partitions():
+            rows = self._partition_rows(path)
+            if position >= rows:
+                position -= rows
+                continue
+            try:
+                entries.extend(islice(self._read_partition(path), position, position + count - len(entries)))
+            except (OSError, EOFError, csv.Error, zlib.error) as e:
+                print(f"Skipping damaged log partition {path}: {e}")
+            position = 0
+            if len(entries) >= count:
+                break
+        return entries
+
+    def position_of(self, timestamp):
+        """Return the position of the first entry at or after `timestamp`"""
+        self.flush()
+        position = 0
+        for month, path in self.partitions():
+            if month < timestamp[:7]:
+                position += self._partition_rows(path)
+                continue
+            try:
+                for row in self._read_partition(path):
+                    if row.get('Timestamp', '') >= timestamp:
+                        return position
+                    position += 1
+            except (OSError, EOFError, csv.Error, zlib.error) as e:
+                print(f"Skipping damaged log partition {path}: {e}")
+        return position
+
+    def export_csv(self, path):
+        """Write every entry to `path` in the log's CSV format"""
+        write_csv(path, self.entries_between())
+
+    def replace_entries(self, rows):
+        """Rewrite every partition from `rows` (entry dicts, oldest first).
+
+        `rows` may be read lazily from this storage: the new partitions are
+        written to a staging folder, with the activity summary of each
+        closed month counted on the way, and swapped in at the end. Returns
+        the number of rows written.
+        """
+        with self._lock:
+            self.close()
+            staging = f"{self.log_dir.rstrip(os.sep)}.rewrite.tmp"
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            written = 0
+            month = None
+            target = None
+            writer = None
+            held = []  # Unreadable rows seen before the first dated row
+            counts = {}  # month -> activity -> [use count, last used]
+            try:
+                for row in rows:
+                    record = [row.get(column, '') for column in LOG_HEADER]
+                    row_month = record[0][:7]
+                    if PARTITION_PATTERN.match(f"{row_month}.csv") and row_month != month:
+                        if target is not None:
+                            target.close()
+                        month = row_month
+                        target = open(os.path.join(staging, f"{month}.csv"), 'a', newline='', encoding='utf-8')
+                        writer = csv.writer(target)
+                        writer.writerow(LOG_HEADER)
+                        writer.writerows(held)
+                        written += len(held)
+                        held = []
+                    if writer is None:
+                        held.append(record)
+                        continue
+                    writer.writerow(record)
+                    written += 1
+                    if record[1] and record[1] != 'Break':
+                        merge_activity(counts.setdefault(month, {}), sys.intern(record[1]), 1,
+                                       parse_timestamp(record[0]) or 0)
+            except BaseException:
+                if target is not None:
+                    target.close()
+                shutil.rmtree(staging, ignore_errors=True)
+                self.open()  # Nothing was swapped; carry on with the old partitions
+                raise
+            if target is not None:
+                target.close()
+            if held:
+                write_csv(os.path.join(staging, f"{datetime.now():%Y-%m}.csv"),
+                          (dict(zip(LOG_HEADER, record)) for record in held))
+                written += len(held)
+
+            # Swap the staged months in for the old ones
+            for _, path in self.partitions():
+                for stale in (path, f"{path}.journal", f"{path}.index.json", f"{path}.timeindex.json"):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+            summary = {'version': INDEX_VERSION, 'partitions': {}}
+            staged = sorted(os.listdir(staging))
+            for position, name in enumerate(staged):
+                path = os.path.join(self.log_dir, name)
+                os.replace(os.path.join(staging, name), path)
+                if position == len(staged) - 1:
+                    break  # The newest month stays open and is indexed by open()
+                if self.compress:
+                    path = compress_partition(path)
+                stat = os.stat(path)
+                summary['partitions'][os.path.basename(path)] = {
+                    'signature': [stat.st_size, stat.st_mtime],
+                    'activities': counts.get(name[:7], {}),
+                }
+            self._write_summary(summary)
+            os.rmdir(staging)
+            self.open()
+            return written
+
+    def close(self):
+        """Commit pending rows and bring the open partition's index up to date"""
+        with self._lock:
+            if self.writer is None:
+                return
+            self.writer.close()
+            self.activity_index.catch_up()
+            self.activity_index.save()
+
+
+def write_csv(path, entries):
+    """Stream entry dicts into a new CSV file in the log's format"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        for entry in entries:
+            writer.writerow([entry.get(column, '') for column in LOG_HEADER])
+
+
+def migrate_csv_to_sqlite(csv_file, connection):
+    """Copy the CSV log into an SQLite database once, streaming in chunks.
+
+    The migration is recorded in the meta table, so later starts skip it
+    even though the CSV file is left in place as a backup.
+    """
+    if connection.execute(SqliteStorage.SELECT_META, ('migrated_csv',)).fetchone():
+        return 0
+
+    migrated = 0
+    with open(csv_file, 'r', newline='', encoding='utf-8') as f, connection:
+        reader = csv.reader(f)
+        next(reader, None)  # Skip the header
+        chunk = []
+        for row in reader:
+            if len(row) < 3:
+                continue
+            chunk.append((row[0], row[1], row[2], row[3] if len(row) > 3 else ''))
+            if len(chunk) >= MIGRATION_CHUNK_SIZE:
+                connection.executemany(SqliteStorage.INSERT_ENTRY, chunk)
+                migrated += len(chunk)
+                chunk = []
+        if chunk:
+            connection.executemany(SqliteStorage.INSERT_ENTRY, chunk)
+            migrated += len(chunk)
+        connection.execute(SqliteStorage.UPSERT_META, ('migrated_csv', os.path.abspath(csv_file)))
+    return migrated
+
+
+def merge_activity(activities, name, count, last_used):
+    """Add `count` uses of `name` to an activity -> [count, last used] dict"""
+    stats = activities.get(name)
+    if stats is None:
+        activities[name] = [count, last_used]
+    else:
+        activities[name] = [stats[0] + count, max(stats[1], last_used)]
+
+
+def count_activities(path):
+    """Return activity -> [use count, last used] for one partition file"""
+    activities = {}
+    try:
+        for row in PartitionedStorage._read_partition(path):
+            activity = row.get('Activity')
+            if activity and activity != 'Break':
+                merge_activity(activities, activity, 1, parse_timestamp(row.get('Timestamp')) or 0)
+    except (OSError, EOFError, csv.Error, zlib.error) as e:
+        print(f"Skipping damaged log partition {path}: {e}")
+    return activities
+
+
+def compress_partition(path):
+    """Gzip a closed partition in place and return the new path"""
+    compressed = f"{path}.gz"
+    temp_file = f"{compressed}.tmp"
+    with open(path, 'rb') as source, gzip.open(temp_file, 'wb') as target:
+        shutil.copyfileobj(source, target)
+    os.replace(temp_file, compressed)
+    os.remove(path)
+    for sidecar in (f"{path}.index.json", f"{path}.timeindex.json"):
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+    return compressed
+
+
+def migrate_csv_to_partitions(csv_file, log_dir):
+    """Split the single-file CSV log into monthly partitions in one streaming pass.
+
+    Rows whose timestamp cannot be read stay with the rows around them.
+    Returns the number of rows migrated.
+    """
+    migrated = 0
+    month = None
+    target = None
+    writer = None
+    held = []  # Unreadable rows seen before the first dated row
+    try:
+        with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Skip the header
+            for row in reader:
+                if not row:
+                    continue
+                row_month = row[0][:7]
+                if PARTITION_PATTERN.match(f"{row_month}.csv") and row_month != month:
+                    if target is not None:
+                        target.close()
+                    month = row_month
+                    path = os.path.join(log_dir, f"{month}.csv")
+                    is_new = not os.path.exists(path)
+                    target = open(path, 'a', newline='', encoding='utf-8')
+                    writer = csv.writer(target)
+                    if is_new:
+                        writer.writerow(LOG_HEADER)
+                    writer.writerows(held)
+                    migrated += len(held)
+                    held = []
+                if writer is None:
+                    held.append(row)
+                    continue
+                writer.writerow(row)
+                migrated += 1
+    finally:
+        if target is not None:
+            target.close()
+    return migrated
+
+
+def open_storage(config, log_file, on_error=None):
+    """Create and open the storage backend selected in the configuration"""
+    backend = config.get('SETTINGS', 'storage_backend', fallback='csv')
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    if backend == 'sqlite':
+        storage = SqliteStorage(
+            config.get('SETTINGS', 'sqlite_path', fallback='time_tracking_log.db'),
+            legacy_csv=log_file,
+            on_error=on_error
+        )
+    elif backend == 'partitioned':
+        storage = PartitionedStorage(
+            config.get('SETTINGS', 'log_dir', fallback='logs'),
+            legacy_csv=log_file,
+            compress=config.getboolean('SETTINGS', 'compress_partitions', fallback=False),
+            flush_policy=config.get('SETTINGS', 'log_flush_policy', fallback='interval'),
+            flush_interval_ms=config.getint('SETTINGS', 'log_flush_interval_ms', fallback=1000),
+            fsync=config.getboolean('SETTINGS', 'log_fsync', fallback=False),
+            on_error=on_error
+        )
+    else:
+        storage = CsvStorage(
+            log_file,
+            flush_policy=config.get('SETTINGS', 'log_flush_policy', fallback='interval'),
+            flush_interval_ms=config.getint('SETTINGS', 'log_flush_interval_ms', fallback=1000),
+            fsync=config.getboolean('SETTINGS', 'log_fsync', fallback=False),
+            on_error=on_error
+        )
+    storage.open()
+    return storage
@@ -0,0 +1,423 @@
+"""Background upload of logged time entries to the Clockify API.
+
+Rows are turned into time entries the same way as for the CSV export and
+posted in batches over a small pool of keep-alive connections. A cursor in
+SYNC_STATE_FILE records how far the log has been uploaded, together with
+the idempotency keys of the last batch, so a restart neither skips nor
+repeats entries. CollectorPush sends the raw rows to a team collector the
+same way. Only the standard library is used.
+"""
+import getpass
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from urllib.parse import urlsplit
+
+from clockify_export import filter_entries, to_time_entries
+from clockify_storage import TIMESTAMP_FORMAT
+
+
+SYNC_STATE_FILE = "clockify_sync_state.json"
+DEFAULT_API_URL = "https://api.clockify.me/api/v1"
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 4
+DEFAULT_SYNC_INTERVAL_SECONDS = 300
+# How long an uploader waits after a cycle that found nothing to send
+IDLE_SYNC_INTERVAL_SECONDS = 5 * 60
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 60
+# Entries shorter than this are accidental double submissions, not work
+MIN_ENTRY_SECONDS = 60
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+COLLECTOR_STATE_FILE = "clockify_collector_state.json"
+COLLECTOR_BATCH_SIZE = 500
+COLLECTOR_INTERVAL_SECONDS = 60
+
+
+class RetryLater(Exception):
+    """The API could not be reached or kept failing; try again next cycle"""
+
+
+def idempotency_key(entry):
+    """A stable key for one time entry, identical on every retry"""
+    text = f"{entry.start:%Y-%m-%dT%H:%M:%S}|{entry.end:%Y-%m-%dT%H:%M:%S}|{entry.activity}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def to_utc(value):
+    """Format a naive local datetime the way the Clockify API expects"""
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class ConnectionPool:
+    """Reusable keep-alive connections to one HTTP(S) host"""
+
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT_SECONDS):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported API URL: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        if self.scheme == 'https':
+            connection = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        else:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        connection.connect()
+        connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return connection
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request and return (status, headers, body bytes)"""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._idle.put(connection)
+        return response.status, response.headers, data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class BackgroundUploader:
+    """Runs `sync_once` on a daemon thread every `interval_seconds`.
+
+    After a cycle that found nothing to send, the next one waits
+    `idle_interval_seconds` instead, so an idle helper is not woken every
+    minute; the front end calls `trigger` when an entry is logged.
+    """
+
+    thread_name = "uploader"
+    label = "Upload"
+    idle_interval_seconds = IDLE_SYNC_INTERVAL_SECONDS
+
+    def save_state(self, state):
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.state_file)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def trigger(self):
+        """Sync as soon as possible instead of waiting for the interval"""
+        self._wakeup.set()
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.pool.close()
+
+    def _run(self):
+        while self._running:
+            timeout = self.interval_seconds
+            try:
+                if not self.sync_once():
+                    timeout = max(timeout, self.idle_interval_seconds)
+            except RetryLater as e:
+                print(f"{self.label} postponed: {e}")
+            except Exception as e:
+                print(f"{self.label} failed: {e}")
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+
+class ClockifySync(BackgroundUploader):
+    """Uploads new log entries to Clockify from a background thread.
+
+    `sync_once` uploads everything after the cursor in batches of
+    `batch_size`, at most `concurrency` requests at a time. Failed requests
+    are retried with exponential backoff; when an entry keeps failing the
+    cycle stops and the cursor stays put, so the next cycle resumes there.
+    """
+
+    thread_name = "clockify-sync"
+    label = "Clockify sync"
+
+    def __init__(self, storage, api_key, workspace_id, api_url=DEFAULT_API_URL, project_id='',
+                 batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                 interval_seconds=DEFAULT_SYNC_INTERVAL_SECONDS, since=None, state_file=SYNC_STATE_FILE,
+                 backoff_base=BACKOFF_BASE_SECONDS, aliases=None):
+        self.storage = storage
+        self.aliases = aliases
+        self.api_key = api_key
+        self.workspace_id = workspace_id
+        self.project_id = project_id
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.since = since
+        self.state_file = state_file
+        self.backoff_base = backoff_base
+        self.pool = ConnectionPool(api_url)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.stats = {'sent': 0, 'failed': 0, 'retries': 0}
+        self._state_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, storage, config, aliases=None):
+        """Create a sync from the clockify_* settings, or None if it is disabled"""
+        if not config.getboolean('SETTINGS', 'clockify_sync_enabled', fallback=False):
+            return None
+        return cls(
+            storage,
+            api_key=config.get('SETTINGS', 'clockify_api_key', fallback=''),
+            workspace_id=config.get('SETTINGS', 'clockify_workspace_id', fallback=''),
+            api_url=config.get('SETTINGS', 'clockify_api_url', fallback=DEFAULT_API_URL),
+            project_id=config.get('SETTINGS', 'clockify_project_id', fallback=''),
+            batch_size=config.getint('SETTINGS', 'sync_batch_size', fallback=DEFAULT_BATCH_SIZE),
+            concurrency=config.getint('SETTINGS', 'sync_concurrency', fallback=DEFAULT_CONCURRENCY),
+            interval_seconds=config.getint('SETTINGS', 'sync_interval_seconds',
+                                           fallback=DEFAULT_SYNC_INTERVAL_SECONDS),
+            since=config.get('SETTINGS', 'clockify_sync_since', fallback=None),
+            aliases=aliases,
+        )
+
+    # State
+
+    def load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if not state.get('cursor'):
+            # Start from the configured date, or from now rather than uploading years of history
+            since = datetime.strptime(self.since, '%Y-%m-%d') if self.since else datetime.now()
+            state = {'cursor': since.strftime(TIMESTAMP_FORMAT), 'sent': []}
+            self.save_state(state)
+        return state
+
+    # Uploading
+
+    def sync_once(self):
+        """Upload every finished entry after the cursor; return the number sent"""
+        state = self.load_state()
+        sent_before = self.stats['sent']
+        entries = filter_entries(
+            to_time_entries(self.storage.entries_between(state['cursor']), aliases=self.aliases),
+            include_breaks=False,
+            min_seconds=MIN_ENTRY_SECONDS
+        )
+        try:
+            while True:
+                batch = list(islice(entries, self.batch_size))
+                if not batch:
+                    break
+                self._upload_batch(batch, state)
+        finally:
+            entries.close()
+        return self.stats['sent'] - sent_before
+
+    def _upload_batch(self, batch, state):
+        done = set(state['sent'])
+        pending = [(entry, idempotency_key(entry)) for entry in batch]
+        pending = [(entry, key) for entry, key in pending if key not in done]
+
+        def upload(item):
+            entry, key = item
+            uploaded = self._upload(entry, key)
+            with self._state_lock:
+                # Remember each success at once, so a crash mid-batch repeats nothing
+                state['sent'].append(key)
+                self.save_state(state)
+                self.stats['sent' if uploaded else 'failed'] += 1
+
+        failure = None
+        for future in [self.executor.submit(upload, item) for item in pending]:
+            try:
+                future.result()
+            except RetryLater as e:
+                failure = e
+        if failure is not None:
+            raise failure
+
+        # Every uploaded entry lasts at least a minute, so all of them start
+        # before the new cursor and will not be read again
+        state['cursor'] = batch[-1].end.strftime(TIMESTAMP_FORMAT)
+        state['sent'] = []
+        with self._state_lock:
+            self.save_state(state)
+
+    def _upload(self, entry, key):
+        """Post one entry; True once stored, False if the API rejects it for good"""
+        body = {
+            'start': to_utc(entry.start),
+            'end': to_utc(entry.end),
+            'description': entry.activity,
+            'billable': True,
+        }
+        if self.project_id:
+            body['projectId'] = self.project_id
+        headers = {
+            'X-Api-Key': self.api_key,
+            'Content-Type': 'application/json',
+            'Idempotency-Key': key,
+        }
+        path = f"/workspaces/{self.workspace_id}/time-entries"
+        data = json.dumps(body).encode('utf-8')
+
+        for attempt in range(MAX_ATTEMPTS):
+            retry_after = None
+            try:
+                status, response_headers, _ = self.pool.request('POST', path, data, headers)
+                if status < 300:
+                    return True
+                if status not in RETRY_STATUSES:
+                    print(f"Clockify rejected entry '{entry.activity}' at {entry.start}: HTTP {status}")
+                    return False
+                retry_after = response_headers.get('Retry-After')
+            except (OSError, http.client.HTTPException):
+                pass
+            if attempt + 1 < MAX_ATTEMPTS:
+                with self._state_lock:
+                    self.stats['retries'] += 1
+                time.sleep(self._backoff(attempt, retry_after))
+        raise RetryLater(f"Giving up on '{entry.activity}' at {entry.start} after {MAX_ATTEMPTS} attempts")
+
+    def _backoff(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt: the server's hint or jittered exponential"""
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+        delay = min(self.backoff_base * 2 ** attempt, BACKOFF_MAX_SECONDS)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def stop(self):
+        super().stop()
+        self.executor.shutdown(wait=False)
+
+
+class CollectorPush(BackgroundUploader):
+    """Pushes raw log rows to a team collector (see clockify_collector.py).
+
+    Rows are sent in append-only batches. The state file holds the newest
+    pushed timestamp and how many rows at that timestamp were sent; the
+    collector ignores rows it already has, so a batch repeated after a
+    crash is harmless.
+    """
+
+    thread_name = "collector-push"
+    label = "Collector push"
+
+    def __init__(self, storage, url, user, token='', batch_size=COLLECTOR_BATCH_SIZE,
+                 interval_seconds=COLLECTOR_INTERVAL_SECONDS, state_file=COLLECTOR_STATE_FILE):
+        self.storage = storage
+        self.user = user
+        self.token = token
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.state_file = state_file
+        self.pool = ConnectionPool(url)
+        self.stats = {'sent': 0, 'duplicates': 0}
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, storage, config):
+        """Create a pusher from the collector_* settings, or None if no collector is set"""
+        url = config.get('SETTINGS', 'collector_url', fallback='').strip()
+        if not url:
+            return None
+        return cls(
+            storage, url,
+            user=config.get('SETTINGS', 'collector_user', fallback='').strip() or getpass.getuser(),
+            token=config.get('SETTINGS', 'collector_token', fallback='').strip(),
+            batch_size=config.getint('SETTINGS', 'collector_batch_size', fallback=COLLECTOR_BATCH_SIZE),
+            interval_seconds=config.getint('SETTINGS', 'collector_interval_seconds',
+                                           fallback=COLLECTOR_INTERVAL_SECONDS),
+        )
+
+    def load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return {'cursor': state.get('cursor'), 'seen': int(state.get('seen', 0))}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {'cursor': None, 'seen': 0}
+
+    def sync_once(self):
+        """Push every row after the cursor; return the number of rows sent"""
+        state = self.load_state()
+        rows = self.storage.entries_between(state['cursor'])
+        sent_before = self.stats['sent']
+        try:
+            for _ in range(state['seen'] if state['cursor'] else 0):
+                if next(rows, None) is None:
+                    break
+            while True:
+                batch = [
+                    [row.get('Timestamp', ''), row.get('Activity', ''), row.get('Type', ''),
+                     row.get('Duration_Minutes') or '']
+                    for row in islice(rows, self.batch_size)
+                ]
+                if not batch:
+                    break
+                self._push(batch)
+                # Count the rows now sent that share the newest timestamp
+                newest = batch[-1][0]
+                same = sum(1 for entry in batch if entry[0] == newest)
+                state['seen'] = state['seen'] + same if newest == state['cursor'] else same
+                state['cursor'] = newest
+                self.save_state(state)
+        finally:
+            rows.close()
+        return self.stats['sent'] - sent_before
+
+    def _push(self, batch):
+        body = json.dumps({'user': self.user, 'entries': batch}).encode('utf-8')
+        try:
+            status, _, data = self.pool.request('POST', '/ingest', body, {
+                'Content-Type': 'application/json', 'Authorization': f"Bearer {self.token}",
+            })
+        except (OSError, http.client.HTTPException) as e:
+            raise RetryLater(f"collector unreachable ({e})")
+        if status == 401:
+            raise RetryLater("collector rejected collector_token")
+        if status != 200:
+            raise RetryLater(f"collector answered HTTP {status}")
+        result = json.loads(data.decode('utf-8'))
+        self.stats['sent'] += result.get('accepted', 0)
+        self.stats['duplicates'] += result.get('duplicates', 0)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# The helper's modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clockify_settings import Settings  # noqa: E402
+from clockify_storage import open_storage, write_csv  # noqa: E402
+
+
+BACKENDS = ('csv', 'sqlite', 'partitioned')
+
+
+@pytest.fixture
+def make_storage(tmp_path, monkeypatch):
+    """Open a storage backend in a temporary directory, seeded with entry dicts"""
+    monkeypatch.chdir(tmp_path)
+    opened = []
+
+    def make(backend='csv', entries=(), **options):
+        write_csv('time_tracking_log.csv', entries)
+        settings = Settings.from_dict({'storage_backend': backend, **options})
+        storage = open_storage(settings.config, 'time_tracking_log.csv')
+        opened.append(storage)
+        return storage
+
+    yield make
+    for storage in opened:
+        storage.close()
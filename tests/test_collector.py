@@ -0,0 +1,56 @@
+import argparse
+import json
+import threading
+
+import pytest
+
+from clockify_collector import CollectorServer, CollectorStore, report
+from clockify_sync import CollectorPush, ConnectionPool, RetryLater
+
+
+@pytest.fixture
+def collector(tmp_path):
+    store = CollectorStore(str(tmp_path / 'collector.db'))
+    store.open()
+    server = CollectorServer(('127.0.0.1', 0), store, 'secret')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield store, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    store.close()
+
+
+def test_ingest_requires_the_token(collector, make_storage):
+    store, url = collector
+    pool = ConnectionPool(url)
+    body = json.dumps({'user': 'mallory', 'entries': [['2026-10-08 09:00:00', 'Dev', 'Work', '']]}).encode('utf-8')
+    status, _, _ = pool.request('POST', '/ingest', body, {'Content-Type': 'application/json'})
+    pool.close()
+    assert status == 401
+    assert store.stats()['rows'] == 0
+
+    storage = make_storage('csv', [{'Timestamp': '2026-10-08 09:00:00', 'Activity': 'Dev', 'Type': 'Work'}])
+    with pytest.raises(RetryLater):
+        CollectorPush(storage, url, 'alice', token='wrong', state_file='push.json').sync_once()
+    pusher = CollectorPush(storage, url, 'alice', token='secret', state_file='push.json')
+    assert pusher.sync_once() == 1
+    pusher.pool.close()
+
+
+def test_report_credits_the_first_row_in_range(collector):
+    store, _ = collector
+    store.ingest('alice', [
+        ('2026-10-09 16:00:00', 'Dev', 'Work', 0),
+        ('2026-10-10 09:00:00', 'Review', 'Work', 30),
+        ('2026-10-10 10:00:00', 'Dev', 'Work', 60),
+    ])
+    # Dev started in range; the row that closes it the next morning is outside it
+    assert store.report('activity', '2026-10-09', '2026-10-10') == [('Dev', 30, 0)]
+    assert store.report('activity', '2026-10-10', '2026-10-11') == [('Review', 60, 0)]
+    assert store.report('day') == [('2026-10-09', 30, 0), ('2026-10-10', 60, 0)]
+
+
+def test_report_without_database(tmp_path, capsys):
+    args = argparse.Namespace(db=str(tmp_path / 'missing.db'), group='user', start=None, end=None, user=None)
+    assert report(args) == 1
+    assert "No collector database" in capsys.readouterr().err
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from clockify_core import ClockifyEngine, SimulatedClock, load_checkpoint, parse_time
+from clockify_settings import Settings
+
+
+def test_activity_history_uses_the_engine_clock(make_storage):
+    clock = SimulatedClock(datetime(2026, 1, 5, 9, 0))
+    engine = ClockifyEngine(Settings.from_dict({}), make_storage(), clock)
+    engine.submit_activity("Code review")
+    clock.advance(3600)
+    engine.submit_activity("Planning")
+    history = engine.activity_history
+    assert history._stats[history._ids["Code review"]][1] == datetime(2026, 1, 5, 9, 0).timestamp()
+    assert history._stats[history._ids["Planning"]][1] == datetime(2026, 1, 5, 10, 0).timestamp()
+
+
+def test_reminders_missed_while_suspended_fire_once(make_storage):
+    clock = SimulatedClock(datetime(2026, 1, 5, 9, 0))
+    settings = Settings.from_dict({'reminder_interval_hours': '1', 'enable_work_hours_only': 'False'})
+    engine = ClockifyEngine(settings, make_storage(), clock)
+    fired = []
+    engine.on_reminder_due = lambda: fired.append(clock.now())
+    engine.run_scheduler_step()
+    clock.suspend(5 * 3600)
+    engine.run_scheduler_step()
+    engine.run_scheduler_step()
+    assert fired == [datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 14, 0)]
+
+
+def test_first_reminder_time_is_checkpointed(make_storage):
+    clock = SimulatedClock(datetime(2026, 1, 5, 9, 0))
+    settings = Settings.from_dict({'enable_work_hours_only': 'False'})
+    engine = ClockifyEngine(settings, make_storage(), clock)
+    engine.run_scheduler_step()
+    engine.stop()
+    state = load_checkpoint(engine.checkpoint_file)
+    assert parse_time(state['last_reminder_time']) == datetime(2026, 1, 5, 9, 0)
@@ -0,0 +1,39 @@
+import csv
+
+import pytest
+
+from clockify_export import export_clockify_csv
+from conftest import BACKENDS
+
+
+ENTRIES = [
+    {'Timestamp': '2026-10-08 09:00:00', 'Activity': 'Planning', 'Type': 'Work'},
+    {'Timestamp': '2026-10-08 10:00:00', 'Activity': 'Dev', 'Type': 'Work'},
+    {'Timestamp': '2026-10-09 11:30:00', 'Activity': 'Review', 'Type': 'Work'},
+]
+
+
+def read_export(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_end_bound_keeps_last_entry_in_range(make_storage, backend):
+    storage = make_storage(backend, ENTRIES)
+    written = export_clockify_csv(storage, 'out.csv', start='2026-10-08', end='2026-10-09')
+    rows = read_export('out.csv')
+    assert written == 2
+    assert [row['Description'] for row in rows] == ['Planning', 'Dev']
+    # Dev ends when the next row (outside the range) starts
+    assert (rows[1]['End Date'], rows[1]['End Time']) == ('2026-10-09', '11:30:00')
+
+
+def test_end_bound_incremental_neither_repeats_nor_skips(make_storage):
+    storage = make_storage('csv', ENTRIES)
+    assert export_clockify_csv(storage, 'first.csv', end='2026-10-09', incremental=True,
+                               state_file='state.json') == 2
+    assert export_clockify_csv(storage, 'second.csv', incremental=True, state_file='state.json') == 0
+    storage.append(['2026-10-09 12:00:00', 'Lunch', 'Work', ''])
+    export_clockify_csv(storage, 'third.csv', incremental=True, state_file='state.json')
+    assert [row['Description'] for row in read_export('third.csv')] == ['Review']
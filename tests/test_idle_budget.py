@@ -0,0 +1,128 @@
+"""The idle resource budget of a helper hidden in the tray.
+
+Each test starts a helper in a child process, hides it, lets it settle and
+reads its CPU time, wakeups and RSS from /proc over IDLE_SECONDS. Reading
+from outside means the measurement wakes nothing in the helper.
+
+The budget is per minute, so each test idles for a full minute; they only
+run with CLOCKIFY_IDLE_TESTS=1 set.
+"""
+import configparser
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from clockify_resources import check_budget, process_usage, usage_between
+
+
+IDLE_SECONDS = 60
+SETTLE_SECONDS = 3
+LOG_ROWS = 20000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = [
+    pytest.mark.skipif(os.environ.get('CLOCKIFY_IDLE_TESTS') != '1',
+                       reason="idles for a minute; set CLOCKIFY_IDLE_TESTS=1"),
+    pytest.mark.skipif(not os.path.isdir('/proc/self/task'), reason="reads usage from /proc"),
+]
+
+
+class StubTrayIcon:
+    """Stands in for pystray.Icon: its run() blocks like a tray event loop"""
+
+    def __init__(self, name, image, title, menu=None):
+        self._icon = types.SimpleNamespace()
+        self._stopped = threading.Event()
+
+    def run(self):
+        self._stopped.wait()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def install_stub_tray():
+    pystray = types.ModuleType('pystray')
+    pystray.Icon = StubTrayIcon
+    pystray.Menu = lambda *items: items
+    pystray.MenuItem = lambda text, action: (text, action)
+    pystray.MouseEventType = types.SimpleNamespace(DOUBLE_CLICK='double-click')
+    sys.modules['pystray'] = pystray
+
+
+def run_hidden_helper():
+    """Child: the full helper with Tk and a stub tray icon, shown once and hidden"""
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        print("no display", flush=True)
+        return
+
+    from clockify_bench import generate_log
+    generate_log('time_tracking_log.csv', LOG_ROWS)
+    config = configparser.ConfigParser()
+    config['SETTINGS'] = {'low_power_mode': 'True'}
+    with open('clockify_helper_config.ini', 'w') as f:
+        config.write(f)
+
+    install_stub_tray()
+    import clockify_helper
+    clockify_helper.ClockifyHelper.load_tray_image = lambda self: None
+    app = clockify_helper.ClockifyHelper()
+    app.engine.submit_activity("Idle budget check")
+    app.show_window()
+    app.root.update()
+    app.hide_window()
+    app.root.update()
+    print("idle" if not app.main_window_built else "widgets kept while hidden", flush=True)
+    app.root.mainloop()
+
+
+def run_engine():
+    """Child: the helper's background machinery without Tk or the tray"""
+    from clockify_bench import start_idle_engine
+    start_idle_engine(rows=LOG_ROWS)
+    print("idle", flush=True)
+    threading.Event().wait()
+
+
+def measure_idle(mode, workdir):
+    child = subprocess.Popen([sys.executable, os.path.abspath(__file__), mode], cwd=workdir,
+                             env={**os.environ, 'PYTHONPATH': ROOT}, stdout=subprocess.PIPE, text=True)
+    try:
+        state = child.stdout.readline().strip()
+        if state == "no display":
+            pytest.skip("Tk needs a display")
+        assert state == "idle"
+        time.sleep(SETTLE_SECONDS)
+        before = process_usage(child.pid)
+        time.sleep(IDLE_SECONDS)
+        after = process_usage(child.pid)
+        assert child.poll() is None
+        # Wakeups are summed per thread, so a thread that exited would hide its own
+        assert after['threads'] == before['threads']
+    finally:
+        child.kill()
+        child.wait()
+    return usage_between(before, after)
+
+
+def test_hidden_helper_stays_within_idle_budget(tmp_path):
+    usage = measure_idle('helper', tmp_path)
+    assert check_budget(usage) == [], usage
+
+
+def test_background_engine_stays_within_idle_budget(tmp_path):
+    usage = measure_idle('engine', tmp_path)
+    assert check_budget(usage) == [], usage
+
+
+if __name__ == "__main__":
+    {'helper': run_hidden_helper, 'engine': run_engine}[sys.argv[1]]()
@@ -0,0 +1,80 @@
+import csv
+import io
+
+import pytest
+
+import clockify_import
+from clockify_import import import_files, split_ranges
+
+
+def log_rows(storage):
+    return [(row['Timestamp'], row['Activity'], row['Duration_Minutes']) for row in storage.entries_between()]
+
+
+def write_log(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Timestamp', 'Activity', 'Type', 'Duration_Minutes'])
+        writer.writerows(rows)
+
+
+def test_existing_durations_are_kept(make_storage, tmp_path):
+    storage = make_storage('csv', [
+        {'Timestamp': '2026-10-08 09:00:00', 'Activity': 'Planning', 'Type': 'Work', 'Duration_Minutes': '7'},
+        {'Timestamp': '2026-10-09 16:00:00', 'Activity': 'Dev', 'Type': 'Work'},
+        {'Timestamp': '2026-10-12 09:00:00', 'Activity': 'Review', 'Type': 'Work'},
+    ])
+    write_log(tmp_path / 'old.csv', [['2026-10-08 08:30:00', 'Email', 'Work', '']])
+    import_files([str(tmp_path / 'old.csv')], storage, workers=1)
+    assert log_rows(storage) == [
+        ('2026-10-08 08:30:00', 'Email', ''),
+        ('2026-10-08 09:00:00', 'Planning', '30'),  # Follows the imported row
+        ('2026-10-09 16:00:00', 'Dev', ''),
+        ('2026-10-12 09:00:00', 'Review', ''),
+    ]
+
+
+def test_reimporting_the_log_changes_nothing(make_storage, tmp_path):
+    entries = [
+        {'Timestamp': '2026-10-09 16:00:00', 'Activity': 'Dev', 'Type': 'Work', 'Duration_Minutes': '3'},
+        {'Timestamp': '2026-10-12 09:00:00', 'Activity': 'Review', 'Type': 'Work', 'Duration_Minutes': ''},
+    ]
+    storage = make_storage('csv', entries)
+    before = log_rows(storage)
+    storage.export_csv(str(tmp_path / 'export.csv'))
+    stats = import_files([str(tmp_path / 'export.csv')], storage, workers=1)
+    assert stats['duplicates'] == 2
+    assert log_rows(storage) == before
+
+
+def test_garbage_timestamps_are_rejected(make_storage, tmp_path):
+    storage = make_storage('csv', [])
+    write_log(tmp_path / 'old.csv', [
+        ['2026-10-08 08:30:00', 'Email', 'Work', ''],
+        ['not a date at all!!', 'Junk', 'Work', ''],
+        ['2026-13-45 99:99:99', 'Junk', 'Work', ''],
+    ])
+    stats = import_files([str(tmp_path / 'old.csv')], storage, workers=1)
+    assert stats['rejected'] == 2
+    assert log_rows(storage) == [('2026-10-08 08:30:00', 'Email', '')]
+
+
+@pytest.mark.parametrize('block_bytes', [16, 1024 * 1024])
+def test_ranges_never_split_quoted_line_breaks(tmp_path, monkeypatch, block_bytes):
+    monkeypatch.setattr(clockify_import, 'SPLIT_BLOCK_BYTES', block_bytes)
+    path = tmp_path / 'clockify.csv'
+    header = ['Project', 'Description', 'Start Date', 'Start Time', 'End Date', 'End Time']
+    records = [
+        ['Site', f'Call {i}\nwith "notes"\nover lines', '2026-10-08', f'09:{i:02}:00', '2026-10-08', f'09:{i:02}:30']
+        for i in range(30)
+    ]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(header)
+        writer.writerows(records)
+    data = path.read_bytes()
+    for chunk_bytes in (1, 7, 50, 1000):
+        parsed = []
+        for start, end in split_ranges(str(path), chunk_bytes):
+            parsed.extend(csv.reader(io.StringIO(data[start:end].decode('utf-8'), newline='')))
+        assert parsed == records
@@ -0,0 +1,18 @@
+import os
+import socket
+import stat
+
+import pytest
+
+from clockify_ipc import IpcServer
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix sockets only")
+def test_socket_is_owner_only_from_creation(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, 'chmod', lambda path, mode: None)
+    server = IpcServer(None, socket_path=str(tmp_path / 'helper.sock'))
+    server.start()
+    try:
+        assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+    finally:
+        server.stop()
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+from clockify_reports import aggregate_columns
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_engine_import_does_not_load_numpy():
+    code = "import sys, clockify_core; print('numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
+
+
+def test_small_batches_are_summed_without_numpy():
+    rows = [
+        {'Timestamp': '2026-10-08 09:00:00', 'Activity': 'Dev', 'Type': 'Work', 'Duration_Minutes': ''},
+        {'Timestamp': '2026-10-08 10:00:00', 'Activity': 'Break', 'Type': 'Break', 'Duration_Minutes': '60'},
+        {'Timestamp': '2026-10-08 10:15:00', 'Activity': 'Dev', 'Type': 'Work', 'Duration_Minutes': '15'},
+    ]
+    days, activities, pending, seen = aggregate_columns(rows)
+    assert days == {'2026-10-08': [60.0, 15.0]}
+    assert activities == {('2026-10', 'Dev'): 60.0, ('2026-10', 'Break'): 15.0}
+    assert pending == ('2026-10-08 10:15:00', 'Dev', 'Work')
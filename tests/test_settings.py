@@ -0,0 +1,11 @@
+from clockify_settings import Settings
+
+
+def test_save_keeps_strftime_formats(tmp_path):
+    path = tmp_path / 'clockify_helper_config.ini'
+    path.write_text("[SETTINGS]\nexport_date_format = %Y-%m-%d\n")
+    settings = Settings(str(path))
+    settings.save({'reminder_interval_hours': '3'})
+    reloaded = Settings(str(path))
+    assert reloaded.config.get('SETTINGS', 'export_date_format') == '%Y-%m-%d'
+    assert reloaded.current.reminder_interval_hours == 3
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from clockify_core import ClockifyEngine
+from clockify_settings import Settings
+from conftest import BACKENDS
+
+
+NAMES = ['Dev', 'Review', 'Planning', 'Email', 'Support']
+
+
+def entries():
+    # Dev is used most, Support least
+    rows = []
+    for uses, name in enumerate(reversed(NAMES), start=1):
+        for minute in range(uses):
+            rows.append({'Timestamp': f"2026-10-0{uses} 09:{minute:02}:00", 'Activity': name, 'Type': 'Work'})
+    return rows
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_history_cap_only_limits_autocomplete(make_storage, backend):
+    options = {'max_history_names': '2'}
+    storage = make_storage(backend, entries(), **options)
+    stats = {name: count for name, count, _ in storage.activity_stats()}
+    assert stats == {'Dev': 5, 'Review': 4, 'Planning': 3, 'Email': 2, 'Support': 1}
+
+    engine = ClockifyEngine(Settings.from_dict(options), storage)
+    assert sorted(engine.activity_history) == ['Dev', 'Review']
+
+
+def test_csv_sidecar_keeps_every_name(make_storage):
+    storage = make_storage('csv', entries(), max_history_names='2')
+    storage.close()
+    with open('time_tracking_log.csv.index.json', encoding='utf-8') as f:
+        assert sorted(json.load(f)['activities']) == sorted(NAMES)
+
+
+@pytest.mark.parametrize('compress', ['False', 'True'])
+def test_partitioned_append_routes_back_dated_rows(make_storage, compress):
+    rows = [
+        {'Timestamp': '2026-09-10 09:00:00', 'Activity': 'Dev', 'Type': 'Work'},
+        {'Timestamp': '2026-09-20 09:00:00', 'Activity': 'Dev', 'Type': 'Work'},
+        {'Timestamp': '2026-10-02 09:00:00', 'Activity': 'Review', 'Type': 'Work'},
+    ]
+    storage = make_storage('partitioned', rows, compress_partitions=compress)
+    storage.append(['2026-09-15 09:00:00', 'Planning', 'Work', ''])
+    storage.append(['2026-08-30 09:00:00', 'Email', 'Work', ''])
+    storage.append(['2026-10-03 09:00:00', 'Dev', 'Work', ''])
+
+    def timestamps(start=None, end=None):
+        return [row['Timestamp'] for row in storage.entries_between(start, end)]
+
+    assert timestamps('2026-09-01', '2026-09-18') == ['2026-09-10 09:00:00', '2026-09-15 09:00:00']
+    assert timestamps() == ['2026-08-30 09:00:00', '2026-09-10 09:00:00', '2026-09-15 09:00:00',
+                            '2026-09-20 09:00:00', '2026-10-02 09:00:00', '2026-10-03 09:00:00']
+    stats = {name: count for name, count, _ in storage.activity_stats()}
+    assert (stats['Planning'], stats['Email']) == (1, 1)
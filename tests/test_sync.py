@@ -0,0 +1,34 @@
+from clockify_sync import BackgroundUploader, RetryLater
+
+
+class ScriptedUploader(BackgroundUploader):
+    """Runs scripted sync cycles and records how long it waits after each"""
+
+    interval_seconds = 60
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.waits = []
+        self._wakeup = self
+        self._running = True
+
+    def sync_once(self):
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        self._running = bool(self.results)
+
+    def clear(self):
+        pass
+
+
+def test_uploader_backs_off_while_nothing_is_pending():
+    uploader = ScriptedUploader([5, 0, 0, RetryLater("offline"), 2])
+    uploader._run()
+    idle = BackgroundUploader.idle_interval_seconds
+    assert uploader.waits == [60, idle, idle, 60, 60]
+    assert idle > 60